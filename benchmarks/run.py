@@ -0,0 +1,377 @@
+"""Offline benchmarks for the casting and serving hot paths.
+
+Each benchmark times one operation in a calibrated loop, reports operations
+per second and allocation figures from ``tracemalloc``, and the whole run is
+written as JSON. A run can be compared against a stored baseline; any
+benchmark whose throughput drops by more than the threshold is reported as
+a regression and the process exits non-zero.
+
+Usage:
+    python -m benchmarks.run                      # run and compare to the baseline
+    python -m benchmarks.run --save-baseline      # record a new baseline
+    python -m benchmarks.run --filter cast --threshold 0.1
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_OUTPUT_PATH = os.path.join(BENCHMARK_DIR, "latest.json")
+
+# Relative drop in ops/sec reported as a regression
+DEFAULT_THRESHOLD = 0.2
+
+# Minimum wall time of one timed repeat, in seconds
+DEFAULT_MIN_TIME = 0.2
+DEFAULT_REPEAT = 5
+
+# Calls traced per benchmark when measuring allocations
+ALLOCATION_CALLS = 50
+
+
+class BenchmarkResult(NamedTuple):
+    """Timing and allocation figures for one benchmark."""
+
+    name: str
+    ops_per_sec: float
+    mean_us: float
+    best_us: float
+    iterations: int
+    peak_bytes_per_op: int
+    retained_bytes_per_op: float
+
+
+# --- Benchmark Definitions ---
+# Each benchmark is a context manager that performs its setup and yields the
+# zero-argument operation to time.
+BENCHMARKS: Dict[str, Callable[[], contextlib.AbstractContextManager]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    """Registers a generator function as a named benchmark."""
+
+    def register(fn: Callable[[], Iterator[Callable[[], Any]]]) -> Callable:
+        BENCHMARKS[name] = contextlib.contextmanager(fn)
+        return fn
+
+    return register
+
+
+@benchmark("perform_division")
+def bench_perform_division():
+    """Times one division of the working stalks."""
+    from core.yarrow import WORKING_STALKS, perform_division
+
+    rng = random.Random(1)
+    yield lambda: perform_division(WORKING_STALKS, rng)
+
+
+@benchmark("generate_one_line")
+def bench_generate_one_line():
+    """Times the three divisions that make one line."""
+    from core.yarrow import generate_one_line
+
+    rng = random.Random(1)
+    yield lambda: generate_one_line(rng=rng)
+
+
+@benchmark("generate_hexagram")
+def bench_generate_hexagram():
+    """Times casting the six lines of a hexagram."""
+    from core.yarrow import generate_hexagram
+
+    rng = random.Random(1)
+    yield lambda: generate_hexagram(rng=rng)
+
+
+@benchmark("get_hexagram_number")
+def bench_get_hexagram_number():
+    """Times the King Wen lookup for six lines."""
+    from core.yarrow import get_hexagram_number
+
+    lines = [7, 8, 9, 6, 7, 8]
+    yield lambda: get_hexagram_number(lines)
+
+
+@benchmark("load_hexagram_data")
+def bench_load_hexagram_data():
+    """Times fetching the shared hexagram corpus."""
+    from core.yarrow import load_hexagram_data
+
+    yield load_hexagram_data
+
+
+@benchmark("cast_hexagram")
+def bench_cast_hexagram():
+    """Times a full cast, including the relating hexagram."""
+    from core.yarrow import cast_hexagram
+
+    rng = random.Random(1)
+    yield lambda: cast_hexagram(rng=rng)
+
+
+@contextlib.contextmanager
+def served_app() -> Iterator[Any]:
+    """Runs the app in-process, recording reading history to a throwaway database."""
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    previous = os.environ.get("HISTORY_DB_PATH")
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["HISTORY_DB_PATH"] = os.path.join(directory, "history.db")
+        try:
+            # TestClient drives the ASGI app in-process, lifespan included
+            with TestClient(app) as client:
+                yield client
+        finally:
+            if previous is None:
+                del os.environ["HISTORY_DB_PATH"]
+            else:
+                os.environ["HISTORY_DB_PATH"] = previous
+
+
+@benchmark("post_cast")
+def bench_post_cast():
+    """Times an unseeded POST /cast through the ASGI stack."""
+    with served_app() as client:
+        yield lambda: client.post("/cast", json={"mode": "yarrow"})
+
+
+@benchmark("post_cast_seeded")
+def bench_post_cast_seeded():
+    """Times a seeded POST /cast, which the cache can answer."""
+    with served_app() as client:
+        yield lambda: client.post("/cast", json={"mode": "yarrow", "seed": 42})
+
+
+# --- Measurement ---
+def calibrate(operation: Callable[[], Any], min_time: float) -> int:
+    """Finds a loop count whose run takes at least ``min_time`` seconds.
+
+    Args:
+        operation: Operation to time
+        min_time: Minimum duration of one timed loop in seconds
+
+    Returns:
+        Number of calls per timed loop
+    """
+    number = 1
+    while True:
+        elapsed = time_loop(operation, number)
+        if elapsed >= min_time:
+            return number
+        # Aim a little past min_time so the next attempt usually succeeds
+        number = max(number * 2, int(number * min_time * 1.2 / max(elapsed, 1e-9)))
+
+
+def time_loop(operation: Callable[[], Any], number: int) -> float:
+    """Times ``number`` calls of an operation and returns elapsed seconds."""
+    start = time.perf_counter()
+    for _ in range(number):
+        operation()
+    return time.perf_counter() - start
+
+
+def measure_allocations(
+    operation: Callable[[], Any], calls: int = ALLOCATION_CALLS
+) -> tuple[int, float]:
+    """Measures memory allocated by an operation with ``tracemalloc``.
+
+    Args:
+        operation: Operation to trace
+        calls: Number of traced calls
+
+    Returns:
+        Tuple of (largest peak above the starting point for a single call,
+        mean bytes still held after each call)
+    """
+    tracemalloc.start()
+    try:
+        start_current, _ = tracemalloc.get_traced_memory()
+        peak = 0
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            operation()
+            _, call_peak = tracemalloc.get_traced_memory()
+            peak = max(peak, call_peak - before)
+        end_current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, (end_current - start_current) / calls
+
+
+def run_benchmark(
+    name: str, min_time: float = DEFAULT_MIN_TIME, repeat: int = DEFAULT_REPEAT
+) -> BenchmarkResult:
+    """Runs one registered benchmark.
+
+    Args:
+        name: Benchmark name
+        min_time: Minimum duration of one timed loop in seconds
+        repeat: Number of timed loops; the fastest sets ops/sec
+
+    Returns:
+        BenchmarkResult for the benchmark
+    """
+    with BENCHMARKS[name]() as operation:
+        number = calibrate(operation, min_time)
+        timings = [time_loop(operation, number) for _ in range(repeat)]
+        peak_bytes, retained_bytes = measure_allocations(operation)
+
+    best = min(timings) / number
+    mean = sum(timings) / (repeat * number)
+    return BenchmarkResult(
+        name=name,
+        ops_per_sec=round(1 / best, 1),
+        mean_us=round(mean * 1e6, 3),
+        best_us=round(best * 1e6, 3),
+        iterations=number * repeat,
+        peak_bytes_per_op=peak_bytes,
+        retained_bytes_per_op=round(retained_bytes, 1),
+    )
+
+
+def run_suite(
+    names: Optional[List[str]] = None,
+    min_time: float = DEFAULT_MIN_TIME,
+    repeat: int = DEFAULT_REPEAT,
+) -> Dict[str, Any]:
+    """Runs benchmarks and collects the results with environment details.
+
+    Args:
+        names: Benchmarks to run (defaults to all)
+        min_time: Minimum duration of one timed loop in seconds
+        repeat: Number of timed loops per benchmark
+
+    Returns:
+        JSON-serializable report
+    """
+    results = {}
+    for name in names or list(BENCHMARKS):
+        results[name] = run_benchmark(name, min_time=min_time, repeat=repeat)._asdict()
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[str]:
+    """Compares a report against a baseline.
+
+    Args:
+        report: Report from ``run_suite``
+        baseline: Earlier report to compare against
+        threshold: Relative drop in ops/sec reported as a regression
+
+    Returns:
+        Descriptions of the benchmarks that regressed
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        change = result["ops_per_sec"] / previous["ops_per_sec"] - 1
+        result["baseline_ops_per_sec"] = previous["ops_per_sec"]
+        result["change"] = round(change, 4)
+        if change < -threshold:
+            regressions.append(
+                f"{name}: {result['ops_per_sec']:.0f} ops/sec vs "
+                f"{previous['ops_per_sec']:.0f} baseline ({change:+.1%})"
+            )
+    return regressions
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Formats a report as a text table."""
+    rows = [
+        f"{'benchmark':<22}{'ops/sec':>14}{'best us':>12}"
+        f"{'peak B/op':>12}{'change':>10}"
+    ]
+    for name, result in report["results"].items():
+        change = f"{result['change']:+.1%}" if "change" in result else "-"
+        rows.append(
+            f"{name:<22}{result['ops_per_sec']:>14,.0f}{result['best_us']:>12.2f}"
+            f"{result['peak_bytes_per_op']:>12,}{change:>10}"
+        )
+    return "\n".join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs the suite from the command line and returns the exit status."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the casting and serving hot paths"
+    )
+    parser.add_argument(
+        "--filter", help="Only run benchmarks whose name contains this text"
+    )
+    parser.add_argument(
+        "--output", default=DEFAULT_OUTPUT_PATH, help="Where to write the JSON report"
+    )
+    parser.add_argument(
+        "--baseline",
+        default=DEFAULT_BASELINE_PATH,
+        help="Baseline report to compare against",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Write this run as the new baseline",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed relative slowdown",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=DEFAULT_MIN_TIME,
+        help="Seconds per timed loop",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help="Timed loops per benchmark"
+    )
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if not args.filter or args.filter in name]
+    report = run_suite(names, min_time=args.min_time, repeat=args.repeat)
+
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+
+    output_path = args.baseline if args.save_baseline else args.output
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(format_report(report))
+    print(f"\nWrote {output_path}")
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
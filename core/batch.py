@@ -0,0 +1,163 @@
+"""Vectorized yarrow stalk casting with NumPy.
+
+Runs the same three-stage division as ``core.yarrow.perform_division`` over
+whole arrays of lines at once, for analytics and simulation jobs that need
+millions of hexagrams. A batch is generated in fixed-size chunks so memory
+stays bounded and a given seed always yields the same hexagrams.
+"""
+
+from typing import Callable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from core.results import PACKED_CHANGING_SHIFT, CastResultArray
+from core.tables import HEXAGRAM_NUMBER_BY_MASK
+from core.yarrow import WORKING_STALKS
+
+LINES_PER_HEXAGRAM = 6
+
+# Number of hexagrams generated per vectorized chunk
+BATCH_CHUNK_SIZE = 1 << 18
+
+_HEXAGRAM_NUMBER_BY_MASK = np.array(HEXAGRAM_NUMBER_BY_MASK, dtype=np.uint8)
+
+
+class HexagramBatch(NamedTuple):
+    """A batch of cast hexagrams."""
+
+    lines: np.ndarray  # (n, 6) uint8 line values 6-9, bottom to top
+    primary: np.ndarray  # (n,) uint8 King Wen numbers
+    relating: np.ndarray  # (n,) uint8 King Wen numbers (primary if nothing changes)
+
+    def results(self) -> CastResultArray:
+        """Packs the batch into a ``CastResultArray`` at two bytes per cast."""
+        return CastResultArray.from_packed(pack_results_batch(self.lines))
+
+
+def perform_division_batch(
+    stalks_in: np.ndarray, rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized version of ``perform_division`` for an array of stalk counts.
+
+    Args:
+        stalks_in: Array of stalk counts, each at least 2
+        rng: NumPy random generator
+
+    Returns:
+        Tuple of (remainder, remaining_stalks) arrays
+    """
+    # Left pile is uniform on 1..stalks_in - 1, as random.randint(1, stalks_in - 1)
+    left_pile = rng.integers(1, stalks_in, dtype=stalks_in.dtype)
+
+    # One stalk is taken from the right pile and held between the fingers
+    right_pile = stalks_in - left_pile - 1
+
+    # Remainders of counting off by fours are 1-4, never 0
+    remainder_left = (left_pile - 1) % 4 + 1
+    remainder_right = (right_pile - 1) % 4 + 1
+
+    total_remainder = remainder_left + remainder_right + 1
+    return total_remainder, stalks_in - total_remainder
+
+
+def generate_lines_batch(count: int, rng: np.random.Generator) -> np.ndarray:
+    """Generates line values with the three-stage yarrow stalk process.
+
+    Args:
+        count: Number of lines to generate
+        rng: NumPy random generator
+
+    Returns:
+        Array of ``count`` uint8 line values (6, 7, 8, or 9)
+    """
+    stalks = np.full(count, WORKING_STALKS, dtype=np.int16)
+    line_values = np.zeros(count, dtype=np.uint8)
+
+    for _ in range(3):
+        total_remainder, stalks = perform_division_batch(stalks, rng)
+        # Same rule as get_value_from_remainder: 4 or 5 -> 3, 8 or 9 -> 2
+        line_values += np.where(total_remainder < 6, 3, 2).astype(np.uint8)
+
+    return line_values
+
+
+def line_masks_batch(lines: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Packs an (n, 6) array of line values into yang and changing masks.
+
+    Args:
+        lines: (n, 6) array of line values, bottom to top
+
+    Returns:
+        Tuple of (yang_mask, changing_mask) uint8 arrays of length n
+    """
+    yang = (lines & 1).astype(bool)  # 7 and 9 are odd
+    changing = (lines == 6) | (lines == 9)
+    # Six bits per row pack into one byte with line 1 as the lowest bit
+    yang_mask = np.packbits(yang, axis=1, bitorder="little").ravel()
+    changing_mask = np.packbits(changing, axis=1, bitorder="little").ravel()
+    return yang_mask, changing_mask
+
+
+def pack_results_batch(lines: np.ndarray) -> np.ndarray:
+    """Packs an (n, 6) array of line values into 12-bit ``CastResult`` values.
+
+    Args:
+        lines: (n, 6) array of line values, bottom to top
+
+    Returns:
+        uint16 array of length n, yang mask in bits 0-5 and changing mask in bits 6-11
+    """
+    yang_mask, changing_mask = line_masks_batch(lines)
+    return (
+        yang_mask.astype(np.uint16)
+        | changing_mask.astype(np.uint16) << PACKED_CHANGING_SHIFT
+    )
+
+
+def hexagram_numbers_batch(lines: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Computes primary and relating King Wen numbers for an (n, 6) line array.
+
+    Args:
+        lines: (n, 6) array of line values, bottom to top
+
+    Returns:
+        Tuple of (primary, relating) uint8 arrays of length n
+    """
+    yang_mask, changing_mask = line_masks_batch(lines)
+    relating_mask = yang_mask ^ changing_mask
+    return _HEXAGRAM_NUMBER_BY_MASK[yang_mask], _HEXAGRAM_NUMBER_BY_MASK[relating_mask]
+
+
+def generate_hexagrams_batch(
+    n: int,
+    seed: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+    generate_lines: Optional[Callable[[int, np.random.Generator], np.ndarray]] = None,
+) -> HexagramBatch:
+    """Casts ``n`` hexagrams with the yarrow stalk method in vectorized form.
+
+    Args:
+        n: Number of hexagrams to cast
+        seed: Optional random seed for reproducible results
+        rng: Optional NumPy generator to draw from instead of seeding a new one
+        generate_lines: Optional vectorized line generator to use instead of
+            the yarrow stalk process (see ``core.methods``)
+
+    Returns:
+        HexagramBatch with (n, 6) lines and primary and relating numbers
+    """
+    if n < 0:
+        raise ValueError(f"Number of hexagrams must be non-negative: {n}")
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    if generate_lines is None:
+        generate_lines = generate_lines_batch
+
+    lines = np.empty((n, LINES_PER_HEXAGRAM), dtype=np.uint8)
+    for start in range(0, n, BATCH_CHUNK_SIZE):
+        stop = min(start + BATCH_CHUNK_SIZE, n)
+        chunk = generate_lines((stop - start) * LINES_PER_HEXAGRAM, rng)
+        lines[start:stop] = chunk.reshape(-1, LINES_PER_HEXAGRAM)
+
+    primary, relating = hexagram_numbers_batch(lines)
+    return HexagramBatch(lines=lines, primary=primary, relating=relating)
@@ -0,0 +1,130 @@
+"""Bounded in-process LRU cache for seeded casts.
+
+A seeded cast is deterministic (each cast owns its generator, see
+``core.yarrow.YarrowStalks``), so its rendered response can be reused. Only
+seeded requests are ever cached; unseeded casts must stay random.
+
+Configuration comes from the environment:
+
+- ``CAST_CACHE_SIZE``: maximum number of entries (0 disables the cache)
+- ``CAST_CACHE_TTL``: seconds an entry stays valid (0 means no expiry)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """Thread-safe LRU cache with an optional time-to-live and hit counters."""
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Creates an empty cache.
+
+        Args:
+            maxsize: Maximum number of entries; 0 disables caching
+            ttl: Seconds an entry stays valid; 0 means entries never expire
+            clock: Monotonic time source, replaceable in tests
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Looks up a key and marks it as recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None on a miss or an expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+            if self.ttl and self._clock() - stored_at >= self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Stores a value, evicting the least recently used entry when full.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Removes all entries; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Returns the number of stored entries."""
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns size and counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_cast_cache: Optional[LRUCache] = None
+_cast_cache_lock = threading.Lock()
+
+
+def get_cast_cache() -> LRUCache:
+    """Returns the process-wide cache for seeded cast responses.
+
+    Returns:
+        The shared LRUCache instance
+    """
+    global _cast_cache
+    if _cast_cache is None:
+        with _cast_cache_lock:
+            if _cast_cache is None:
+                _cast_cache = LRUCache(
+                    maxsize=int(os.getenv("CAST_CACHE_SIZE", "1024")),
+                    ttl=float(os.getenv("CAST_CACHE_TTL", "3600")),
+                )
+    return _cast_cache
@@ -0,0 +1,67 @@
+"""Three-coin method of I Ching divination.
+
+Three coins are tossed for each line; heads count 3 and tails count 2, so the
+sum is the line value. Each coin is a fair bit, which gives:
+
+- Old Yin (6): 1/8 (three tails)
+- Young Yang (7): 3/8 (one head)
+- Young Yin (8): 3/8 (two heads)
+- Old Yang (9): 1/8 (three heads)
+"""
+
+import random
+from fractions import Fraction
+from typing import Dict, Optional
+
+import numpy as np
+
+COINS_MODE = "coins"
+
+# Number of heads among three coins, indexed by the three tossed bits
+HEADS_BY_TOSS = (0, 1, 1, 2, 1, 2, 2, 3)
+
+_LINE_VALUE_BY_TOSS = np.array([6 + heads for heads in HEADS_BY_TOSS], dtype=np.uint8)
+
+
+def coin_line_distribution() -> Dict[int, Fraction]:
+    """Gets the exact line-value distribution of the three-coin method.
+
+    Returns:
+        Dictionary mapping line value (6, 7, 8, 9) to its exact probability
+    """
+    distribution = {value: Fraction(0) for value in (6, 7, 8, 9)}
+    for heads in HEADS_BY_TOSS:
+        distribution[6 + heads] += Fraction(1, len(HEADS_BY_TOSS))
+    return distribution
+
+
+def generate_coin_line(
+    seed: Optional[int] = None, rng: Optional[random.Random] = None
+) -> int:
+    """Tosses three coins to generate a single line value.
+
+    Args:
+        seed: Optional random seed for reproducible results
+        rng: Optional random number generator to draw from
+
+    Returns:
+        Line value: 6 (Old Yin), 7 (Young Yang), 8 (Young Yin), or 9 (Old Yang)
+    """
+    if seed is not None:
+        rng = random.Random(seed)
+
+    # One 3-bit draw is three fair coin tosses
+    return 6 + HEADS_BY_TOSS[(rng if rng is not None else random).getrandbits(3)]
+
+
+def generate_coin_lines_batch(count: int, rng: np.random.Generator) -> np.ndarray:
+    """Tosses three coins for each of ``count`` lines in vectorized form.
+
+    Args:
+        count: Number of lines to generate
+        rng: NumPy random generator
+
+    Returns:
+        Array of ``count`` uint8 line values (6, 7, 8, or 9)
+    """
+    return _LINE_VALUE_BY_TOSS[rng.integers(0, 8, size=count, dtype=np.uint8)]
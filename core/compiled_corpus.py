@@ -0,0 +1,298 @@
+"""Compiled, memory-mapped form of the hexagram corpus.
+
+``data/hexagrams.json`` is compiled once into a binary file next to it
+(``data/hexagrams.bin``) that every worker maps read-only, so the text lives
+in shared page-cache pages instead of a per-process object graph, and
+startup parses a few hundred index integers instead of the whole JSON.
+
+Layout (all integers little-endian):
+
+- header: magic, format version, SHA-256 of the source JSON file, content
+  hash, entry count, field count and length of the field-name list
+- field names as a JSON array
+- entry index: (number, offset, length) per entry
+- member index: (offset, length) of each ``"field":value`` member of each
+  entry, (0, 0) where the entry lacks the field
+- blob: ``{"hexagrams":[entry,entry,...]}`` in compact JSON, where each entry
+  is exactly the bytes ``encode_json`` produces for it
+
+Offsets are absolute, so fragments are ``memoryview`` slices of the map and
+an entry is decoded into a plain dict only when it is first accessed. A
+compiled file whose source hash does not match the JSON it sits next to is
+stale and is ignored.
+
+Usage:
+    python -m core.compiled_corpus
+    python -m core.compiled_corpus --source data/hexagrams.json --output hexagrams.bin
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.corpus import (
+    DEFAULT_JSON_PATH,
+    candidate_paths,
+    content_hash,
+    encode_json,
+    read_hexagram_file,
+)
+
+MAGIC = b"ICHC"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sHH32s32sIII")
+_ENTRY = struct.Struct("<III")
+_MEMBER = struct.Struct("<II")
+
+COLLECTION_PREFIX = b'{"hexagrams":['
+COLLECTION_SUFFIX = b"]}"
+
+
+class CompiledCorpusError(ValueError):
+    """Raised when a compiled corpus file is malformed or of another version."""
+
+
+def compiled_path_for(json_path: str) -> str:
+    """Returns where the compiled form of a corpus JSON file is kept."""
+    return os.path.splitext(json_path)[0] + ".bin"
+
+
+def file_sha256(path: str) -> bytes:
+    """Returns the SHA-256 digest of a file's bytes."""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def compile_corpus(source_path: str, output_path: Optional[str] = None) -> str:
+    """Compiles a hexagram JSON file into the binary format.
+
+    Args:
+        source_path: Path to the corpus JSON file
+        output_path: Where to write the compiled file (defaults to
+            ``compiled_path_for(source_path)``)
+
+    Returns:
+        Path of the compiled file
+    """
+    output_path = output_path or compiled_path_for(source_path)
+    source_hash = file_sha256(source_path)
+    hex_dict = read_hexagram_file(source_path)
+    numbers = sorted(hex_dict)
+
+    fields: List[str] = []
+    for number in numbers:
+        fields.extend(key for key in hex_dict[number] if key not in fields)
+    field_names = encode_json(fields)
+
+    index_start = _HEADER.size + len(field_names)
+    blob_start = index_start + len(numbers) * (_ENTRY.size + len(fields) * _MEMBER.size)
+
+    # Lay out the blob, recording where each entry and member lands
+    blob = bytearray(COLLECTION_PREFIX)
+    entry_index = []
+    member_index = []
+    for position, number in enumerate(numbers):
+        if position:
+            blob += b","
+        entry_start = len(blob)
+        blob += b"{"
+        members = {}
+        for member_position, (key, value) in enumerate(hex_dict[number].items()):
+            if member_position:
+                blob += b","
+            member = encode_json(key) + b":" + encode_json(value)
+            members[key] = (blob_start + len(blob), len(member))
+            blob += member
+        blob += b"}"
+        entry_index.append((number, blob_start + entry_start, len(blob) - entry_start))
+        member_index.extend(members.get(field, (0, 0)) for field in fields)
+    blob += COLLECTION_SUFFIX
+
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        0,
+        source_hash,
+        content_hash(bytes(blob)).encode("ascii"),
+        len(numbers),
+        len(fields),
+        len(field_names),
+    )
+    parts = [header, field_names]
+    parts.extend(_ENTRY.pack(*entry) for entry in entry_index)
+    parts.extend(_MEMBER.pack(*member) for member in member_index)
+    parts.append(bytes(blob))
+
+    # Write beside the target and rename, so readers never map a partial file
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(b"".join(parts))
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+class CompiledEntries(Mapping):
+    """Read-only mapping of hexagram number to entry, decoding each on first access."""
+
+    __slots__ = ("_fragments", "_decoded")
+
+    def __init__(self, fragments: Dict[int, memoryview]):
+        """Wraps the encoded entries of a compiled file.
+
+        Args:
+            fragments: JSON-encoded entry for each hexagram number
+        """
+        self._fragments = fragments
+        self._decoded: Dict[int, Dict[str, Any]] = {}
+
+    def __getitem__(self, number: int) -> Dict[str, Any]:
+        """Decodes an entry the first time it is read."""
+        try:
+            return self._decoded[number]
+        except KeyError:
+            entry = self._decoded[number] = json.loads(bytes(self._fragments[number]))
+            return entry
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterates over hexagram numbers in file order."""
+        return iter(self._fragments)
+
+    def __len__(self) -> int:
+        """Returns the number of entries."""
+        return len(self._fragments)
+
+
+class CompiledCorpus:
+    """A compiled corpus file mapped read-only into memory."""
+
+    def __init__(self, path: str):
+        """Maps a compiled file and reads its index.
+
+        Args:
+            path: Path to the compiled file
+
+        Raises:
+            OSError: If the file cannot be opened
+            CompiledCorpusError: If the file is not a valid compiled corpus
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        if len(view) < _HEADER.size:
+            raise CompiledCorpusError(f"Compiled corpus is truncated: {path}")
+        header = _HEADER.unpack_from(view)
+        magic, version, _, source_hash, digest = header[:5]
+        entry_count, field_count, names_length = header[5:]
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise CompiledCorpusError(
+                f"Not a version {FORMAT_VERSION} compiled corpus: {path}"
+            )
+        self.source_hash = source_hash
+        self.content_hash = digest.decode("ascii")
+
+        offset = _HEADER.size
+        self.fields = tuple(json.loads(bytes(view[offset : offset + names_length])))
+        offset += names_length
+        entries = [
+            _ENTRY.unpack_from(view, offset + i * _ENTRY.size)
+            for i in range(entry_count)
+        ]
+        offset += entry_count * _ENTRY.size
+        members = [
+            _MEMBER.unpack_from(view, offset + i * _MEMBER.size)
+            for i in range(entry_count * field_count)
+        ]
+        blob_start = offset + len(members) * _MEMBER.size
+        last_start, last_length = entries[-1][1:] if entries else (0, 0)
+        expected_size = last_start + last_length + len(COLLECTION_SUFFIX)
+        if not entries or expected_size != len(view):
+            raise CompiledCorpusError(
+                f"Compiled corpus index does not match its size: {path}"
+            )
+
+        # Every fragment is a slice of the map; nothing is copied or decoded
+        self.collection = view[blob_start:]
+        self.fragments: Dict[int, memoryview] = {}
+        self.members: Dict[int, Dict[str, memoryview]] = {}
+        self.entries = CompiledEntries(self.fragments)
+        for position, (number, start, length) in enumerate(entries):
+            self.fragments[number] = view[start : start + length]
+            entry_offsets = {}
+            for field, (member_start, member_length) in zip(
+                self.fields,
+                members[position * field_count : (position + 1) * field_count],
+                strict=True,
+            ):
+                if member_length:
+                    entry_offsets[field] = (member_start, member_length)
+            # The index is in global field order; sorting by offset restores entry order
+            self.members[number] = {
+                field: view[member_start : member_start + member_length]
+                for field, (member_start, member_length) in sorted(
+                    entry_offsets.items(), key=lambda item: item[1]
+                )
+            }
+
+
+def open_compiled_corpus(
+    json_path: str, compiled_path: Optional[str] = None
+) -> Optional[CompiledCorpus]:
+    """Opens the compiled form of a corpus JSON file if it is present and current.
+
+    Args:
+        json_path: Path to the source JSON file
+        compiled_path: Path to the compiled file (defaults to
+            ``compiled_path_for(json_path)``)
+
+    Returns:
+        The mapped corpus, or None if the compiled file is missing, invalid or
+        was built from different JSON
+
+    Raises:
+        OSError: If the JSON file itself cannot be read
+    """
+    source_hash = file_sha256(json_path)
+    try:
+        compiled = CompiledCorpus(compiled_path or compiled_path_for(json_path))
+    except (OSError, CompiledCorpusError, struct.error, ValueError):
+        return None
+    return compiled if compiled.source_hash == source_hash else None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Compiles the corpus from the command line."""
+    parser = argparse.ArgumentParser(
+        description="Compile the hexagram corpus for memory-mapped loading"
+    )
+    parser.add_argument(
+        "--source", help="Corpus JSON file (defaults to the file the API loads)"
+    )
+    parser.add_argument(
+        "--output",
+        help="Compiled file (defaults to the source path with a .bin suffix)",
+    )
+    args = parser.parse_args(argv)
+
+    source = args.source
+    if source is None:
+        requested = os.getenv("HEXAGRAM_DATA_PATH", DEFAULT_JSON_PATH)
+        source = next(
+            (path for path in candidate_paths(requested) if os.path.exists(path)),
+            requested,
+        )
+    output = compile_corpus(source, args.output)
+    print(f"Compiled {source} -> {output} ({os.path.getsize(output):,} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
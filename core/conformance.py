@@ -0,0 +1,421 @@
+"""Statistical conformance checks for the casting methods.
+
+Casts are generated in vectorized chunks and reduced to two small count
+tables: the 4096 possible line outcomes of a hexagram (its packed yang and
+changing masks) and the 16 value pairs formed by the top line of one cast
+and the bottom line of the next. Every check below is derived from those
+counts and compared against exact expected frequencies computed from the
+method's line distribution, with both a chi-square and a G-test:
+
+- line values, pooled and at each of the six positions
+- the 64 primary hexagrams
+- primary-to-relating pairs (each pair is exactly one of the 4096 outcomes)
+- independence of every pair of positions within a cast
+- independence of consecutive casts
+
+Because the counts are fixed-size, memory stays constant no matter how many
+casts are checked. Two tiers are provided: ``quick`` for CI and ``deep`` for
+releases.
+
+Usage:
+    python -m core.conformance --tier deep --mode yarrow
+"""
+
+import argparse
+import random
+import sys
+import time
+from fractions import Fraction
+from itertools import combinations
+from math import exp, lgamma, log
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from core.batch import BATCH_CHUNK_SIZE, LINES_PER_HEXAGRAM, pack_results_batch
+from core.methods import CastingMethod, available_methods, get_method
+from core.probabilities import OUTCOME_COUNT, outcome_probabilities
+from core.results import PACKED_CHANGING_SHIFT, PACKED_MASK
+from core.tables import HEXAGRAM_NUMBER_BY_MASK, line_masks, lines_from_masks
+
+# Cells expected to hold fewer casts than this are pooled into one cell
+MIN_EXPECTED_COUNT = 5.0
+
+# Family-wise significance level; each test is checked at alpha / number of tests
+DEFAULT_ALPHA = 1e-3
+
+
+class Tier(NamedTuple):
+    """Sample sizes for one conformance tier."""
+
+    hexagrams: int  # casts drawn through the vectorized path
+    scalar_hexagrams: int  # casts drawn through the per-line Python path
+
+
+TIERS: Dict[str, Tier] = {
+    "quick": Tier(hexagrams=1_000_000, scalar_hexagrams=20_000),
+    "deep": Tier(hexagrams=50_000_000, scalar_hexagrams=1_000_000),
+}
+
+
+class FitResult(NamedTuple):
+    """Outcome of one goodness-of-fit test."""
+
+    name: str
+    cells: int
+    df: int
+    chi_square: float
+    chi_square_p: float
+    g: float
+    g_p: float
+
+
+class ConformanceReport(NamedTuple):
+    """All tests run against one set of casts."""
+
+    method: str
+    path: str  # "batch" or "scalar"
+    hexagrams: int
+    seconds: float
+    alpha: float
+    tests: List[FitResult]
+
+    @property
+    def threshold(self) -> float:
+        """Per-test significance level after the Bonferroni correction."""
+        return self.alpha / len(self.tests)
+
+    def failures(self) -> List[FitResult]:
+        """Tests whose chi-square or G-test p-value falls below the threshold."""
+        return [
+            test
+            for test in self.tests
+            if min(test.chi_square_p, test.g_p) < self.threshold
+        ]
+
+    @property
+    def passed(self) -> bool:
+        """Whether every test passed."""
+        return not self.failures()
+
+
+# --- Statistics ---
+def chi_square_sf(statistic: float, df: int) -> float:
+    """Survival function of the chi-square distribution.
+
+    Computes the regularized upper incomplete gamma function Q(df/2, x/2)
+    with a series for small x and a continued fraction otherwise.
+
+    Args:
+        statistic: Test statistic
+        df: Degrees of freedom
+
+    Returns:
+        Probability of a statistic at least this large under the null
+    """
+    if statistic <= 0:
+        return 1.0
+    a = df / 2
+    x = statistic / 2
+    prefactor = exp(-x + a * log(x) - lgamma(a))
+
+    if x < a + 1:
+        term = total = 1 / a
+        n = a
+        for _ in range(10_000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1 - total * prefactor)
+
+    # Modified Lentz evaluation of the continued fraction for Q
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 10_000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = 1 / (d if abs(d) > tiny else tiny)
+        c = b + an / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return prefactor * h
+
+
+def goodness_of_fit(
+    name: str, observed: np.ndarray, probabilities: np.ndarray
+) -> FitResult:
+    """Runs chi-square and G-tests of observed counts against exact probabilities.
+
+    Cells with an expected count below ``MIN_EXPECTED_COUNT`` are pooled into
+    a single cell so the chi-square approximation holds.
+
+    Args:
+        name: Test name
+        observed: Observed counts per cell
+        probabilities: Exact probability of each cell (summing to 1)
+
+    Returns:
+        FitResult with both statistics and p-values
+    """
+    observed = np.asarray(observed, dtype=np.float64).ravel()
+    probabilities = np.asarray(probabilities, dtype=np.float64).ravel()
+    expected = probabilities * observed.sum()
+
+    sparse = expected < MIN_EXPECTED_COUNT
+    if sparse.any():
+        observed = np.append(observed[~sparse], observed[sparse].sum())
+        expected = np.append(expected[~sparse], expected[sparse].sum())
+    keep = expected > 0
+    observed, expected = observed[keep], expected[keep]
+
+    df = len(observed) - 1
+    chi_square = float(np.sum((observed - expected) ** 2 / expected))
+    nonzero = observed > 0
+    g = float(
+        2 * np.sum(observed[nonzero] * np.log(observed[nonzero] / expected[nonzero]))
+    )
+    return FitResult(
+        name=name,
+        cells=len(observed),
+        df=df,
+        chi_square=round(chi_square, 4),
+        chi_square_p=chi_square_sf(chi_square, df),
+        g=round(g, 4),
+        g_p=chi_square_sf(g, df),
+    )
+
+
+# --- Exact Expectations ---
+def line_probabilities(distribution: Dict[int, Fraction]) -> np.ndarray:
+    """Probabilities of line values 6, 7, 8 and 9 as a float array."""
+    return np.array([float(distribution.get(value, 0)) for value in (6, 7, 8, 9)])
+
+
+def outcome_lines(packed: int) -> Tuple[int, ...]:
+    """Line values of a packed outcome, bottom to top."""
+    return tuple(
+        lines_from_masks(packed & PACKED_MASK, packed >> PACKED_CHANGING_SHIFT)
+    )
+
+
+# Line value index (0-3 for 6-9) at each position of every packed outcome
+_OUTCOME_LINE_INDEX = np.array(
+    [[line - 6 for line in outcome_lines(p)] for p in range(OUTCOME_COUNT)],
+    dtype=np.intp,
+)
+_OUTCOME_PRIMARY = np.array(
+    [HEXAGRAM_NUMBER_BY_MASK[p & PACKED_MASK] - 1 for p in range(OUTCOME_COUNT)],
+    dtype=np.intp,
+)
+
+
+# --- Counting ---
+def count_casts_batch(
+    method: CastingMethod, hexagrams: int, seed: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Casts hexagrams through a method's vectorized path and counts them.
+
+    Args:
+        method: Method to check
+        hexagrams: Number of casts
+        seed: Optional random seed for reproducible results
+
+    Returns:
+        Tuple of (counts of the 4096 outcomes, 4x4 counts of the top line of
+        each even-numbered cast against the bottom line of the next one)
+    """
+    rng = np.random.default_rng(seed)
+    outcomes = np.zeros(OUTCOME_COUNT, dtype=np.int64)
+    consecutive = np.zeros(16, dtype=np.int64)
+    # Chunks are even-sized so consecutive pairs never straddle two chunks
+    for start in range(0, hexagrams, BATCH_CHUNK_SIZE):
+        count = min(BATCH_CHUNK_SIZE, hexagrams - start)
+        lines = method.generate_lines_batch(count * LINES_PER_HEXAGRAM, rng).reshape(
+            -1, LINES_PER_HEXAGRAM
+        )
+        outcomes += np.bincount(pack_results_batch(lines), minlength=OUTCOME_COUNT)
+        paired = count - count % 2
+        top = lines[0:paired:2, -1].astype(np.intp) - 6
+        bottom = lines[1:paired:2, 0].astype(np.intp) - 6
+        consecutive += np.bincount(top * 4 + bottom, minlength=16)
+    return outcomes, consecutive.reshape(4, 4)
+
+
+def count_casts_scalar(
+    method: CastingMethod, hexagrams: int, seed: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Casts hexagrams one line at a time through a method's Python path.
+
+    Args:
+        method: Method to check
+        hexagrams: Number of casts
+        seed: Optional random seed for reproducible results
+
+    Returns:
+        Same tables as ``count_casts_batch``
+    """
+    rng = random.Random(seed)
+    generate_line = method.generate_line
+    outcomes = np.zeros(OUTCOME_COUNT, dtype=np.int64)
+    consecutive = np.zeros((4, 4), dtype=np.int64)
+    previous_top = None
+    for index in range(hexagrams):
+        lines = [generate_line(rng) for _ in range(LINES_PER_HEXAGRAM)]
+        yang, changing = line_masks(lines)
+        outcomes[yang | changing << PACKED_CHANGING_SHIFT] += 1
+        if index % 2:
+            consecutive[previous_top - 6, lines[0] - 6] += 1
+        previous_top = lines[-1]
+    return outcomes, consecutive
+
+
+# --- Tests ---
+def conformance_tests(
+    outcomes: np.ndarray, consecutive: np.ndarray, distribution: Dict[int, Fraction]
+) -> List[FitResult]:
+    """Runs every conformance test on counted casts.
+
+    Args:
+        outcomes: Counts of the 4096 packed outcomes
+        consecutive: 4x4 counts of consecutive-cast line pairs
+        distribution: Exact line-value distribution expected
+
+    Returns:
+        List of test results
+    """
+    line_p = line_probabilities(distribution)
+    outcome_p = np.array([float(p) for p in outcome_probabilities(distribution)])
+    tests = []
+
+    per_position = [
+        np.bincount(_OUTCOME_LINE_INDEX[:, position], weights=outcomes, minlength=4)
+        for position in range(LINES_PER_HEXAGRAM)
+    ]
+    tests.append(goodness_of_fit("line_values", np.sum(per_position, axis=0), line_p))
+    for position, observed in enumerate(per_position):
+        tests.append(
+            goodness_of_fit(f"line_values_position_{position + 1}", observed, line_p)
+        )
+
+    primary_observed = np.bincount(_OUTCOME_PRIMARY, weights=outcomes, minlength=64)
+    primary_p = np.bincount(_OUTCOME_PRIMARY, weights=outcome_p, minlength=64)
+    tests.append(goodness_of_fit("primary_hexagrams", primary_observed, primary_p))
+    tests.append(goodness_of_fit("primary_relating_pairs", outcomes, outcome_p))
+
+    pair_p = np.outer(line_p, line_p).ravel()
+    for first, second in combinations(range(LINES_PER_HEXAGRAM), 2):
+        cells = _OUTCOME_LINE_INDEX[:, first] * 4 + _OUTCOME_LINE_INDEX[:, second]
+        observed = np.bincount(cells, weights=outcomes, minlength=16)
+        tests.append(
+            goodness_of_fit(
+                f"independence_positions_{first + 1}_{second + 1}", observed, pair_p
+            )
+        )
+
+    tests.append(goodness_of_fit("independence_consecutive_casts", consecutive, pair_p))
+    return tests
+
+
+def run_conformance(
+    method: CastingMethod,
+    hexagrams: int,
+    seed: Optional[int] = None,
+    scalar: bool = False,
+    alpha: float = DEFAULT_ALPHA,
+    distribution: Optional[Dict[int, Fraction]] = None,
+) -> ConformanceReport:
+    """Casts and checks hexagrams for one method.
+
+    Args:
+        method: Method to check
+        hexagrams: Number of casts
+        seed: Optional random seed for reproducible results
+        scalar: Use the per-line Python path instead of the vectorized one
+        alpha: Family-wise significance level
+        distribution: Expected line distribution (defaults to the method's own)
+
+    Returns:
+        ConformanceReport with every test result
+    """
+    start = time.perf_counter()
+    count = count_casts_scalar if scalar else count_casts_batch
+    outcomes, consecutive = count(method, hexagrams, seed)
+    tests = conformance_tests(
+        outcomes, consecutive, distribution or method.line_distribution()
+    )
+    return ConformanceReport(
+        method=method.name,
+        path="scalar" if scalar else "batch",
+        hexagrams=hexagrams,
+        seconds=round(time.perf_counter() - start, 3),
+        alpha=alpha,
+        tests=tests,
+    )
+
+
+def run_tier(
+    tier: str, modes: Optional[List[str]] = None, seed: Optional[int] = None
+) -> List[ConformanceReport]:
+    """Runs a tier against the vectorized and scalar paths of each method.
+
+    Args:
+        tier: Tier name ('quick' or 'deep')
+        modes: Methods to check (defaults to all registered methods)
+        seed: Optional random seed for reproducible results
+
+    Returns:
+        One report per method and path
+    """
+    sizes = TIERS[tier]
+    methods = [get_method(mode) for mode in modes] if modes else available_methods()
+    reports = []
+    for method in methods:
+        reports.append(run_conformance(method, sizes.hexagrams, seed=seed))
+        reports.append(
+            run_conformance(method, sizes.scalar_hexagrams, seed=seed, scalar=True)
+        )
+    return reports
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs a tier from the command line and returns the exit status."""
+    parser = argparse.ArgumentParser(
+        description="Check casting methods against their exact distributions"
+    )
+    parser.add_argument(
+        "--tier", choices=sorted(TIERS), default="quick", help="Sample sizes to use"
+    )
+    parser.add_argument(
+        "--mode", action="append", help="Method to check (repeatable; defaults to all)"
+    )
+    parser.add_argument(
+        "--seed", type=int, help="Random seed (defaults to fresh entropy)"
+    )
+    args = parser.parse_args(argv)
+
+    reports = run_tier(args.tier, args.mode, args.seed)
+    for report in reports:
+        status = "PASS" if report.passed else "FAIL"
+        print(
+            f"{status} {report.method} ({report.path}): "
+            f"{report.hexagrams:,} casts in {report.seconds}s"
+        )
+        for test in report.failures():
+            print(
+                f"  {test.name}: chi2={test.chi_square} p={test.chi_square_p:.3g}, "
+                f"G={test.g} p={test.g_p:.3g}"
+            )
+    return 0 if all(report.passed for report in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
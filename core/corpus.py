@@ -0,0 +1,405 @@
+"""Process-wide, read-only store for the hexagram corpus.
+
+The corpus (``data/hexagrams.json``) is static text, so it is parsed once per
+process and shared by every reading. Callers go through ``get_corpus()``
+instead of re-reading the file on each cast. When auto-reload is enabled the
+store re-parses the file after its modification time changes, which is
+useful while editing the corpus in development.
+
+Each entry is also serialized to JSON once at load time, so responses can
+splice the cached bytes in instead of re-encoding the entry per request. A
+hash of those bytes identifies the corpus content for HTTP caching. When a
+current compiled corpus (``core.compiled_corpus``) sits next to the JSON, it
+is memory-mapped instead and entries are decoded lazily.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JSON_PATH = "../data/hexagrams.json"
+
+# Minimum number of seconds between two mtime checks when auto-reload is on
+RELOAD_CHECK_INTERVAL = 1.0
+
+
+def candidate_paths(filepath: str = DEFAULT_JSON_PATH) -> List[str]:
+    """Lists the locations probed for the hexagram JSON file, in order.
+
+    Args:
+        filepath: Path to the JSON file, absolute or relative
+
+    Returns:
+        List of candidate paths
+    """
+    core_dir = os.path.dirname(os.path.abspath(__file__))
+    # An absolute path joins to itself, so duplicates are dropped in order
+    return list(
+        dict.fromkeys(
+            [
+                filepath,
+                os.path.normpath(os.path.join(core_dir, filepath)),
+                os.path.normpath(os.path.join(os.path.dirname(core_dir), filepath)),
+            ]
+        )
+    )
+
+
+def read_hexagram_file(path: str) -> Dict[int, Dict[str, Any]]:
+    """Parses a hexagram JSON file into a dictionary keyed by number.
+
+    Args:
+        path: Path to the JSON file
+
+    Returns:
+        Dictionary of hexagram data indexed by hexagram number
+
+    Raises:
+        FileNotFoundError, json.JSONDecodeError, KeyError: If the file is
+            missing or malformed
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {item["number"]: item for item in data}
+
+
+def encode_json(value: Any) -> bytes:
+    """Serializes a value to compact UTF-8 JSON.
+
+    Uses the same settings as Starlette's ``JSONResponse``, so spliced
+    fragments are byte-identical to a response rendered in one piece.
+
+    Args:
+        value: JSON-serializable value
+
+    Returns:
+        Encoded JSON bytes
+    """
+    return json.dumps(
+        value, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def content_hash(collection: bytes) -> str:
+    """Hashes the serialized corpus; the digest identifies its content for ETags."""
+    return hashlib.sha256(collection).hexdigest()[:32]
+
+
+def missing_hexagram_numbers(hexagram_data: Mapping[int, Any]) -> List[int]:
+    """Returns the hexagram numbers (1-64) that are absent from the data."""
+    return sorted(set(range(1, 65)) - set(hexagram_data.keys()))
+
+
+class CorpusSnapshot(NamedTuple):
+    """Everything derived from one load of the corpus file, replaced as a unit."""
+
+    data: Mapping[int, Dict[str, Any]]
+    fragments: Mapping[int, bytes]
+    field_fragments: Mapping[int, Dict[str, bytes]]
+    collection: bytes
+    content_hash: str
+    format: Optional[str]
+    path: Optional[str]
+    mtime: Optional[float]
+    load_time: float
+    loaded_at: Optional[float]
+    reload_count: int
+
+
+# State before anything has loaded, and after a first load found no file
+EMPTY_SNAPSHOT = CorpusSnapshot(
+    data=MappingProxyType({}),
+    fragments=MappingProxyType({}),
+    field_fragments=MappingProxyType({}),
+    collection=b'{"hexagrams":[]}',
+    content_hash="",
+    format=None,
+    path=None,
+    mtime=None,
+    load_time=0.0,
+    loaded_at=None,
+    reload_count=0,
+)
+
+
+class HexagramCorpus:
+    """Read-only hexagram corpus loaded once and shared across requests.
+
+    Each (re)load builds a new ``CorpusSnapshot`` and installs it with a single
+    reference assignment, so readers never observe a half-built corpus and
+    need no locking. Callers that need several values from the same load
+    (an ETag and its body) read them from one ``snapshot()``. A failed reload
+    keeps the previous snapshot.
+    """
+
+    def __init__(
+        self,
+        filepath: str = DEFAULT_JSON_PATH,
+        auto_reload: bool = False,
+        use_compiled: bool = True,
+    ):
+        """Initializes the store without loading; data is loaded on first use.
+
+        Args:
+            filepath: Path to the JSON file containing hexagram data
+            auto_reload: Whether to re-parse the file when its mtime changes
+            use_compiled: Whether to map a current compiled corpus (see
+                ``core.compiled_corpus``) instead of parsing the JSON
+        """
+        self.filepath = filepath
+        self.auto_reload = auto_reload
+        self.use_compiled = use_compiled
+        self._snapshot = EMPTY_SNAPSHOT
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> CorpusSnapshot:
+        """Returns the current snapshot, loading or reloading first if needed."""
+        self._ensure_current()
+        return self._snapshot
+
+    @property
+    def format(self) -> Optional[str]:
+        """Storage format of the loaded corpus, "json" or "compiled"."""
+        return self._snapshot.format
+
+    @property
+    def path(self) -> Optional[str]:
+        """File the corpus was loaded from."""
+        return self._snapshot.path
+
+    @property
+    def load_time(self) -> float:
+        """Seconds the last successful load took."""
+        return self._snapshot.load_time
+
+    @property
+    def loaded_at(self) -> Optional[float]:
+        """Unix time of the last successful load, or None if nothing has loaded."""
+        return self._snapshot.loaded_at
+
+    @property
+    def reload_count(self) -> int:
+        """Number of successful loads after the first."""
+        return self._snapshot.reload_count
+
+    @property
+    def data(self) -> Mapping[int, Dict[str, Any]]:
+        """Returns the hexagram data indexed by number, loading it if needed."""
+        return self.snapshot().data
+
+    def get(self, number: int) -> Optional[Dict[str, Any]]:
+        """Gets a single hexagram entry.
+
+        Args:
+            number: Hexagram number (1-64)
+
+        Returns:
+            The hexagram entry, or None if it is not in the corpus
+        """
+        return self.data.get(number)
+
+    def fragment(
+        self, number: int, fields: Optional[Sequence[str]] = None
+    ) -> Optional[bytes]:
+        """Gets the pre-serialized JSON of a single hexagram entry.
+
+        Args:
+            number: Hexagram number (1-64)
+            fields: Optional fields to keep, in output order; fields the entry
+                lacks are skipped. Defaults to the whole entry.
+
+        Returns:
+            Compact UTF-8 JSON of the entry, or None if it is not in the corpus
+        """
+        snapshot = self.snapshot()
+        if fields is None:
+            return snapshot.fragments.get(number)
+
+        # Projections are joined from per-field fragments, so the text is
+        # never re-encoded
+        members = snapshot.field_fragments.get(number)
+        if members is None:
+            return None
+        return (
+            b"{"
+            + b",".join(members[field] for field in fields if field in members)
+            + b"}"
+        )
+
+    def collection_fragment(self) -> bytes:
+        """Returns the pre-serialized JSON object of every entry in number order."""
+        return self.snapshot().collection
+
+    @property
+    def content_hash(self) -> str:
+        """Hex digest of the serialized entries; changes whenever any entry changes."""
+        return self.snapshot().content_hash
+
+    def load(self) -> Mapping[int, Dict[str, Any]]:
+        """Loads the corpus if it has not been loaded yet.
+
+        Returns:
+            The hexagram data indexed by number (empty if no file was found)
+        """
+        with self._lock:
+            if self._snapshot.loaded_at is None:
+                self._load_locked()
+        return self._snapshot.data
+
+    def reload(self) -> Mapping[int, Dict[str, Any]]:
+        """Re-parses the corpus file unconditionally.
+
+        Returns:
+            The freshly loaded hexagram data indexed by number
+        """
+        with self._lock:
+            self._load_locked()
+        return self._snapshot.data
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns load statistics for monitoring."""
+        snapshot = self._snapshot
+        return {
+            "path": snapshot.path,
+            "hexagram_count": len(snapshot.data),
+            "load_time_ms": round(snapshot.load_time * 1000, 3),
+            "loaded_at": snapshot.loaded_at,
+            "reload_count": snapshot.reload_count,
+            "auto_reload": self.auto_reload,
+            "content_hash": snapshot.content_hash,
+            "format": snapshot.format,
+        }
+
+    def _load_locked(self) -> None:
+        """Loads the first readable candidate file; caller holds the lock."""
+        # Imported here because the compiled format is built with this module's encoder
+        from core.compiled_corpus import open_compiled_corpus
+
+        start = time.perf_counter()
+        previous = self._snapshot
+        for path in candidate_paths(self.filepath):
+            try:
+                mtime = os.path.getmtime(path)
+                compiled = open_compiled_corpus(path) if self.use_compiled else None
+                hex_dict = (
+                    compiled.entries
+                    if compiled is not None
+                    else read_hexagram_file(path)
+                )
+            except (OSError, ValueError, KeyError, TypeError):
+                # ValueError covers JSON and UTF-8 decoding errors (a half-written file)
+                continue
+
+            missing_numbers = missing_hexagram_numbers(hex_dict)
+            if missing_numbers:
+                logger.warning("Missing hexagrams %s in %s", missing_numbers, path)
+
+            if compiled is not None:
+                # Fragments are slices of the shared read-only map
+                field_fragments = compiled.members
+                fragments = compiled.fragments
+                collection = compiled.collection
+                digest = compiled.content_hash
+                storage_format = "compiled"
+            else:
+                field_fragments = {
+                    number: {
+                        key: encode_json(key) + b":" + encode_json(value)
+                        for key, value in entry.items()
+                    }
+                    for number, entry in hex_dict.items()
+                }
+                fragments = {
+                    number: encode_json(entry) for number, entry in hex_dict.items()
+                }
+                ordered = [fragments[number] for number in sorted(fragments)]
+                collection = b'{"hexagrams":[' + b",".join(ordered) + b"]}"
+                digest = content_hash(collection)
+                storage_format = "json"
+            self._snapshot = CorpusSnapshot(
+                data=MappingProxyType(hex_dict),
+                fragments=MappingProxyType(fragments),
+                field_fragments=MappingProxyType(field_fragments),
+                collection=collection,
+                content_hash=digest,
+                format=storage_format,
+                path=path,
+                mtime=mtime,
+                load_time=time.perf_counter() - start,
+                loaded_at=time.time(),
+                reload_count=previous.reload_count + (previous.loaded_at is not None),
+            )
+            self._last_check = time.monotonic()
+            return
+
+        # Keep serving the previous corpus; with nothing loaded yet,
+        # loaded_at stays unset so the next access retries
+        if previous.loaded_at is None:
+            logger.error(
+                "Could not load hexagram data from any tried paths: %s",
+                candidate_paths(self.filepath),
+            )
+        else:
+            logger.error(
+                "Could not reload hexagram data from %s; keeping the previous corpus",
+                previous.path,
+            )
+
+    def _ensure_current(self) -> None:
+        """Loads the corpus on first use and, with auto-reload, picks up changes."""
+        if self._snapshot.loaded_at is None:
+            self.load()
+        elif self.auto_reload:
+            self._check_for_changes()
+
+    def _check_for_changes(self) -> None:
+        """Reloads the corpus if the file changed since the last load."""
+        now = time.monotonic()
+        if now - self._last_check < RELOAD_CHECK_INTERVAL:
+            return
+        self._last_check = now
+        path = self._snapshot.path
+        try:
+            mtime = os.path.getmtime(path) if path else None
+        except OSError:
+            return
+        if mtime is not None and mtime != self._snapshot.mtime:
+            with self._lock:
+                if mtime != self._snapshot.mtime:
+                    self._load_locked()
+
+
+_corpus: Optional[HexagramCorpus] = None
+_corpus_lock = threading.Lock()
+
+
+def get_corpus() -> HexagramCorpus:
+    """Returns the process-wide corpus store, creating it on first use.
+
+    Auto-reload is controlled by the ``CORPUS_AUTO_RELOAD`` environment
+    variable, the file location by ``HEXAGRAM_DATA_PATH`` and use of a
+    compiled corpus by ``CORPUS_USE_COMPILED``.
+
+    Returns:
+        The shared HexagramCorpus instance
+    """
+    global _corpus
+    if _corpus is None:
+        with _corpus_lock:
+            if _corpus is None:
+                _corpus = HexagramCorpus(
+                    filepath=os.getenv("HEXAGRAM_DATA_PATH", DEFAULT_JSON_PATH),
+                    auto_reload=os.getenv("CORPUS_AUTO_RELOAD", "false").lower()
+                    == "true",
+                    use_compiled=os.getenv("CORPUS_USE_COMPILED", "true").lower()
+                    == "true",
+                )
+    return _corpus
@@ -0,0 +1,141 @@
+"""Exact line-value distribution of the yarrow stalk process.
+
+The traditional figures (1/16, 5/16, 7/16, 3/16) are an idealization. What
+``core.yarrow.perform_division`` actually produces depends on drawing the
+left pile uniformly from ``1..stalks_in - 1`` at each of the three chained
+stages. This module enumerates every stage outcome (49 stalks -> stage 2 ->
+stage 3) and accumulates exact fractions. It also provides a sampler that
+draws a line from that table with one random integer, without running the
+three divisions.
+"""
+
+import bisect
+from fractions import Fraction
+from functools import lru_cache
+from math import lcm
+from typing import Dict, Tuple
+
+import numpy as np
+
+LINE_VALUES = (6, 7, 8, 9)
+
+
+def stage_outcomes(stalks_in: int) -> Dict[Tuple[int, int], Fraction]:
+    """Enumerates the outcomes of one division stage.
+
+    Mirrors ``perform_division``: the left pile is uniform on
+    ``1..stalks_in - 1``, one stalk is taken from the right pile and both
+    piles are counted off by fours with remainders of 1-4.
+
+    Args:
+        stalks_in: Number of stalks available for division
+
+    Returns:
+        Dictionary mapping (remainder, remaining_stalks) to its probability
+    """
+    if stalks_in < 2:
+        raise ValueError(f"Not enough stalks for division: {stalks_in}")
+
+    outcomes: Dict[Tuple[int, int], Fraction] = {}
+    weight = Fraction(1, stalks_in - 1)
+    for left_pile in range(1, stalks_in):
+        right_pile = stalks_in - left_pile - 1
+        remainder_left = left_pile % 4 or 4
+        remainder_right = right_pile % 4 or 4
+        total_remainder = remainder_left + remainder_right + 1
+        key = (total_remainder, stalks_in - total_remainder)
+        outcomes[key] = outcomes.get(key, 0) + weight
+    return outcomes
+
+
+@lru_cache(maxsize=None)
+def yarrow_line_distribution() -> Dict[int, Fraction]:
+    """Computes the exact probability of each line value by dynamic programming.
+
+    The state after each stage is (stalks remaining, sum of stage values);
+    three stages of ``stage_outcomes`` are folded over it.
+
+    Returns:
+        Dictionary mapping line value (6, 7, 8, 9) to its exact probability
+    """
+    # Imported here because core.yarrow uses this module for its fast mode
+    from core.yarrow import WORKING_STALKS, get_value_from_remainder
+
+    states: Dict[Tuple[int, int], Fraction] = {(WORKING_STALKS, 0): Fraction(1)}
+    for _ in range(3):
+        next_states: Dict[Tuple[int, int], Fraction] = {}
+        for (stalks, value_sum), probability in states.items():
+            for (remainder, remaining), p in stage_outcomes(stalks).items():
+                key = (remaining, value_sum + get_value_from_remainder(remainder))
+                next_states[key] = next_states.get(key, 0) + probability * p
+        states = next_states
+
+    distribution = {value: Fraction(0) for value in LINE_VALUES}
+    for (_, value_sum), probability in states.items():
+        distribution[value_sum] += probability
+    return distribution
+
+
+class LineSampler:
+    """Draws line values from an exact distribution with a single random draw.
+
+    Probabilities are scaled to integer weights over their common
+    denominator, so one ``randrange(denominator)`` followed by a search of the
+    cumulative weights reproduces the distribution exactly.
+    """
+
+    def __init__(self, distribution: Dict[int, Fraction]):
+        """Builds the cumulative table for a distribution.
+
+        Args:
+            distribution: Dictionary mapping line value to exact probability
+        """
+        if sum(distribution.values()) != 1:
+            raise ValueError("Line value probabilities must sum to 1")
+
+        self.values = tuple(sorted(distribution))
+        self.denominator = lcm(*(distribution[v].denominator for v in self.values))
+        self.weights = tuple(
+            int(distribution[v] * self.denominator) for v in self.values
+        )
+
+        cumulative = []
+        total = 0
+        for weight in self.weights:
+            total += weight
+            cumulative.append(total)
+        self.cumulative = tuple(cumulative)
+
+    def sample(self, rng) -> int:
+        """Draws one line value.
+
+        Args:
+            rng: Object with a ``randrange`` method (``random.Random`` or the
+                ``random`` module)
+
+        Returns:
+            Line value (6, 7, 8, or 9)
+        """
+        return self.values[
+            bisect.bisect_right(self.cumulative, rng.randrange(self.denominator))
+        ]
+
+    def sample_batch(self, count: int, rng: np.random.Generator) -> np.ndarray:
+        """Draws ``count`` line values in vectorized form.
+
+        Args:
+            count: Number of lines to generate
+            rng: NumPy random generator
+
+        Returns:
+            Array of ``count`` uint8 line values
+        """
+        draws = rng.integers(0, self.denominator, size=count)
+        indices = np.searchsorted(np.array(self.cumulative), draws, side="right")
+        return np.array(self.values, dtype=np.uint8)[indices]
+
+
+@lru_cache(maxsize=None)
+def yarrow_line_sampler() -> LineSampler:
+    """Returns the shared sampler for the exact yarrow stalk distribution."""
+    return LineSampler(yarrow_line_distribution())
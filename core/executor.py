@@ -0,0 +1,234 @@
+"""Executors that keep CPU-bound casting off the asyncio event loop.
+
+Single casts run in a thread pool; large batch and simulation jobs run in a
+process pool so they can use more than one core. Admission is bounded by a
+queue depth: each admitted request holds a slot until it (or its stream)
+finishes, and once every slot is taken the executor reports itself saturated
+and new requests are turned away instead of piling up behind the event loop.
+
+Configuration comes from the environment:
+
+- ``CAST_THREAD_WORKERS``: thread pool size
+- ``CAST_PROCESS_WORKERS``: process pool size (the pool starts on first use)
+- ``CAST_PROCESS_START_METHOD``: how pool processes are started (default
+  ``forkserver`` where available, else ``spawn``). By the time the pool
+  starts the process runs the logging, history and thread-pool threads, and
+  plain ``fork`` can copy a lock one of them holds into the child.
+- ``CAST_QUEUE_DEPTH``: maximum number of admitted requests before rejecting
+"""
+
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import random
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from core.profiling import run_in_request_profile
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when the executor already has its maximum number of requests in flight."""
+
+
+def _reseed_worker() -> None:
+    """Reseeds the global generator so pool workers never share a random stream."""
+    random.seed()
+
+
+def process_context() -> multiprocessing.context.BaseContext:
+    """Returns the multiprocessing context the process pool starts workers with.
+
+    Returns:
+        The ``CAST_PROCESS_START_METHOD`` context, defaulting to a start
+        method that does not fork the threaded server process
+    """
+    method = os.getenv("CAST_PROCESS_START_METHOD")
+    if method is None:
+        method = (
+            "forkserver"
+            if "forkserver" in multiprocessing.get_all_start_methods()
+            else "spawn"
+        )
+    return multiprocessing.get_context(method)
+
+
+class CastExecutor:
+    """Thread and process pools with bounded admission for casting work."""
+
+    def __init__(
+        self,
+        thread_workers: Optional[int] = None,
+        process_workers: Optional[int] = None,
+        queue_depth: Optional[int] = None,
+    ):
+        """Creates the executor; unset sizes are read from the environment.
+
+        Args:
+            thread_workers: Number of threads for single casts
+            process_workers: Number of processes for batch and simulation jobs
+            queue_depth: Maximum number of admitted requests
+        """
+        cpu_count = os.cpu_count() or 1
+        self.thread_workers = thread_workers or int(
+            os.getenv("CAST_THREAD_WORKERS", str(min(32, cpu_count + 4)))
+        )
+        self.process_workers = process_workers or int(
+            os.getenv("CAST_PROCESS_WORKERS", str(cpu_count))
+        )
+        self.queue_depth = queue_depth or int(
+            os.getenv("CAST_QUEUE_DEPTH", str(self.thread_workers * 4))
+        )
+
+        self.in_flight = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._threads = ThreadPoolExecutor(
+            max_workers=self.thread_workers, thread_name_prefix="cast"
+        )
+        self._processes: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def saturated(self) -> bool:
+        """Whether the executor has reached its queue depth."""
+        return self.in_flight >= self.queue_depth
+
+    def admit(self) -> Callable[[], None]:
+        """Reserves a slot for a request.
+
+        Returns:
+            Function that gives the slot back; only its first call counts
+
+        Raises:
+            ExecutorSaturatedError: If the queue depth has been reached
+        """
+        with self._lock:
+            if self.in_flight >= self.queue_depth:
+                self.rejected += 1
+                raise ExecutorSaturatedError(
+                    f"Cast executor saturated: {self.in_flight} requests in flight"
+                )
+            self.in_flight += 1
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            with self._lock:
+                if not released:
+                    released = True
+                    self.in_flight -= 1
+
+        return release
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Runs a function in the thread pool.
+
+        The caller's context variables are copied into the thread, as
+        ``asyncio.to_thread`` does, so stage timings and profiling follow the
+        request.
+
+        Args:
+            fn: Function to call
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            The function's return value
+        """
+        call = functools.partial(fn, *args, **kwargs)
+        context = contextvars.copy_context()
+        return await self._submit(
+            self._threads, functools.partial(context.run, run_in_request_profile, call)
+        )
+
+    async def run_in_process(
+        self, fn: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        """Runs a picklable module-level function in the process pool.
+
+        Args:
+            fn: Function to call
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            The function's return value
+        """
+        return await self._submit(
+            self._process_pool(), functools.partial(fn, *args, **kwargs)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns pool sizes and queue counters for monitoring."""
+        return {
+            "thread_workers": self.thread_workers,
+            "process_workers": self.process_workers,
+            "process_pool_started": self._processes is not None,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "saturated": self.saturated,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shuts down both pools."""
+        self._threads.shutdown(wait=wait, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait, cancel_futures=True)
+            self._processes = None
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        """Returns the process pool, starting it on first use."""
+        with self._lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self.process_workers,
+                    mp_context=process_context(),
+                    initializer=_reseed_worker,
+                )
+            return self._processes
+
+    async def _submit(self, pool, call: Callable[[], Any]) -> Any:
+        """Runs a call on a pool while counting it as running."""
+        with self._lock:
+            self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, call)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+
+_executor: Optional[CastExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> CastExecutor:
+    """Returns the process-wide cast executor, creating it on first use.
+
+    Returns:
+        The shared CastExecutor instance
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = CastExecutor()
+    return _executor
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Shuts down the process-wide executor if it was created."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
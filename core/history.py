@@ -0,0 +1,399 @@
+"""Append-only reading history in a local SQLite database.
+
+Requests never touch the database. ``HistoryStore.record`` puts the raw cast
+(time, user, mode, seed and six line values) on a bounded in-memory queue
+without blocking; a writer thread drains it, derives the hexagram columns
+and inserts up to ``batch_size`` rows per transaction. When the queue is
+full the reading is dropped and counted instead of waiting. Reads see rows
+once their batch has been committed, usually within ``flush_interval``
+seconds.
+
+The database runs in WAL mode so readers never wait for the writer, and
+several processes (gunicorn workers) can share one file. Rows are indexed
+by user, time, seed and primary hexagram. ``user_id`` is a label the client
+supplies, not an identity: the API has no authentication, so anyone who can
+reach it can read any user's history. Pages are ordered newest first by
+the time the reading was cast (ties broken by row id, which only reflects
+commit order across workers) and continued with an opaque cursor.
+
+Configuration comes from the environment:
+
+- ``HISTORY_ENABLED``: record readings (default true)
+- ``HISTORY_DB_PATH``: database file (default ``iching/history.db`` under
+  ``XDG_STATE_HOME``, i.e. ``~/.local/state``)
+- ``HISTORY_QUEUE_SIZE``: readings buffered before dropping (default 10000)
+- ``HISTORY_BATCH_SIZE``: maximum rows per transaction (default 500)
+
+Usage:
+    from core.history import get_history_store
+
+    store = get_history_store()
+    store.record("alice", "yarrow", 42, [7, 8, 9, 7, 6, 8])
+    readings, cursor = store.page(user_id="alice", limit=20)
+"""
+
+import base64
+import contextlib
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core.results import CastResult
+
+logger = logging.getLogger(__name__)
+
+# Per-user state directory, outside the source tree
+_STATE_HOME = os.getenv("XDG_STATE_HOME") or os.path.expanduser("~/.local/state")
+DEFAULT_DB_PATH = os.path.join(_STATE_HOME, "iching", "history.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    user_id TEXT,
+    mode TEXT NOT NULL,
+    seed INTEGER,
+    packed INTEGER NOT NULL,
+    hexagram_number INTEGER NOT NULL,
+    relating_hexagram_number INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS readings_user ON readings (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS readings_created_at ON readings (created_at, id);
+CREATE INDEX IF NOT EXISTS readings_seed ON readings (seed);
+CREATE INDEX IF NOT EXISTS readings_hexagram
+    ON readings (hexagram_number, created_at, id);
+"""
+
+_COLUMNS = (
+    "id, created_at, user_id, mode, seed, packed, "
+    "hexagram_number, relating_hexagram_number"
+)
+
+# Signals the writer thread to flush what it has and exit
+_STOP = object()
+
+
+def encode_cursor(created_at: float, row_id: int) -> str:
+    """Returns the opaque cursor continuing after a row."""
+    position = f"{created_at!r}:{row_id}".encode("ascii")
+    return base64.urlsafe_b64encode(position).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Reads a cursor returned by ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = base64.urlsafe_b64decode(padded).decode("ascii")
+        created_at, row_id = position.split(":")
+        return float(created_at), int(row_id)
+    except ValueError as e:
+        # UnicodeDecodeError and binascii.Error are both ValueErrors
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def row_to_dict(row: Sequence[Any]) -> Dict[str, Any]:
+    """Renders a readings row for the API."""
+    row_id, created_at, user_id, mode, seed, packed, primary, relating = row
+    cast = CastResult.from_packed(packed)
+    return {
+        "id": row_id,
+        "created_at": created_at,
+        "user_id": user_id,
+        "mode": mode,
+        "seed": seed,
+        "hexagram_number": primary,
+        "relating_hexagram_number": relating if cast.changing_mask else None,
+        "changing_lines": [i + 1 for i in cast.changing_line_indices],
+        "lines": cast.lines,
+    }
+
+
+class HistoryStore:
+    """SQLite reading history fed by a write-behind queue."""
+
+    def __init__(
+        self,
+        path: str,
+        queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+    ):
+        """Opens (creating if needed) the database and starts the writer thread.
+
+        Args:
+            path: Database file
+            queue_size: Readings buffered before new ones are dropped
+            batch_size: Maximum rows inserted per transaction
+            flush_interval: Seconds the writer waits to fill a batch
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._queue: "queue.Queue" = queue.Queue(queue_size)
+        self._readers = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with contextlib.closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+        self._writer = threading.Thread(
+            target=self._write_loop, name="history-writer", daemon=True
+        )
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens a connection that waits on other processes' locks, not failing."""
+        connection = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def record(
+        self,
+        user_id: Optional[str],
+        mode: str,
+        seed: Optional[int],
+        lines: Sequence[int],
+    ) -> bool:
+        """Queues a reading for writing; never blocks.
+
+        Args:
+            user_id: Optional user the reading belongs to
+            mode: Casting method
+            seed: Seed the cast used, if any
+            lines: Six line values, bottom to top
+
+        Returns:
+            False if the queue was full and the reading was dropped
+        """
+        try:
+            self._queue.put_nowait((time.time(), user_id, mode, seed, tuple(lines)))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _write_loop(self) -> None:
+        """Drains the queue into batched transactions until stopped."""
+        connection = self._connect()
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(
+                        self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    )
+                except queue.Empty:
+                    break
+            readings = [item for item in batch if item is not _STOP]
+            stopping = len(readings) != len(batch)
+            if readings:
+                try:
+                    self._insert(connection, readings)
+                except sqlite3.Error:
+                    logger.exception(
+                        "Could not write %d readings to %s", len(readings), self.path
+                    )
+            for _ in batch:
+                self._queue.task_done()
+        connection.close()
+
+    def _insert(self, connection: sqlite3.Connection, readings: List[Tuple]) -> None:
+        """Writes readings in one transaction."""
+        rows = []
+        for created_at, user_id, mode, seed, lines in readings:
+            cast = CastResult.from_lines(lines)
+            rows.append(
+                (
+                    created_at,
+                    user_id,
+                    mode,
+                    seed,
+                    cast.packed,
+                    cast.primary_hexagram_number,
+                    cast.transformed_hexagram_number or cast.primary_hexagram_number,
+                )
+            )
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(
+                "INSERT INTO readings (created_at, user_id, mode, seed, packed,"
+                " hexagram_number, relating_hexagram_number)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+        self.written += len(rows)
+        self.batches += 1
+
+    def _reader(self) -> sqlite3.Connection:
+        """Returns this thread's read connection."""
+        connection = getattr(self._readers, "connection", None)
+        if connection is None:
+            connection = self._readers.connection = self._connect()
+        return connection
+
+    def page(
+        self,
+        user_id: Optional[str] = None,
+        hexagram: Optional[int] = None,
+        seed: Optional[int] = None,
+        mode: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Returns one page of readings, newest first.
+
+        Args:
+            user_id: Only this user's readings
+            hexagram: Only readings with this primary hexagram
+            seed: Only readings cast with this seed
+            mode: Only readings cast with this method
+            since: Only readings at or after this Unix time
+            until: Only readings before this Unix time
+            cursor: ``next_cursor`` of the previous page
+            limit: Maximum number of readings
+
+        Returns:
+            Tuple of (readings, cursor for the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        conditions, parameters = [], []
+        for column, value in (
+            ("user_id", user_id),
+            ("hexagram_number", hexagram),
+            ("seed", seed),
+            ("mode", mode),
+        ):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        if since is not None:
+            conditions.append("created_at >= ?")
+            parameters.append(since)
+        if until is not None:
+            conditions.append("created_at < ?")
+            parameters.append(until)
+        if cursor is not None:
+            conditions.append("(created_at, id) < (?, ?)")
+            parameters.extend(decode_cursor(cursor))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = (
+            f"SELECT {_COLUMNS} FROM readings{where}"
+            " ORDER BY created_at DESC, id DESC LIMIT ?"
+        )
+        rows = self._reader().execute(query, (*parameters, limit + 1)).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            row_id, created_at = rows[limit - 1][:2]
+            next_cursor = encode_cursor(created_at, row_id)
+        return [row_to_dict(row) for row in rows[:limit]], next_cursor
+
+    def aggregate(self, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Counts readings overall, by method and by primary hexagram.
+
+        Args:
+            user_id: Only count this user's readings
+
+        Returns:
+            Dictionary with the total, per-mode and per-hexagram counts and the
+            time of the first and last reading
+        """
+        where, parameters = (
+            ("WHERE user_id = ?", (user_id,)) if user_id is not None else ("", ())
+        )
+        connection = self._reader()
+        total, first, last = connection.execute(
+            f"SELECT COUNT(*), MIN(created_at), MAX(created_at) FROM readings {where}",
+            parameters,
+        ).fetchone()
+        modes = connection.execute(
+            f"SELECT mode, COUNT(*) FROM readings {where} GROUP BY mode", parameters
+        )
+        hexagrams = connection.execute(
+            f"SELECT hexagram_number, COUNT(*) FROM readings {where}"
+            " GROUP BY hexagram_number",
+            parameters,
+        )
+        return {
+            "user_id": user_id,
+            "total": total,
+            "first_at": first,
+            "last_at": last,
+            "modes": dict(modes.fetchall()),
+            "hexagrams": {str(number): count for number, count in hexagrams.fetchall()},
+        }
+
+    def flush(self) -> None:
+        """Blocks until every queued reading is written; for tests and shutdown."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Writes what is queued, then stops the writer thread."""
+        if self._writer.is_alive():
+            # Blocks only while the queue is full; the writer drains it before stopping
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns queue and write counters for monitoring."""
+        return {
+            "path": self.path,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+        }
+
+
+_store: Optional[HistoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_history_store() -> Optional[HistoryStore]:
+    """Returns the process-wide history store, opening it on first use.
+
+    Returns:
+        The shared HistoryStore, or None when ``HISTORY_ENABLED`` is false
+    """
+    global _store
+    enabled = os.getenv("HISTORY_ENABLED", "true").lower() in ("1", "true", "yes")
+    if _store is None and enabled:
+        with _store_lock:
+            if _store is None:
+                _store = HistoryStore(
+                    os.getenv("HISTORY_DB_PATH", DEFAULT_DB_PATH),
+                    queue_size=int(os.getenv("HISTORY_QUEUE_SIZE", "10000")),
+                    batch_size=int(os.getenv("HISTORY_BATCH_SIZE", "500")),
+                )
+    return _store
+
+
+def close_history_store() -> None:
+    """Flushes and closes the process-wide store; the next access reopens it."""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
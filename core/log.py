@@ -0,0 +1,316 @@
+"""Non-blocking JSON logging.
+
+``setup_logging`` routes every record through a bounded in-memory queue: the
+thread that logs only enqueues the record, and a background listener thread
+formats it as one JSON object per line and writes it. Records are queued
+unformatted, so message arguments are interpolated on the listener thread;
+pass them as ``%s`` arguments (never pre-formatted f-strings) so a disabled
+level costs only the level check. When the queue is full, records are
+dropped and counted rather than blocking the request.
+
+``RequestLogMiddleware`` writes one access record per request. Error
+responses (4xx as warnings, 5xx as errors) are always logged; successful
+ones are sampled per route. Handlers add fields to their request's record
+with ``annotate_request``.
+
+Configuration comes from the environment:
+
+- ``LOG_LEVEL``: minimum level (default INFO)
+- ``LOG_QUEUE_SIZE``: records buffered before dropping (default 10000)
+- ``LOG_SAMPLE_RATE``: fraction of successful requests logged (default 1.0)
+- ``LOG_SAMPLE_RATES``: per-route overrides, e.g. ``/cast=0.01,/search=0.1``
+
+Usage:
+    from core.log import annotate_request, setup_logging
+
+    setup_logging()
+    logging.getLogger(__name__).info("Loaded %d hexagrams", count)
+    annotate_request(mode="yarrow", hexagram=12)
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, TextIO
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_EMPTY_RECORD = logging.LogRecord("", 0, "", 0, "", (), None)
+_RECORD_ATTRIBUTES = frozenset(vars(_EMPTY_RECORD)) | {"message", "asctime"}
+
+_request_fields: ContextVar[Optional[Dict[str, Any]]] = ContextVar(
+    "request_log_fields", default=None
+)
+
+access_logger = logging.getLogger("iching.access")
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as a single-line JSON object."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Renders time, level, logger, message, extra fields and any exception."""
+        entry = {
+            "time": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue handler that leaves formatting to the listener and never blocks."""
+
+    def __init__(self, log_queue: queue.Queue):
+        """Wraps a bounded queue."""
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Enqueues the record as-is; the listener interpolates and formats it."""
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Adds a record to the queue, dropping it if the queue is full."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingPipeline:
+    """The root queue handler and the listener thread that drains it."""
+
+    def __init__(self, level: int, stream: TextIO, queue_size: int):
+        """Creates the handler and listener; nothing is installed or started.
+
+        Args:
+            level: Minimum level the pipeline writes
+            stream: Where formatted records are written
+            queue_size: Records buffered before new ones are dropped
+        """
+        self.level = level
+        self.queue_size = queue_size
+        self.output = logging.StreamHandler(stream)
+        self.output.setFormatter(JsonFormatter())
+        self.handler = DeferredQueueHandler(queue.Queue(queue_size))
+        self.listener = self._new_listener()
+        self.started = False
+
+    def _new_listener(self) -> QueueListener:
+        """Creates a listener draining the handler's current queue into the output."""
+        return QueueListener(
+            self.handler.queue, self.output, respect_handler_level=True
+        )
+
+    def start(self) -> None:
+        """Starts the listener thread."""
+        self.listener.start()
+        self.started = True
+
+    def install(self) -> None:
+        """Adds the queue handler to the root logger and starts the listener.
+
+        Handlers already on the root logger (an embedding application's, or
+        pytest's log capture) are left in place, and so is the root level
+        they were configured with; only an unconfigured root logger is opened
+        up to the pipeline's level.
+        """
+        root = logging.getLogger()
+        self.handler.setLevel(self.level)
+        if not root.handlers:
+            root.setLevel(self.level)
+        root.addHandler(self.handler)
+        self.start()
+
+    def restart_after_fork(self) -> None:
+        """Gives a forked child a fresh queue and listener.
+
+        The parent's listener thread does not survive the fork.
+        """
+        if not self.started:
+            return
+        self.handler.queue = queue.Queue(self.queue_size)
+        self.listener = self._new_listener()
+        self.start()
+
+    def stop(self) -> None:
+        """Flushes queued records and stops the listener."""
+        if self.started:
+            self.started = False
+            self.listener.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns queue occupancy and drop counts for monitoring."""
+        return {
+            "queued": self.handler.queue.qsize(),
+            "capacity": self.queue_size,
+            "dropped": self.handler.dropped,
+        }
+
+
+_pipeline: Optional[LoggingPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def setup_logging(
+    level: Optional[str] = None, stream: Optional[TextIO] = None
+) -> LoggingPipeline:
+    """Installs the queue-based JSON pipeline on the root logger, once per process.
+
+    Called by the entrypoints (the app's lifespan and ``core.startup``), never
+    at import, so importing ``main`` leaves the host's logging alone.
+
+    Args:
+        level: Level name (defaults to ``LOG_LEVEL``)
+        stream: Output stream (defaults to stderr)
+
+    Returns:
+        The installed pipeline
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = LoggingPipeline(
+                logging.getLevelName((level or os.getenv("LOG_LEVEL", "INFO")).upper()),
+                stream or sys.stderr,
+                int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+            )
+            _pipeline.install()
+            os.register_at_fork(after_in_child=_pipeline.restart_after_fork)
+            atexit.register(_pipeline.stop)
+        return _pipeline
+
+
+def get_logging_pipeline() -> Optional[LoggingPipeline]:
+    """Returns the installed pipeline, if any."""
+    return _pipeline
+
+
+def annotate_request(**fields: Any) -> None:
+    """Adds fields to the current request's access record.
+
+    Does nothing outside a request.
+
+    Args:
+        **fields: Values to include in the record
+    """
+    current = _request_fields.get()
+    if current is not None:
+        current.update(fields)
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parses ``route=rate`` pairs.
+
+    Args:
+        spec: Comma-separated pairs, e.g. ``/cast=0.01,/search=0.1``
+
+    Returns:
+        Sample rate by route template
+    """
+    rates = {}
+    for pair in spec.split(","):
+        route, separator, rate = pair.strip().rpartition("=")
+        if separator and route:
+            rates[route] = float(rate)
+    return rates
+
+
+class RequestLogMiddleware:
+    """ASGI middleware writing one structured access record per request."""
+
+    def __init__(
+        self,
+        app,
+        default_rate: Optional[float] = None,
+        rates: Optional[Dict[str, float]] = None,
+        logger: logging.Logger = access_logger,
+    ):
+        """Wraps an ASGI app; unset options are read from the environment.
+
+        Args:
+            app: The application to wrap
+            default_rate: Fraction of successful requests logged
+            rates: Per-route sample rates overriding the default
+            logger: Logger the records are written to
+        """
+        self.app = app
+        self.default_rate = (
+            default_rate
+            if default_rate is not None
+            else float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+        )
+        self.rates = (
+            rates
+            if rates is not None
+            else parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))
+        )
+        self.logger = logger
+
+    def should_log(self, route: str, status: int) -> bool:
+        """Errors are always logged; successes are sampled by route."""
+        if status >= 400:
+            return True
+        rate = self.rates.get(route, self.default_rate)
+        return rate >= 1 or random.random() < rate
+
+    async def __call__(self, scope, receive, send):
+        """Runs the request, then logs it if its level is enabled and it is sampled."""
+        if scope["type"] != "http" or _request_fields.get() is not None:
+            # Only HTTP scopes are logged; a nested instance leaves it to the outer one
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        fields: Dict[str, Any] = {}
+        token = _request_fields.set(fields)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_fields.reset(token)
+            if status >= 500:
+                level = logging.ERROR
+            elif status >= 400:
+                level = logging.WARNING
+            else:
+                level = logging.INFO
+            if self.logger.isEnabledFor(level):
+                route = getattr(scope.get("route"), "path", None) or scope["path"]
+                if self.should_log(route, status):
+                    fields.update(
+                        method=scope["method"],
+                        route=route,
+                        path=scope["path"],
+                        status=status,
+                        duration_ms=round((time.perf_counter() - start) * 1000, 3),
+                    )
+                    self.logger.log(
+                        level,
+                        "%s %s %s",
+                        scope["method"],
+                        scope["path"],
+                        status,
+                        extra=fields,
+                    )
@@ -0,0 +1,147 @@
+"""Registry of divination methods.
+
+Each method maps a mode name (as sent in ``ReadingRequest.mode``) to a caster
+with a scalar path, which generates one line from a ``random.Random``, and a
+batch path, which generates many lines from a ``numpy.random.Generator``.
+Unknown modes are rejected with ``UnknownMethodError`` instead of silently
+falling back to yarrow.
+"""
+
+from fractions import Fraction
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.batch import HexagramBatch, generate_hexagrams_batch, generate_lines_batch
+from core.coins import (
+    COINS_MODE,
+    coin_line_distribution,
+    generate_coin_line,
+    generate_coin_lines_batch,
+)
+from core.distribution import yarrow_line_distribution, yarrow_line_sampler
+from core.yarrow import YARROW_FAST_MODE, YARROW_MODE, generate_one_line
+
+
+class UnknownMethodError(ValueError):
+    """Raised when a mode name is not in the registry."""
+
+
+class CastingMethod:
+    """A divination method with scalar and vectorized line generators."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        generate_line: Callable,
+        generate_lines_batch: Callable[[int, np.random.Generator], np.ndarray],
+        line_distribution: Callable[[], Dict[int, Fraction]],
+    ):
+        """Describes a method.
+
+        Args:
+            name: Mode name used by the API
+            description: Human-readable description
+            generate_line: Draws one line value from a ``random.Random``-like rng
+            generate_lines_batch: Draws ``count`` line values from a NumPy generator
+            line_distribution: Returns the exact line-value distribution
+        """
+        self.name = name
+        self.description = description
+        self.generate_line = generate_line
+        self.generate_lines_batch = generate_lines_batch
+        self.line_distribution = line_distribution
+
+    def generate_hexagrams_batch(
+        self,
+        n: int,
+        seed: Optional[int] = None,
+        rng: Optional[np.random.Generator] = None,
+    ) -> HexagramBatch:
+        """Casts ``n`` hexagrams with this method in vectorized form.
+
+        Args:
+            n: Number of hexagrams to cast
+            seed: Optional random seed for reproducible results
+            rng: Optional NumPy generator to draw from
+
+        Returns:
+            HexagramBatch with (n, 6) lines and primary and relating numbers
+        """
+        return generate_hexagrams_batch(
+            n, seed=seed, rng=rng, generate_lines=self.generate_lines_batch
+        )
+
+
+METHODS: Dict[str, CastingMethod] = {}
+
+
+def register_method(method: CastingMethod) -> CastingMethod:
+    """Adds a method to the registry, replacing any method with the same name.
+
+    Args:
+        method: Method to register
+
+    Returns:
+        The registered method
+    """
+    METHODS[method.name] = method
+    return method
+
+
+def get_method(name: str) -> CastingMethod:
+    """Looks up a method by mode name.
+
+    Args:
+        name: Mode name
+
+    Returns:
+        The registered method
+
+    Raises:
+        UnknownMethodError: If no method is registered under that name
+    """
+    try:
+        return METHODS[name]
+    except KeyError:
+        raise UnknownMethodError(
+            f"Unknown mode '{name}'; available modes: {', '.join(METHODS)}"
+        ) from None
+
+
+def available_methods() -> List[CastingMethod]:
+    """Returns the registered methods in registration order."""
+    return list(METHODS.values())
+
+
+# --- Built-in Methods ---
+register_method(
+    CastingMethod(
+        name=YARROW_MODE,
+        description="Traditional yarrow stalk method",
+        generate_line=lambda rng: generate_one_line(rng=rng),
+        generate_lines_batch=generate_lines_batch,
+        line_distribution=yarrow_line_distribution,
+    )
+)
+register_method(
+    CastingMethod(
+        name=YARROW_FAST_MODE,
+        description="Yarrow stalk probabilities sampled with one draw per line",
+        generate_line=lambda rng: yarrow_line_sampler().sample(rng),
+        generate_lines_batch=lambda count, rng: yarrow_line_sampler().sample_batch(
+            count, rng
+        ),
+        line_distribution=yarrow_line_distribution,
+    )
+)
+register_method(
+    CastingMethod(
+        name=COINS_MODE,
+        description="Three coin method",
+        generate_line=lambda rng: generate_coin_line(rng=rng),
+        generate_lines_batch=generate_coin_lines_batch,
+        line_distribution=coin_line_distribution,
+    )
+)
@@ -0,0 +1,421 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms are sharded per thread: each thread records into its
+own dictionary, created once under a lock the first time that thread touches
+the metric, so recording is a dictionary lookup and a few list increments
+with no lock on the hot path. A scrape sums the shards. Gauges are callbacks
+read only at scrape time (executor queue, cache counters), so they cost
+nothing between scrapes.
+
+Each process keeps its own registry; under gunicorn every worker reports
+its own series, and work done in the process pool is counted by the worker
+that submitted it.
+
+Usage:
+    from core.metrics import REGISTRY
+
+    casts = REGISTRY.counter("iching_casts_total", "Casts performed", ["mode"])
+    casts.inc("yarrow")
+
+    latency = REGISTRY.histogram("iching_stage_seconds", "Stage latency", ["stage"])
+    with latency.time("cast"):
+        ...
+
+    text = REGISTRY.render()
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds, from sub-millisecond table reads to slow batch requests
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    """Formats a sample value the way Prometheus expects."""
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    """Escapes a label value."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    """Renders ``{name="value",...}``, or nothing when there are no labels."""
+    if not names:
+        return ""
+    return (
+        "{"
+        + ",".join(
+            f'{name}="{_escape(str(value))}"'
+            for name, value in zip(names, values, strict=True)
+        )
+        + "}"
+    )
+
+
+class _Sharded:
+    """Base for metrics whose samples are kept in per-thread shards."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Describes a metric.
+
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Names of the labels every sample carries
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        """Returns the calling thread's shard, registering it on first use."""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _snapshots(self) -> Iterator[dict]:
+        """Yields a copy of each shard; a shard's owner may write to it concurrently."""
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            yield dict(shard)
+
+    def reset(self) -> None:
+        """Clears every shard, for tests."""
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+    def header(self) -> List[str]:
+        """Returns the HELP and TYPE lines."""
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+
+class Counter(_Sharded):
+    """A monotonically increasing count per label set."""
+
+    type_name = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Adds to the count for a label set.
+
+        Args:
+            *labels: Label values, in ``labelnames`` order
+            amount: Amount to add
+        """
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        """Returns the total for each label set across all threads."""
+        totals: Dict[Labels, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def collect(self) -> List[str]:
+        """Renders the metric's lines."""
+        lines = self.header()
+        for labels, value in sorted(self.values().items()):
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}{label_text} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Sharded):
+    """Observations counted into cumulative buckets per label set."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        """Describes a histogram.
+
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Names of the labels every sample carries
+            buckets: Increasing bucket upper bounds; +Inf is implied
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Records one observation.
+
+        Args:
+            value: Observed value (seconds, for latencies)
+            *labels: Label values, in ``labelnames`` order
+        """
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # Per-bucket counts (not cumulative), then the +Inf bucket, sum and count
+            state = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        # First bound >= value; len(buckets) is the +Inf bucket
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observes the wall-clock duration of the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def values(self) -> Dict[Labels, Tuple[List[int], float, int]]:
+        """Returns (cumulative bucket counts with +Inf, sum, count) per label set."""
+        totals: Dict[Labels, list] = {}
+        for shard in self._snapshots():
+            for labels, state in shard.items():
+                state = list(state)
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = state
+                else:
+                    for position, value in enumerate(state):
+                        total[position] += value
+
+        result = {}
+        for labels, state in totals.items():
+            cumulative, running = [], 0
+            for count in state[:-2]:
+                running += count
+                cumulative.append(running)
+            result[labels] = (cumulative, state[-2], state[-1])
+        return result
+
+    def collect(self) -> List[str]:
+        """Renders the metric's lines."""
+        lines = self.header()
+        names = self.labelnames + ("le",)
+        for labels, (cumulative, total, count) in sorted(self.values().items()):
+            for bound, bucket_count in zip(
+                self.buckets + (math.inf,), cumulative, strict=True
+            ):
+                label_text = _label_text(names, labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{label_text} {bucket_count}")
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """A gauge or counter whose samples are read from a callback at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[Tuple[Labels, float]]],
+        labelnames: Sequence[str] = (),
+        type_name: str = "gauge",
+    ):
+        """Describes a metric read on demand.
+
+        Args:
+            name: Metric name
+            documentation: HELP text
+            callback: Returns (label values, value) pairs
+            labelnames: Names of the labels every sample carries
+            type_name: Prometheus type, "gauge" or "counter"
+        """
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+        self.type_name = type_name
+
+    def collect(self) -> List[str]:
+        """Renders the metric's lines."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for labels, value in self.callback():
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}{label_text} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """A named collection of metrics rendered together."""
+
+    def __init__(self):
+        """Creates an empty registry."""
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        """Adds a metric, or returns the existing one of the same name and type."""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(
+                        f"Metric {metric.name} is already registered as another type"
+                    )
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        """Registers (or returns) a counter."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Registers (or returns) a histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[Tuple[Labels, float]]],
+        labelnames: Sequence[str] = (),
+        type_name: str = "gauge",
+    ) -> CallbackMetric:
+        """Registers (or replaces) a metric read from a callback at scrape time."""
+        metric = CallbackMetric(name, documentation, callback, labelnames, type_name)
+        with self._lock:
+            self._metrics[name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[object]:
+        """Returns a registered metric by name."""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Renders every metric in the text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Reading metrics, recorded by the API from the timings get_reading returns
+READING_STAGE_SECONDS = REGISTRY.histogram(
+    "iching_reading_stage_seconds",
+    "Time spent in each stage of producing a reading",
+    ["stage"],
+)
+CASTS_TOTAL = REGISTRY.counter("iching_casts_total", "Hexagrams cast", ["mode"])
+PRIMARY_HEXAGRAMS_TOTAL = REGISTRY.counter(
+    "iching_primary_hexagram_total",
+    "Single readings by primary hexagram",
+    ["mode", "hexagram"],
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing request latency per route template."""
+
+    def __init__(self, app, registry: MetricsRegistry = REGISTRY):
+        """Wraps an ASGI app.
+
+        Args:
+            app: The application to time
+            registry: Registry to record into
+        """
+        self.app = app
+        self.latency = registry.histogram(
+            "iching_http_request_duration_seconds",
+            "Time from request start to the last response byte",
+            ["method", "route"],
+        )
+        self.responses = registry.counter(
+            "iching_http_responses_total",
+            "Responses sent",
+            ["method", "route", "status"],
+        )
+
+    async def __call__(self, scope, receive, send):
+        """Times an HTTP request; other scopes pass straight through."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router records the matched route so parameterized paths share a series
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            self.latency.observe(time.perf_counter() - start, method, route_path)
+            self.responses.inc(method, route_path, status)
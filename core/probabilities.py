@@ -0,0 +1,175 @@
+"""Exact outcome probabilities for each casting method.
+
+Lines are cast independently, so the probability of any six-line outcome is
+the product of its line probabilities. Starting from a method's exact
+line-value distribution, this module derives, once per mode:
+
+- the 4096 six-line outcomes, indexed by packed ``CastResult`` value
+- the 64 primary hexagrams
+- the 64x64 primary-to-relating matrix (the diagonal holds casts with no
+  changing lines, whose relating hexagram is the primary itself)
+- the number of changing lines (0-6)
+
+All tables hold ``Fraction`` values; ``to_dict`` renders them as floats for
+the API.
+"""
+
+from fractions import Fraction
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Tuple, Union
+
+from core.methods import get_method
+from core.results import PACKED_CHANGING_SHIFT, PACKED_MASK
+from core.tables import HEXAGRAM_NUMBER_BY_MASK, LINE_VALUE_BY_BITS, lines_from_masks
+
+OUTCOME_COUNT = 1 << 12
+HEXAGRAM_COUNT = 64
+
+Probability = Union[Fraction, float]
+
+
+def outcome_probabilities(
+    distribution: Mapping[int, Probability],
+) -> Tuple[Probability, ...]:
+    """Computes the probability of each of the 4096 six-line outcomes.
+
+    Args:
+        distribution: Probability of each line value (6, 7, 8, 9); Fractions
+            give exact results
+
+    Returns:
+        Tuple indexed by packed outcome (yang mask | changing mask << 6)
+    """
+    # Probability of one line by its (yang bit | changing bit << 1) index
+    by_bits = [distribution.get(value, 0) for value in LINE_VALUE_BY_BITS]
+
+    probabilities = []
+    for packed in range(OUTCOME_COUNT):
+        yang, changing = packed & PACKED_MASK, packed >> PACKED_CHANGING_SHIFT
+        probability = 1
+        for position in range(6):
+            probability *= by_bits[
+                (yang >> position & 1) | (changing >> position & 1) << 1
+            ]
+        probabilities.append(probability)
+    return tuple(probabilities)
+
+
+class ProbabilityTables:
+    """Exact probability tables for one casting mode."""
+
+    def __init__(self, mode: str, line_distribution: Mapping[int, Fraction]):
+        """Derives every table from a line-value distribution.
+
+        Args:
+            mode: Name of the casting method
+            line_distribution: Exact probability of each line value
+        """
+        self.mode = mode
+        self.lines = dict(line_distribution)
+        self.outcomes = outcome_probabilities(line_distribution)
+
+        primary = [Fraction(0)] * HEXAGRAM_COUNT
+        transitions = [[Fraction(0)] * HEXAGRAM_COUNT for _ in range(HEXAGRAM_COUNT)]
+        changing_lines = [Fraction(0)] * 7
+        for packed, probability in enumerate(self.outcomes):
+            yang, changing = packed & PACKED_MASK, packed >> PACKED_CHANGING_SHIFT
+            primary_index = HEXAGRAM_NUMBER_BY_MASK[yang] - 1
+            primary[primary_index] += probability
+            transitions[primary_index][
+                HEXAGRAM_NUMBER_BY_MASK[yang ^ changing] - 1
+            ] += probability
+            changing_lines[changing.bit_count()] += probability
+
+        # Indexed by King Wen number - 1
+        self.primary = tuple(primary)
+        self.transitions = tuple(tuple(row) for row in transitions)
+        self.changing_lines = tuple(changing_lines)
+
+    def hexagram(self, number: int) -> Dict[str, Any]:
+        """Describes the odds for one hexagram.
+
+        Args:
+            number: King Wen number (1-64)
+
+        Returns:
+            Dictionary with the probability of casting it as the primary
+            hexagram, of reaching it as the relating hexagram of another
+            primary, of casting it with no changing lines, and the relating
+            hexagrams it leads to
+        """
+        index = number - 1
+        primary = self.primary[index]
+        return {
+            "mode": self.mode,
+            "hexagram_number": number,
+            "primary": float(primary),
+            "primary_exact": str(primary),
+            "as_relating": float(
+                sum(row[index] for i, row in enumerate(self.transitions) if i != index)
+            ),
+            "unchanged": float(self.transitions[index][index]),
+            "relating_given_primary": {
+                str(relating + 1): float(probability / primary)
+                for relating, probability in enumerate(self.transitions[index])
+                if probability
+            },
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Renders the summary tables with float probabilities.
+
+        Returns:
+            Dictionary with line, primary and changing-line-count distributions
+        """
+        return {
+            "mode": self.mode,
+            "lines": {str(value): float(p) for value, p in sorted(self.lines.items())},
+            "lines_exact": {
+                str(value): str(p) for value, p in sorted(self.lines.items())
+            },
+            "primary": {
+                str(index + 1): float(p) for index, p in enumerate(self.primary)
+            },
+            "changing_lines": {
+                str(count): float(p) for count, p in enumerate(self.changing_lines)
+            },
+        }
+
+    def transitions_dict(self) -> Dict[str, Any]:
+        """Renders the 64x64 matrix as float rows (row primary, column relating)."""
+        return {
+            "mode": self.mode,
+            "matrix": [[float(p) for p in row] for row in self.transitions],
+        }
+
+    def outcomes_dict(self) -> Dict[str, Any]:
+        """Renders every six-line outcome with its lines and probability."""
+        return {
+            "mode": self.mode,
+            "outcomes": [
+                {
+                    "lines": lines_from_masks(
+                        packed & PACKED_MASK, packed >> PACKED_CHANGING_SHIFT
+                    ),
+                    "probability": float(probability),
+                }
+                for packed, probability in enumerate(self.outcomes)
+            ],
+        }
+
+
+@lru_cache(maxsize=None)
+def probability_tables(mode: str) -> ProbabilityTables:
+    """Returns the cached probability tables for a mode.
+
+    Args:
+        mode: Name of a registered casting method
+
+    Returns:
+        ProbabilityTables for the mode
+
+    Raises:
+        UnknownMethodError: If mode is not a registered method
+    """
+    return ProbabilityTables(mode, get_method(mode).line_distribution())
@@ -0,0 +1,277 @@
+"""Per-request stage timing and opt-in profiling.
+
+Every HTTP response carries a ``Server-Timing`` header listing the stages
+recorded while it was produced (corpus access, casting, assembly,
+serialization) and the total time to the response headers, in milliseconds.
+Stages are recorded into a context variable, which the cast executor copies
+into its worker threads, so a stage timed in the thread pool lands on the
+request that submitted it.
+
+Profiling is off unless ``PROFILING_ENABLED`` is set. Then a request sent
+with ``X-Profile: 1`` is run under ``cProfile``, both on the event loop and
+in the executor thread that does its casting, and the merged stats are
+written to ``PROFILE_DIR`` as a ``.prof`` file (open with ``pstats`` or
+snakeviz). The file name is returned in the ``X-Profile-File`` header.
+Profiles are rate limited: one at a time, at most one per
+``PROFILE_MIN_INTERVAL`` seconds, keeping the newest ``PROFILE_MAX_FILES``
+files. Event-loop samples can include other requests served concurrently.
+
+Configuration comes from the environment:
+
+- ``PROFILING_ENABLED``: honour the ``X-Profile`` header (default false)
+- ``PROFILE_DIR``: where profile files are written (default ``profiles``)
+- ``PROFILE_MIN_INTERVAL``: minimum seconds between profiles (default 10)
+- ``PROFILE_MAX_FILES``: profile files kept before the oldest is deleted (default 100)
+
+Usage:
+    PROFILING_ENABLED=true uvicorn main:app
+    curl -H 'X-Profile: 1' -X POST localhost:8000/cast -d '{}' -i
+    python -m pstats profiles/<file>.prof
+"""
+
+import cProfile
+import glob
+import os
+import pstats
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+PROFILE_HEADER = b"x-profile"
+
+_stages: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "request_stages", default=None
+)
+_profile: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "request_profile", default=None
+)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Adds a stage to the current request's Server-Timing header.
+
+    Does nothing outside a request.
+
+    Args:
+        name: Stage name (a token: letters, digits, ``_`` or ``-``)
+        seconds: Time spent in the stage
+    """
+    stages = _stages.get()
+    if stages is not None:
+        stages.append((name, seconds))
+
+
+def server_timing(stages: List[Tuple[str, float]], total: float) -> bytes:
+    """Formats stages as a Server-Timing header value.
+
+    Args:
+        stages: (name, seconds) pairs in the order they were recorded
+        total: Seconds from request start to the response headers
+
+    Returns:
+        Header value, e.g. ``b"cast;dur=0.412, total;dur=1.037"``
+    """
+    metrics = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in stages]
+    metrics.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(metrics).encode("ascii")
+
+
+class RequestProfile:
+    """cProfile runs for one request, one per thread it touched."""
+
+    def __init__(self):
+        """Creates an empty profile."""
+        self.profilers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def profile(self) -> Iterator[None]:
+        """Profiles the block on the calling thread."""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # From Python 3.12 one profiler covers every thread, so the
+            # event-loop profiler is already recording this one
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._lock:
+                self.profilers.append(profiler)
+
+    def dump(self, path: str) -> None:
+        """Merges every thread's stats and writes them to a file."""
+        with self._lock:
+            profilers = list(self.profilers)
+        if profilers:
+            pstats.Stats(*profilers).dump_stats(path)
+
+
+def run_in_request_profile(call: Callable[[], Any]) -> Any:
+    """Runs a call, under the current request's profiler if it is being profiled.
+
+    Args:
+        call: Function to call with no arguments
+
+    Returns:
+        The call's return value
+    """
+    profile = _profile.get()
+    if profile is None:
+        return call()
+    with profile.profile():
+        return call()
+
+
+class ProfileRateLimiter:
+    """Allows one profile at a time and at most one per interval."""
+
+    def __init__(
+        self, min_interval: float, clock: Callable[[], float] = time.monotonic
+    ):
+        """Creates a limiter.
+
+        Args:
+            min_interval: Minimum seconds between the starts of two profiles
+            clock: Monotonic time source, replaceable in tests
+        """
+        self.min_interval = min_interval
+        self.active = False
+        self.last_started: Optional[float] = None
+        self.skipped = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Claims the next profile slot; False means the request is not profiled."""
+        with self._lock:
+            now = self._clock()
+            recent = (
+                self.last_started is not None
+                and now - self.last_started < self.min_interval
+            )
+            if self.active or recent:
+                self.skipped += 1
+                return False
+            self.active = True
+            self.last_started = now
+            return True
+
+    def release(self) -> None:
+        """Frees the slot once a profile has been written."""
+        with self._lock:
+            self.active = False
+
+
+def prune_profiles(directory: str, keep: int) -> None:
+    """Deletes the oldest profile files beyond the newest ``keep``."""
+    paths = sorted(glob.glob(os.path.join(directory, "*.prof")), key=os.path.getmtime)
+    for path in paths[: max(len(paths) - keep, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ProfilingMiddleware:
+    """ASGI middleware adding Server-Timing to responses and profiling on request."""
+
+    def __init__(
+        self,
+        app,
+        enabled: Optional[bool] = None,
+        directory: Optional[str] = None,
+        min_interval: Optional[float] = None,
+        max_files: Optional[int] = None,
+    ):
+        """Wraps an ASGI app; unset options are read from the environment.
+
+        Args:
+            app: The application to wrap
+            enabled: Whether the X-Profile header is honoured
+            directory: Where profile files are written
+            min_interval: Minimum seconds between profiles
+            max_files: Number of profile files kept
+        """
+        self.app = app
+        if enabled is None:
+            enabled = os.getenv("PROFILING_ENABLED", "false").lower()
+            enabled = enabled in ("1", "true", "yes")
+        self.enabled = enabled
+        self.directory = directory or os.getenv("PROFILE_DIR", "profiles")
+        self.limiter = ProfileRateLimiter(
+            min_interval
+            if min_interval is not None
+            else float(os.getenv("PROFILE_MIN_INTERVAL", "10"))
+        )
+        self.max_files = (
+            max_files
+            if max_files is not None
+            else int(os.getenv("PROFILE_MAX_FILES", "100"))
+        )
+
+    def wants_profile(self, scope) -> bool:
+        """Whether profiling is enabled and the request asked for it."""
+        if not self.enabled:
+            return False
+        return any(
+            name == PROFILE_HEADER and value not in (b"", b"0")
+            for name, value in scope["headers"]
+        )
+
+    async def __call__(self, scope, receive, send):
+        """Times the request and, when asked and allowed, profiles it."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stages: List[Tuple[str, float]] = []
+        stages_token = _stages.set(stages)
+        profile = None
+        profile_path = None
+        if self.wants_profile(scope) and self.limiter.acquire():
+            profile = RequestProfile()
+            route = scope["path"].strip("/").replace("/", "_") or "root"
+            name = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{route}"
+            profile_path = os.path.join(
+                self.directory, f"{name}-{uuid.uuid4().hex[:8]}.prof"
+            )
+        profile_token = _profile.set(profile) if profile is not None else None
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                timing = server_timing(stages, time.perf_counter() - start)
+                headers.append((b"server-timing", timing))
+                if profile_path is not None:
+                    filename = os.path.basename(profile_path)
+                    headers.append(
+                        (b"x-profile-file", filename.encode("ascii", "replace"))
+                    )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            if profile is None:
+                await self.app(scope, receive, send_with_timing)
+            else:
+                with profile.profile():
+                    await self.app(scope, receive, send_with_timing)
+        finally:
+            if profile_token is not None:
+                _profile.reset(profile_token)
+            _stages.reset(stages_token)
+            if profile is not None:
+                try:
+                    os.makedirs(self.directory, exist_ok=True)
+                    profile.dump(profile_path)
+                    prune_profiles(self.directory, self.max_files)
+                finally:
+                    self.limiter.release()
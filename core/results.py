@@ -0,0 +1,208 @@
+"""Compact representations of cast results.
+
+A cast is fully described by its 6-bit yang mask and 6-bit changing mask
+(see ``core.tables``), i.e. 12 bits. ``CastResult`` is an immutable tuple
+of just those two small integers and derives lines, hexagram numbers,
+trigrams and changing lines on access. ``CastResultArray`` packs many casts
+into a ``uint16`` array at two bytes per cast, for simulation buffers that
+hold millions of results.
+"""
+
+from array import array
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Union,
+    overload,
+)
+
+from core.tables import (
+    CHANGING_INDICES_BY_MASK,
+    HEXAGRAM_NUMBER_BY_MASK,
+    TRIGRAM_NAMES,
+    TRIGRAMS_BY_MASK,
+    line_masks,
+    lines_from_masks,
+)
+
+# Packed layout: yang mask in bits 0-5, changing mask in bits 6-11
+PACKED_CHANGING_SHIFT = 6
+PACKED_MASK = 0x3F
+
+
+class CastResult(NamedTuple):
+    """One cast, stored as a yang mask and a changing mask."""
+
+    yang_mask: int  # bit i set if line i (from the bottom) is yang
+    changing_mask: int  # bit i set if line i is changing
+
+    @classmethod
+    def from_lines(cls, lines: Sequence[int]) -> "CastResult":
+        """Creates a result from six line values.
+
+        Args:
+            lines: Sequence of 6 line values (6, 7, 8, or 9), from bottom to top
+
+        Returns:
+            The compact result
+        """
+        return cls(*line_masks(lines))
+
+    @classmethod
+    def from_packed(cls, packed: int) -> "CastResult":
+        """Creates a result from its 12-bit packed form.
+
+        Args:
+            packed: Yang mask in bits 0-5 and changing mask in bits 6-11
+
+        Returns:
+            The compact result
+        """
+        return cls(packed & PACKED_MASK, packed >> PACKED_CHANGING_SHIFT & PACKED_MASK)
+
+    @property
+    def packed(self) -> int:
+        """The result as a 12-bit integer."""
+        return self.yang_mask | self.changing_mask << PACKED_CHANGING_SHIFT
+
+    @property
+    def lines(self) -> List[int]:
+        """Line values (6, 7, 8, or 9) from bottom to top."""
+        return lines_from_masks(self.yang_mask, self.changing_mask)
+
+    @property
+    def primary_hexagram_number(self) -> int:
+        """King Wen number of the cast hexagram."""
+        return HEXAGRAM_NUMBER_BY_MASK[self.yang_mask]
+
+    @property
+    def changing_line_indices(self) -> List[int]:
+        """0-based indices of the changing lines."""
+        return list(CHANGING_INDICES_BY_MASK[self.changing_mask])
+
+    @property
+    def transformed_hexagram_number(self) -> Optional[int]:
+        """King Wen number of the relating hexagram, or None if no line changes."""
+        if not self.changing_mask:
+            return None
+        return HEXAGRAM_NUMBER_BY_MASK[self.yang_mask ^ self.changing_mask]
+
+    @property
+    def transformed_lines(self) -> Optional[List[int]]:
+        """Lines of the relating hexagram, or None if no line changes."""
+        if not self.changing_mask:
+            return None
+        return lines_from_masks(self.yang_mask ^ self.changing_mask, 0)
+
+    @property
+    def trigrams(self) -> Dict[str, Dict[str, Any]]:
+        """Lower and upper trigram values and names."""
+        lower_value, upper_value = TRIGRAMS_BY_MASK[self.yang_mask]
+        return {
+            "lower": {"value": lower_value, "name": TRIGRAM_NAMES[lower_value]},
+            "upper": {"value": upper_value, "name": TRIGRAM_NAMES[upper_value]},
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Expands the result into the dictionary returned by ``cast_hexagram``.
+
+        Returns:
+            Dictionary containing the cast results
+        """
+        result = {
+            "lines": self.lines,
+            "changing_line_indices": self.changing_line_indices,
+            "primary_hexagram_number": self.primary_hexagram_number,
+            "trigrams": self.trigrams,
+        }
+        if self.changing_mask:
+            result["transformed_hexagram_number"] = self.transformed_hexagram_number
+            result["transformed_lines"] = self.transformed_lines
+        return result
+
+    def __repr__(self) -> str:
+        """Shows the lines of the result."""
+        return f"CastResult(lines={self.lines})"
+
+
+class CastResultArray:
+    """Growable, array-backed container of casts at two bytes per cast."""
+
+    def __init__(self, results: Iterable[CastResult] = ()):
+        """Creates a container, optionally filled from existing results.
+
+        Args:
+            results: Results to append
+        """
+        self._packed = array("H", (result.packed for result in results))
+
+    @classmethod
+    def from_packed(cls, packed: Union[Iterable[int], Any]) -> "CastResultArray":
+        """Creates a container from 12-bit packed values.
+
+        Args:
+            packed: Iterable of packed ints, or a NumPy uint16 array
+
+        Returns:
+            The container
+        """
+        container = cls()
+        if hasattr(packed, "astype"):
+            container._packed.frombytes(packed.astype("<u2", copy=False).tobytes())
+        else:
+            container._packed.extend(packed)
+        return container
+
+    def append(self, result: CastResult) -> None:
+        """Adds one result."""
+        self._packed.append(result.packed)
+
+    def extend(self, results: Iterable[CastResult]) -> None:
+        """Adds several results."""
+        self._packed.extend(result.packed for result in results)
+
+    def packed(self) -> array:
+        """Returns the underlying ``uint16`` array (not a copy)."""
+        return self._packed
+
+    def to_numpy(self):
+        """Returns a NumPy ``uint16`` copy of the packed values.
+
+        A copy rather than a view: while a view of the array's buffer is
+        alive, appending to the container raises ``BufferError``.
+        """
+        import numpy as np
+
+        return np.frombuffer(self._packed, dtype=np.uint16).copy()
+
+    def __len__(self) -> int:
+        """Returns the number of stored results."""
+        return len(self._packed)
+
+    @overload
+    def __getitem__(self, index: int) -> CastResult:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "CastResultArray":
+        ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[CastResult, "CastResultArray"]:
+        """Returns the result at an index, or a new container for a slice."""
+        if isinstance(index, slice):
+            container = CastResultArray()
+            container._packed = self._packed[index]
+            return container
+        return CastResult.from_packed(self._packed[index])
+
+    def __iter__(self) -> Iterator[CastResult]:
+        """Iterates over the stored results."""
+        return (CastResult.from_packed(packed) for packed in self._packed)
@@ -0,0 +1,324 @@
+"""In-memory full-text search over the hexagram corpus.
+
+Every searchable passage (a judgment, an image, one line's meaning or one
+commentary paragraph) is tokenized once into an inverted index mapping each
+token to the passages and token positions where it occurs. Queries support:
+
+- terms: ``dragon``
+- prefixes: ``persever*``
+- phrases: ``"flying dragon"``
+
+All parts of a query must match. Matching passages are ranked with BM25,
+weighted by field, and returned with the character offsets of each match
+so clients can highlight them.
+"""
+
+import bisect
+import heapq
+import math
+import re
+import threading
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from core.corpus import CorpusSnapshot, get_corpus
+
+TOKEN_PATTERN = re.compile(r"\w+")
+QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+# Relative weight of a match in each searchable field, in display order
+FIELD_BOOSTS = {"judgment": 2.0, "image": 1.5, "lines": 1.5, "commentary": 1.0}
+SEARCH_FIELDS = tuple(FIELD_BOOSTS)
+_FIELD_ORDER = {field: position for position, field in enumerate(SEARCH_FIELDS)}
+
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class Passage(NamedTuple):
+    """One searchable piece of text."""
+
+    number: int  # hexagram number
+    field: str  # one of SEARCH_FIELDS
+    index: Optional[int]  # line number, or 1-based commentary paragraph
+    text: str
+
+
+class Clause(NamedTuple):
+    """One part of a parsed query."""
+
+    kind: str  # "term", "prefix" or "phrase"
+    tokens: Tuple[str, ...]
+
+
+class SearchHit(NamedTuple):
+    """A ranked passage with the character spans that matched."""
+
+    passage: Passage
+    score: float
+    highlights: List[Tuple[int, int]]
+
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """Splits text into case-folded word tokens.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of (token, start offset, end offset)
+    """
+    return [
+        (match.group().casefold(), match.start(), match.end())
+        for match in TOKEN_PATTERN.finditer(text)
+    ]
+
+
+def parse_query(query: str) -> List[Clause]:
+    """Parses a query into clauses.
+
+    Quoted text is a phrase, a word ending in ``*`` is a prefix, and a word
+    that tokenizes into several tokens (such as ``Ch'ien``) is a phrase.
+
+    Args:
+        query: Query text
+
+    Returns:
+        List of clauses; empty if the query has no tokens
+    """
+    clauses = []
+    for match in QUERY_PATTERN.finditer(query):
+        quoted, word = match.groups()
+        text = quoted if quoted is not None else word
+        tokens = tuple(token for token, _, _ in tokenize(text))
+        if not tokens:
+            continue
+        if quoted is None and len(tokens) == 1 and word.endswith("*"):
+            clauses.append(Clause("prefix", tokens))
+        elif len(tokens) == 1:
+            clauses.append(Clause("term", tokens))
+        else:
+            clauses.append(Clause("phrase", tokens))
+    return clauses
+
+
+def corpus_passages(
+    hexagram_data: Mapping[int, Mapping[str, Any]],
+) -> Iterable[Passage]:
+    """Extracts the searchable passages of a corpus.
+
+    Args:
+        hexagram_data: Hexagram entries indexed by number
+
+    Yields:
+        Passages in hexagram and field order
+    """
+    for number in sorted(hexagram_data):
+        entry = hexagram_data[number]
+        for field in ("judgment", "image"):
+            if entry.get(field):
+                yield Passage(number, field, None, entry[field])
+        for position, line in enumerate(entry.get("lines") or (), start=1):
+            if line.get("meaning"):
+                yield Passage(
+                    number, "lines", line.get("lineNumber", position), line["meaning"]
+                )
+        for position, paragraph in enumerate(entry.get("commentary") or (), start=1):
+            if paragraph:
+                yield Passage(number, "commentary", position, paragraph)
+
+
+class SearchIndex:
+    """Positional inverted index over corpus passages."""
+
+    def __init__(self, passages: Iterable[Passage], content_hash: str = ""):
+        """Tokenizes and indexes passages.
+
+        Args:
+            passages: Passages to index
+            content_hash: Hash of the corpus the passages came from
+        """
+        self.content_hash = content_hash
+        self.passages: List[Passage] = []
+        self.spans: List[List[Tuple[int, int]]] = []
+        self.postings: Dict[str, Dict[int, List[int]]] = {}
+
+        for doc, passage in enumerate(passages):
+            tokens = tokenize(passage.text)
+            self.passages.append(passage)
+            self.spans.append([(start, end) for _, start, end in tokens])
+            for position, (token, _, _) in enumerate(tokens):
+                self.postings.setdefault(token, {}).setdefault(doc, []).append(position)
+
+        self.vocabulary = sorted(self.postings)
+        total_length = sum(len(spans) for spans in self.spans)
+        self.average_length = total_length / max(len(self.spans), 1)
+
+        # Per-passage scoring inputs, so a query only sums term contributions
+        self.length_norms = [
+            1 - BM25_B + BM25_B * len(spans) / self.average_length
+            for spans in self.spans
+        ]
+        self.boosts = [FIELD_BOOSTS[passage.field] for passage in self.passages]
+        self.tie_breaks = [
+            (passage.number, _FIELD_ORDER[passage.field], passage.index or 0, doc)
+            for doc, passage in enumerate(self.passages)
+        ]
+
+    @classmethod
+    def from_corpus(
+        cls, hexagram_data: Mapping[int, Mapping[str, Any]], content_hash: str = ""
+    ) -> "SearchIndex":
+        """Builds an index over every searchable passage of a corpus."""
+        return cls(corpus_passages(hexagram_data), content_hash)
+
+    def clause_matches(self, clause: Clause) -> Dict[int, List[int]]:
+        """Finds where a clause matches.
+
+        Args:
+            clause: Parsed query clause
+
+        Returns:
+            Dictionary mapping passage id to the token positions where a match
+            starts; each match spans ``len(clause.tokens)`` tokens for a phrase
+            and one token otherwise. The lists may be shared with the index and
+            must not be modified.
+        """
+        if clause.kind == "term":
+            return self.postings.get(clause.tokens[0], {})
+
+        if clause.kind == "prefix":
+            stem = clause.tokens[0]
+            start = bisect.bisect_left(self.vocabulary, stem)
+            stop = bisect.bisect_left(self.vocabulary, stem + "\U0010ffff", start)
+            if stop - start == 1:
+                return self.postings[self.vocabulary[start]]
+            matches: Dict[int, List[int]] = {}
+            for term in self.vocabulary[start:stop]:
+                for doc, positions in self.postings[term].items():
+                    matches.setdefault(doc, []).extend(positions)
+            return matches
+
+        # Phrase: every token must follow the previous one
+        token_postings = [self.postings.get(token) for token in clause.tokens]
+        if not all(token_postings):
+            return {}
+        candidates = set(token_postings[0]).intersection(*token_postings[1:])
+        matches = {}
+        for doc in candidates:
+            following = [set(postings[doc]) for postings in token_postings[1:]]
+            starts = [
+                position
+                for position in token_postings[0][doc]
+                if all(
+                    position + offset in positions
+                    for offset, positions in enumerate(following, start=1)
+                )
+            ]
+            if starts:
+                matches[doc] = starts
+        return matches
+
+    def search(
+        self,
+        query: str,
+        offset: int = 0,
+        limit: int = 10,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[int, List[SearchHit]]:
+        """Runs a query.
+
+        Args:
+            query: Query text (terms, ``prefix*`` and ``"phrases"``)
+            offset: Number of ranked hits to skip
+            limit: Maximum number of hits to return
+            fields: Optional fields to restrict the search to
+
+        Returns:
+            Tuple of (total number of matching passages, hits on this page)
+        """
+        clauses = parse_query(query)
+        if not clauses:
+            return 0, []
+
+        clause_matches = [self.clause_matches(clause) for clause in clauses]
+        docs = set(clause_matches[0]).intersection(*clause_matches[1:])
+        if fields:
+            docs = {doc for doc in docs if self.passages[doc].field in fields}
+
+        passage_count = len(self.passages)
+        idfs = [
+            math.log(1 + (passage_count - len(matches) + 0.5) / (len(matches) + 0.5))
+            for matches in clause_matches
+        ]
+        scored = []
+        for doc in docs:
+            length_norm = BM25_K1 * self.length_norms[doc]
+            score = 0.0
+            for idf, matches in zip(idfs, clause_matches, strict=True):
+                frequency = len(matches[doc])
+                score += idf * frequency * (BM25_K1 + 1) / (frequency + length_norm)
+            scored.append((-score * self.boosts[doc], self.tie_breaks[doc]))
+
+        # Only the hits up to the end of the requested page need ordering
+        hits = []
+        ranked = heapq.nsmallest(offset + limit, scored)[offset:]
+        for negative_score, (_, _, _, doc) in ranked:
+            spans = self.spans[doc]
+            highlights = sorted(
+                {
+                    (spans[position][0], spans[position + len(clause.tokens) - 1][1])
+                    for clause, matches in zip(clauses, clause_matches, strict=True)
+                    for position in matches[doc]
+                }
+            )
+            hits.append(
+                SearchHit(self.passages[doc], round(-negative_score, 4), highlights)
+            )
+        return len(scored), hits
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns index statistics for monitoring."""
+        return {
+            "passages": len(self.passages),
+            "terms": len(self.vocabulary),
+            "content_hash": self.content_hash,
+        }
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index(snapshot: Optional[CorpusSnapshot] = None) -> SearchIndex:
+    """Returns the index for a corpus snapshot, rebuilding it after a reload.
+
+    Args:
+        snapshot: Corpus snapshot the index must match (defaults to the
+            current one); pass the snapshot hits are looked up in, so a
+            concurrent reload cannot pair them with other entries
+
+    Returns:
+        The shared SearchIndex
+    """
+    global _index
+    if snapshot is None:
+        snapshot = get_corpus().snapshot()
+    content_hash = snapshot.content_hash
+    index = _index
+    if index is None or index.content_hash != content_hash:
+        with _index_lock:
+            if _index is None or _index.content_hash != content_hash:
+                _index = SearchIndex.from_corpus(snapshot.data, content_hash)
+            index = _index
+    return index
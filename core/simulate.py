@@ -0,0 +1,492 @@
+"""Multi-process Monte Carlo simulation of the casting methods.
+
+The requested number of hexagrams is split into fixed-size chunks. Chunk
+``i`` draws from its own generator, seeded with the ``i``-th child of the
+run's ``SeedSequence``, so a run's totals depend only on its seed, size and
+chunk size: not on the number of workers, the order chunks finish in, or
+how often the run was interrupted and resumed.
+
+Each worker process counts the 4096 possible six-line outcomes of its
+chunks into its own row of a shared-memory table; nothing is pickled back.
+Line-value, primary hexagram and primary-to-relating counts are all
+derived from those outcome counts. The parent reads the table to report
+throughput and to write checkpoints (counts plus completed chunks) that a
+later run resumes from. SIGINT and SIGTERM stop the workers after their
+current chunk and write a final checkpoint (exit status 130); a worker that
+dies stops the rest the same way, but the run exits with status 1.
+
+Usage:
+    python -m core.yarrow simulate --hexagrams 1_000_000_000 --checkpoint sim.json
+    python -m core.simulate --mode coins --hexagrams 50_000_000 --workers 8
+"""
+
+import argparse
+import ctypes
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
+
+import numpy as np
+
+from core.batch import BATCH_CHUNK_SIZE, LINES_PER_HEXAGRAM, pack_results_batch
+from core.methods import available_methods, get_method
+from core.probabilities import HEXAGRAM_COUNT, OUTCOME_COUNT, outcome_probabilities
+from core.results import PACKED_MASK
+from core.tables import HEXAGRAM_NUMBER_BY_MASK, lines_from_masks
+
+# Hexagrams per work unit: long enough to amortize scheduling, short enough to
+# checkpoint often
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+CHECKPOINT_VERSION = 1
+
+# Each worker's shared row: outcome counts, then the number of its chunks completed
+_ROW_SIZE = OUTCOME_COUNT + 1
+
+LINE_VALUES = (6, 7, 8, 9)
+
+# Per outcome: how many of its lines have each value, then its primary and its
+# relating hexagram (0-based)
+_OUTCOME_LINE_VALUES = np.array(
+    [
+        [
+            lines_from_masks(packed & PACKED_MASK, packed >> 6).count(value)
+            for value in LINE_VALUES
+        ]
+        for packed in range(OUTCOME_COUNT)
+    ],
+    dtype=np.int64,
+)
+_OUTCOME_PRIMARY = np.array(
+    [HEXAGRAM_NUMBER_BY_MASK[p & PACKED_MASK] - 1 for p in range(OUTCOME_COUNT)],
+    dtype=np.intp,
+)
+_OUTCOME_RELATING = np.array(
+    [
+        HEXAGRAM_NUMBER_BY_MASK[(p & PACKED_MASK) ^ (p >> 6)] - 1
+        for p in range(OUTCOME_COUNT)
+    ],
+    dtype=np.intp,
+)
+
+
+class SimulationConfig(NamedTuple):
+    """What to simulate; identical configs give identical totals."""
+
+    mode: str
+    hexagrams: int
+    seed: int
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+
+    @property
+    def chunk_count(self) -> int:
+        """Number of chunks the run is split into."""
+        return -(-self.hexagrams // self.chunk_size)
+
+    def chunk_hexagrams(self, index: int) -> int:
+        """Number of hexagrams in a chunk (the last one may be short)."""
+        return min(self.chunk_size, self.hexagrams - index * self.chunk_size)
+
+
+class SimulationState:
+    """Outcome counts and completed chunks of a run, as saved in checkpoints."""
+
+    def __init__(
+        self,
+        config: SimulationConfig,
+        counts: Optional[np.ndarray] = None,
+        completed: Optional[Set[int]] = None,
+        elapsed: float = 0.0,
+    ):
+        """Creates a state.
+
+        Args:
+            config: Run configuration
+            counts: Counts of the 4096 outcomes so far
+            completed: Indices of chunks included in counts
+            elapsed: Seconds spent simulating in earlier sessions
+        """
+        self.config = config
+        self.counts = (
+            counts if counts is not None else np.zeros(OUTCOME_COUNT, dtype=np.int64)
+        )
+        self.completed = completed if completed is not None else set()
+        self.elapsed = elapsed
+        # Exit codes of workers that died during the last session (not checkpointed)
+        self.worker_failures: List[int] = []
+
+    @property
+    def hexagrams_done(self) -> int:
+        """Number of hexagrams counted."""
+        return int(self.counts.sum())
+
+    @property
+    def finished(self) -> bool:
+        """Whether every chunk has been counted."""
+        return len(self.completed) == self.config.chunk_count
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Renders the state as a checkpoint document."""
+        return {
+            "version": CHECKPOINT_VERSION,
+            "config": self.config._asdict(),
+            "completed": sorted(self.completed),
+            "elapsed": round(self.elapsed, 3),
+            "counts": self.counts.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, document: Dict[str, Any]) -> "SimulationState":
+        """Restores a state from a checkpoint document."""
+        if document.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(
+                f"Unsupported checkpoint version: {document.get('version')}"
+            )
+        return cls(
+            SimulationConfig(**document["config"]),
+            np.array(document["counts"], dtype=np.int64),
+            set(document["completed"]),
+            document["elapsed"],
+        )
+
+
+def save_checkpoint(path: str, state: SimulationState) -> None:
+    """Writes a checkpoint atomically, so a failed write never replaces a good one."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(state.to_dict(), f)
+    os.replace(temp_path, path)
+
+
+def load_checkpoint(path: str) -> SimulationState:
+    """Reads a checkpoint written by ``save_checkpoint``."""
+    with open(path) as f:
+        return SimulationState.from_dict(json.load(f))
+
+
+def chunk_generator(seed: int, index: int) -> np.random.Generator:
+    """Returns chunk ``index``'s generator, child ``index`` of the run's seed."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+
+def count_chunk(config: SimulationConfig, index: int) -> np.ndarray:
+    """Casts one chunk through the method's vectorized path and counts its outcomes.
+
+    Args:
+        config: Run configuration
+        index: Chunk index
+
+    Returns:
+        int64 counts of the 4096 outcomes
+    """
+    method = get_method(config.mode)
+    rng = chunk_generator(config.seed, index)
+    hexagrams = config.chunk_hexagrams(index)
+    counts = np.zeros(OUTCOME_COUNT, dtype=np.int64)
+    for start in range(0, hexagrams, BATCH_CHUNK_SIZE):
+        count = min(BATCH_CHUNK_SIZE, hexagrams - start)
+        lines = method.generate_lines_batch(count * LINES_PER_HEXAGRAM, rng).reshape(
+            -1, LINES_PER_HEXAGRAM
+        )
+        counts += np.bincount(pack_results_batch(lines), minlength=OUTCOME_COUNT)
+    return counts
+
+
+def _simulate_worker(
+    config: SimulationConfig,
+    chunks: List[int],
+    table,
+    row: int,
+    lock,
+    stop,
+    parent_pid: int,
+) -> None:
+    """Counts chunks into the worker's shared row until done, stopped or orphaned."""
+    # The parent handles interruption and tells workers to stop between chunks
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    shared = np.frombuffer(table, dtype=np.int64).reshape(-1, _ROW_SIZE)[row]
+    for index in chunks:
+        if stop.is_set() or os.getppid() != parent_pid:
+            break
+        counts = count_chunk(config, index)
+        with lock:
+            shared[:OUTCOME_COUNT] += counts
+            shared[OUTCOME_COUNT] += 1
+
+
+def summarize(counts: np.ndarray) -> Dict[str, Any]:
+    """Derives line, primary hexagram and transition counts from outcome counts.
+
+    Args:
+        counts: Counts of the 4096 outcomes
+
+    Returns:
+        Dictionary with line-value counts, the 64 primary counts and the 64x64
+        primary-to-relating matrix (row = primary, column = relating)
+    """
+    primary = np.zeros(HEXAGRAM_COUNT, dtype=np.int64)
+    np.add.at(primary, _OUTCOME_PRIMARY, counts)
+    transitions = np.zeros((HEXAGRAM_COUNT, HEXAGRAM_COUNT), dtype=np.int64)
+    np.add.at(transitions, (_OUTCOME_PRIMARY, _OUTCOME_RELATING), counts)
+    lines = counts @ _OUTCOME_LINE_VALUES
+    return {
+        "hexagrams": int(counts.sum()),
+        "lines": {
+            str(value): int(count)
+            for value, count in zip(LINE_VALUES, lines, strict=True)
+        },
+        "primary": primary.tolist(),
+        "transitions": transitions.tolist(),
+    }
+
+
+def run_simulation(
+    config: SimulationConfig,
+    workers: Optional[int] = None,
+    checkpoint: Optional[str] = None,
+    checkpoint_interval: float = 60.0,
+    progress_interval: float = 5.0,
+    report: Optional[Callable[[str], None]] = print,
+    state: Optional[SimulationState] = None,
+) -> SimulationState:
+    """Runs (or resumes) a simulation across worker processes.
+
+    Args:
+        config: Run configuration
+        workers: Number of processes (defaults to every core)
+        checkpoint: Optional checkpoint path, written periodically and on exit
+        checkpoint_interval: Seconds between checkpoints
+        progress_interval: Seconds between progress reports
+        report: Receives progress lines; None silences them
+        state: State to resume from (defaults to an empty run)
+
+    Returns:
+        The final state; ``finished`` is False if the run was interrupted or
+        a worker failed, in which case ``worker_failures`` holds the exit codes
+    """
+    state = state or SimulationState(config)
+    if state.config != config:
+        raise ValueError(f"State is for {state.config}, not {config}")
+    workers = max(1, workers or os.cpu_count() or 1)
+    remaining = [
+        index for index in range(config.chunk_count) if index not in state.completed
+    ]
+    if not remaining:
+        return state
+    workers = min(workers, len(remaining))
+    assignments = [remaining[worker::workers] for worker in range(workers)]
+
+    context = multiprocessing.get_context()
+    table = context.RawArray(ctypes.c_int64, workers * _ROW_SIZE)
+    shared = np.frombuffer(table, dtype=np.int64).reshape(workers, _ROW_SIZE)
+    locks = [context.Lock() for _ in range(workers)]
+    stop = context.Event()
+    base_counts = state.counts.copy()
+    base_completed = set(state.completed)
+    base_elapsed = state.elapsed
+
+    def snapshot() -> None:
+        """Folds the shared table into state, reading each row under its lock."""
+        counts = base_counts.copy()
+        completed = set(base_completed)
+        for worker in range(workers):
+            with locks[worker]:
+                counts += shared[worker, :OUTCOME_COUNT]
+                done = int(shared[worker, OUTCOME_COUNT])
+            completed.update(assignments[worker][:done])
+        state.counts, state.completed = counts, completed
+        state.elapsed = base_elapsed + time.perf_counter() - started
+
+    def request_stop(signum, frame):
+        stop.set()
+
+    processes = [
+        context.Process(
+            target=_simulate_worker,
+            args=(
+                config,
+                assignments[worker],
+                table,
+                worker,
+                locks[worker],
+                stop,
+                os.getpid(),
+            ),
+            daemon=True,
+        )
+        for worker in range(workers)
+    ]
+    started = time.perf_counter()
+    start_done = state.hexagrams_done
+    previous_handlers = {}
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            previous_handlers[signum] = signal.signal(signum, request_stop)
+        except ValueError:
+            # Signal handlers can only be installed from the main thread
+            pass
+
+    for process in processes:
+        process.start()
+    last_checkpoint = last_report = time.perf_counter()
+    try:
+        while True:
+            alive = [process.sentinel for process in processes if process.is_alive()]
+            if not alive:
+                break
+            # Wakes when a worker exits or the progress interval passes
+            multiprocessing.connection.wait(alive, timeout=progress_interval)
+            # Workers ignore SIGINT and SIGTERM, so a non-zero exit code is a crash
+            if any(process.exitcode for process in processes):
+                stop.set()
+            if time.perf_counter() - last_report < progress_interval:
+                continue
+            last_report = time.perf_counter()
+            snapshot()
+            if report is not None:
+                session = max(time.perf_counter() - started, 1e-9)
+                rate = (state.hexagrams_done - start_done) / session
+                left = config.hexagrams - state.hexagrams_done
+                eta = f"{left / rate:,.0f}s" if rate else "?"
+                report(
+                    f"{state.hexagrams_done:,}/{config.hexagrams:,} hexagrams "
+                    f"({len(state.completed)}/{config.chunk_count} chunks), "
+                    f"{rate:,.0f} hexagrams/s "
+                    f"({rate * LINES_PER_HEXAGRAM:,.0f} lines/s), ETA {eta}"
+                    + (" - stopping" if stop.is_set() else "")
+                )
+            if (
+                checkpoint is not None
+                and time.perf_counter() - last_checkpoint >= checkpoint_interval
+            ):
+                save_checkpoint(checkpoint, state)
+                last_checkpoint = time.perf_counter()
+    finally:
+        stop.set()
+        for process in processes:
+            process.join()
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+        state.worker_failures = [
+            process.exitcode for process in processes if process.exitcode
+        ]
+        snapshot()
+        if checkpoint is not None:
+            save_checkpoint(checkpoint, state)
+    return state
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs or resumes a simulation from the command line; returns the exit status."""
+    parser = argparse.ArgumentParser(
+        description="Simulate many casts across every core"
+    )
+    parser.add_argument(
+        "--mode",
+        default="yarrow",
+        choices=[method.name for method in available_methods()],
+    )
+    parser.add_argument(
+        "--hexagrams", type=lambda text: int(text.replace("_", "")), default=100_000_000
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Root seed (defaults to fresh entropy, recorded in the checkpoint)",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="Worker processes (defaults to every core)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Hexagrams per work unit",
+    )
+    parser.add_argument(
+        "--checkpoint", help="Checkpoint file; an existing one is resumed"
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=60.0,
+        help="Seconds between checkpoints",
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between progress lines",
+    )
+    parser.add_argument(
+        "--output", help="Write line, hexagram and transition counts to this JSON file"
+    )
+    args = parser.parse_args(argv)
+
+    state = None
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        state = load_checkpoint(args.checkpoint)
+        seed = args.seed if args.seed is not None else state.config.seed
+        config = SimulationConfig(args.mode, args.hexagrams, seed, args.chunk_size)
+        if config != state.config:
+            print(
+                f"Checkpoint {args.checkpoint} is for {state.config}, not {config}",
+                file=sys.stderr,
+            )
+            return 2
+        print(
+            f"Resuming {args.checkpoint}: "
+            f"{state.hexagrams_done:,} hexagrams already counted"
+        )
+    else:
+        seed = args.seed if args.seed is not None else np.random.SeedSequence().entropy
+        config = SimulationConfig(args.mode, args.hexagrams, seed, args.chunk_size)
+    print(
+        f"Simulating {config.hexagrams:,} {config.mode} hexagrams "
+        f"with seed {config.seed}"
+    )
+
+    state = run_simulation(
+        config,
+        workers=args.workers,
+        checkpoint=args.checkpoint,
+        checkpoint_interval=args.checkpoint_interval,
+        progress_interval=args.progress_interval,
+        state=state,
+    )
+    progress = f"{state.hexagrams_done:,} hexagrams; rerun the same command to resume"
+    if state.worker_failures:
+        codes = ", ".join(str(code) for code in state.worker_failures)
+        print(f"Worker failed (exit code {codes}) after {progress}", file=sys.stderr)
+        return 1
+    if not state.finished:
+        print(f"Interrupted after {progress}")
+        return 130
+
+    summary = summarize(state.counts)
+    expected = outcome_probabilities(get_method(config.mode).line_distribution())
+    lines_total = config.hexagrams * LINES_PER_HEXAGRAM
+    line_expected = (
+        np.array(expected, dtype=float) @ _OUTCOME_LINE_VALUES / LINES_PER_HEXAGRAM
+    )
+    rate = config.hexagrams / max(state.elapsed, 1e-9)
+    print(f"Done in {state.elapsed:,.1f}s ({rate:,.0f} hexagrams/s)")
+    for value, probability in zip(LINE_VALUES, line_expected, strict=True):
+        observed = summary["lines"][str(value)] / lines_total
+        print(f"  line {value}: {observed:.6f} (exact {probability:.6f})")
+    if args.output:
+        summary.update(config=config._asdict(), outcomes=state.counts.tolist())
+        with open(args.output, "w") as f:
+            json.dump(summary, f)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Application factory with pre-fork warm-up.
+
+Under gunicorn with ``preload_app`` (see ``gunicorn.conf.py``) the master
+process calls ``create_app()`` once before forking. Everything that is
+read-only after startup is built there: the framework imports, the corpus,
+the hexagram lookup tables, the exact probability tables, the line sampler
+and the search index. Forked workers then share those pages copy-on-write
+instead of each building its own copy.
+
+``freeze_heap()`` moves every object alive at that point into the garbage
+collector's permanent generation, so collections in the workers never touch
+(and therefore never copy) the shared pages.
+
+Each phase is timed; the timings are reported by ``/health``.
+
+Usage:
+    gunicorn                                         # reads gunicorn.conf.py
+    uvicorn core.startup:create_app --factory        # single process
+"""
+
+import gc
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from core.log import setup_logging
+
+# Phase name -> duration in milliseconds, in the order the phases ran
+_timings: Dict[str, float] = {}
+
+
+@contextmanager
+def startup_phase(name: str) -> Iterator[None]:
+    """Times one startup phase.
+
+    Args:
+        name: Phase name reported in the timings
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _timings[name] = round((time.perf_counter() - start) * 1000, 3)
+
+
+def startup_timings() -> Dict[str, Any]:
+    """Returns the recorded phase durations and the process that recorded them."""
+    return {
+        "phases_ms": dict(_timings),
+        "total_ms": round(sum(_timings.values()), 3),
+        "pid": os.getpid(),
+        "frozen_objects": gc.get_freeze_count(),
+    }
+
+
+def preload() -> None:
+    """Builds every shared, read-only structure ahead of the first request."""
+    with startup_phase("import_framework"):
+        import fastapi  # noqa: F401
+        import pydantic  # noqa: F401
+        import starlette.responses  # noqa: F401
+
+    with startup_phase("import_app"):
+        import main  # noqa: F401
+
+    from core.corpus import get_corpus
+    from core.distribution import yarrow_line_sampler
+    from core.methods import available_methods
+    from core.probabilities import probability_tables
+    from core.search import get_search_index
+
+    with startup_phase("load_corpus"):
+        get_corpus().load()
+
+    with startup_phase("lookup_tables"):
+        # core.tables is built at import; the sampler derives the exact distribution
+        yarrow_line_sampler()
+        for method in available_methods():
+            method.line_distribution()
+
+    with startup_phase("probability_tables"):
+        for method in available_methods():
+            probability_tables(method.name)
+
+    with startup_phase("search_index"):
+        get_search_index()
+
+
+def freeze_heap() -> None:
+    """Collects garbage, then exempts every surviving object from future collections."""
+    with startup_phase("gc_freeze"):
+        gc.collect()
+        gc.freeze()
+
+
+def create_app():
+    """Returns the FastAPI app after preloading shared state.
+
+    Used by gunicorn as ``core.startup:create_app()``; it can also be passed
+    to ``uvicorn --factory``.
+
+    Returns:
+        The warmed-up application
+    """
+    # Installed before preloading so the master's records are JSON too; forked
+    # workers restart the listener thread through the at-fork hook
+    setup_logging()
+    preload()
+
+    from main import app
+
+    return app
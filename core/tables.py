@@ -0,0 +1,123 @@
+"""Precomputed lookup tables for hexagram arithmetic.
+
+A cast is described by two 6-bit masks, with bit ``i`` standing for line ``i``
+counted from the bottom (line 1 is bit 0):
+
+- the yang mask has a bit set for every yang line (7 or 9)
+- the changing mask has a bit set for every changing line (6 or 9)
+
+Every derived quantity (King Wen number, trigram pair, relating hexagram,
+changing-line indices) is then a single tuple index instead of a loop over the
+line values. The relating hexagram's yang mask is ``yang_mask ^ changing_mask``.
+"""
+
+from typing import List, Sequence, Tuple
+
+# --- Line Value Tables (indexed by line value 6-9) ---
+# Index positions 0-5 are unused padding so a line value can index directly.
+YANG_BIT = (0, 0, 0, 0, 0, 0, 0, 1, 0, 1)
+CHANGING_BIT = (0, 0, 0, 0, 0, 0, 1, 0, 0, 1)
+TRANSFORMED_LINE = (0, 0, 0, 0, 0, 0, 7, 7, 8, 8)
+
+# Line value for (yang bit, changing bit): index is ``yang | changing << 1``
+LINE_VALUE_BY_BITS = (8, 7, 6, 9)
+
+# --- Trigram Tables (indexed by trigram value 0-7, bottom line = bit 0) ---
+TRIGRAM_NAMES = (
+    "Earth",  # ☷ K'un     yin  yin  yin
+    "Thunder",  # ☳ Chen   yang yin  yin
+    "Water",  # ☵ K'an     yin  yang yin
+    "Lake",  # ☱ Tui       yang yang yin
+    "Mountain",  # ☶ Ken   yin  yin  yang
+    "Fire",  # ☲ Li        yang yin  yang
+    "Wind",  # ☴ Sun       yin  yang yang
+    "Heaven",  # ☰ Ch'ien  yang yang yang
+)
+
+# King Wen number by [upper trigram value][lower trigram value]
+KING_WEN_TABLE = (
+    (2, 24, 7, 19, 15, 36, 46, 11),  # Earth above
+    (16, 51, 40, 54, 62, 55, 32, 34),  # Thunder above
+    (8, 3, 29, 60, 39, 63, 48, 5),  # Water above
+    (45, 17, 47, 58, 31, 49, 28, 43),  # Lake above
+    (23, 27, 4, 41, 52, 22, 18, 26),  # Mountain above
+    (35, 21, 64, 38, 56, 30, 50, 14),  # Fire above
+    (20, 42, 59, 61, 53, 37, 57, 9),  # Wind above
+    (12, 25, 6, 10, 33, 13, 44, 1),  # Heaven above
+)
+
+# --- Hexagram Tables (indexed by 6-bit mask) ---
+HEXAGRAM_NUMBER_BY_MASK = tuple(
+    KING_WEN_TABLE[mask >> 3][mask & 7] for mask in range(64)
+)
+
+# Yang mask by King Wen number; index 0 is unused
+MASK_BY_HEXAGRAM_NUMBER = tuple(
+    [0] + sorted(range(64), key=lambda mask: HEXAGRAM_NUMBER_BY_MASK[mask])
+)
+
+# (lower, upper) trigram values by yang mask
+TRIGRAMS_BY_MASK = tuple((mask & 7, mask >> 3) for mask in range(64))
+
+# 0-based changing line indices by changing mask
+CHANGING_INDICES_BY_MASK = tuple(
+    tuple(i for i in range(6) if mask >> i & 1) for mask in range(64)
+)
+
+
+def line_masks(lines: Sequence[int]) -> Tuple[int, int]:
+    """Packs six line values into a yang mask and a changing mask.
+
+    Args:
+        lines: Sequence of 6 line values (6, 7, 8, or 9), from bottom to top
+
+    Returns:
+        Tuple of (yang_mask, changing_mask)
+    """
+    l0, l1, l2, l3, l4, l5 = lines
+    yang = (
+        YANG_BIT[l0]
+        | YANG_BIT[l1] << 1
+        | YANG_BIT[l2] << 2
+        | YANG_BIT[l3] << 3
+        | YANG_BIT[l4] << 4
+        | YANG_BIT[l5] << 5
+    )
+    changing = (
+        CHANGING_BIT[l0]
+        | CHANGING_BIT[l1] << 1
+        | CHANGING_BIT[l2] << 2
+        | CHANGING_BIT[l3] << 3
+        | CHANGING_BIT[l4] << 4
+        | CHANGING_BIT[l5] << 5
+    )
+    return yang, changing
+
+
+def lines_from_masks(yang_mask: int, changing_mask: int) -> List[int]:
+    """Unpacks a yang mask and a changing mask back into six line values.
+
+    Args:
+        yang_mask: 6-bit mask of yang lines
+        changing_mask: 6-bit mask of changing lines
+
+    Returns:
+        List of 6 line values (6, 7, 8, or 9), from bottom to top
+    """
+    return [
+        LINE_VALUE_BY_BITS[(yang_mask >> i & 1) | (changing_mask >> i & 1) << 1]
+        for i in range(6)
+    ]
+
+
+def relating_hexagram_number(yang_mask: int, changing_mask: int) -> int:
+    """Gets the King Wen number of the relating (transformed) hexagram.
+
+    Args:
+        yang_mask: 6-bit mask of yang lines
+        changing_mask: 6-bit mask of changing lines
+
+    Returns:
+        Hexagram number (1-64); equals the primary number when nothing changes
+    """
+    return HEXAGRAM_NUMBER_BY_MASK[yang_mask ^ changing_mask]
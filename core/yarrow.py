@@ -1,24 +1,69 @@
-"""
-Core implementation of the I Ching yarrow stalk divination method.
+"""Core implementation of the I Ching yarrow stalk divination method.
+
 This module provides a correct implementation of the traditional yarrow stalk
-algorithm with the verified probability distribution:
+algorithm, which approximates the traditional probability distribution:
 
 - Old Yin (6): 1/16 (6.25%)
 - Young Yang (7): 5/16 (31.25%)
 - Young Yin (8): 7/16 (43.75%)
 - Old Yang (9): 3/16 (18.75%)
+
+The exact distribution produced by this simulation is computed in
+``core.distribution``; the "yarrow_fast" mode samples lines from it directly.
 """
 
 import json
-import os
+import logging
 import random
-from typing import Any, Dict, List, Optional
+import sys
+import time
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from core.corpus import (
+    DEFAULT_JSON_PATH,
+    candidate_paths,
+    get_corpus,
+    missing_hexagram_numbers,
+    read_hexagram_file,
+)
+from core.distribution import yarrow_line_sampler
+from core.results import CastResult
+from core.tables import (
+    CHANGING_INDICES_BY_MASK,
+    HEXAGRAM_NUMBER_BY_MASK,
+    TRANSFORMED_LINE,
+    TRIGRAM_NAMES,
+    YANG_BIT,
+    line_masks,
+)
+
+logger = logging.getLogger(__name__)
 
 # --- Constants ---
 TOTAL_STALKS = 50
 ASIDE_STALK = 1
 WORKING_STALKS = TOTAL_STALKS - ASIDE_STALK  # 49
-DEFAULT_JSON_PATH = "../data/hexagrams.json"
+
+# Casting modes: full stalk simulation, or one draw per line from the exact
+# distribution of that simulation
+YARROW_MODE = "yarrow"
+YARROW_FAST_MODE = "yarrow_fast"
+
+
+class Division(NamedTuple):
+    """One division of the stalks, as recorded in a cast trace."""
+
+    line: int  # 1-6, bottom to top
+    stage: int  # 1-3
+    stalks_in: int
+    left_pile: int
+    right_pile: int  # after the finger stalk is taken from it
+    finger_stalk: int
+    remainder_left: int
+    remainder_right: int
+    remainder: int  # remainders plus the finger stalk
+    stage_value: int  # 2 or 3
+    stalks_out: int
 
 
 # --- Yarrow Stalk Casting Functions ---
@@ -31,12 +76,22 @@ def get_value_from_remainder(remainder_count: int) -> int:
     raise ValueError(f"Invalid remainder count encountered: {remainder_count}")
 
 
-def perform_division(stalks_in: int) -> tuple[int, int]:
-    """
-    Simulates one stage of dividing the yarrow stalks.
+def perform_division(
+    stalks_in: int,
+    rng: Optional[random.Random] = None,
+    trace: Optional[List[Division]] = None,
+    line: int = 0,
+    stage: int = 0,
+) -> tuple[int, int]:
+    """Simulates one stage of dividing the yarrow stalks.
 
     Args:
         stalks_in: Number of stalks available for division
+        rng: Random number generator to draw from; defaults to the shared
+            ``random`` module generator
+        trace: Optional list the division is appended to, with every count
+        line: Line number being cast (1-6), recorded in the trace
+        stage: Division stage within the line (1-3), recorded in the trace
 
     Returns:
         Tuple of (remainder, remaining_stalks)
@@ -48,60 +103,79 @@ def perform_division(stalks_in: int) -> tuple[int, int]:
     if stalks_in == 2:
         left_pile = 1
     else:
-        left_pile = random.randint(1, stalks_in - 1)
-
-    right_pile = stalks_in - left_pile
+        left_pile = (rng if rng is not None else random).randint(1, stalks_in - 1)
 
-    # Take one stalk between fingers
+    # Take one stalk between fingers from the right pile
     finger_stalk = 1
-    right_pile -= 1
+    right_pile = stalks_in - left_pile - finger_stalk
 
     if right_pile < 0:
         raise ValueError("Right pile count became invalid after taking finger stalk.")
 
-    # Count stalks in groups of 4 and find remainders
-    remainder_left = left_pile % 4
-    if remainder_left == 0:
-        remainder_left = 4
-    counted_left = left_pile - remainder_left
-
-    remainder_right = right_pile % 4
-    if remainder_right == 0:
-        remainder_right = 4
-    counted_right = right_pile - remainder_right
+    # Count stalks in groups of 4; a pile that divides evenly leaves 4
+    remainder_left = left_pile % 4 or 4
+    remainder_right = right_pile % 4 or 4
 
     # Calculate totals
     total_remainder_this_stage = remainder_left + remainder_right + finger_stalk
-    stalks_for_next_stage = counted_left + counted_right
-
+    stalks_for_next_stage = left_pile - remainder_left + right_pile - remainder_right
+
+    if trace is not None:
+        trace.append(
+            Division(
+                line=line,
+                stage=stage,
+                stalks_in=stalks_in,
+                left_pile=left_pile,
+                right_pile=right_pile,
+                finger_stalk=finger_stalk,
+                remainder_left=remainder_left,
+                remainder_right=remainder_right,
+                remainder=total_remainder_this_stage,
+                stage_value=get_value_from_remainder(total_remainder_this_stage),
+                stalks_out=stalks_for_next_stage,
+            )
+        )
     return total_remainder_this_stage, stalks_for_next_stage
 
 
-def generate_one_line(seed: Optional[int] = None) -> int:
-    """
-    Performs the three division stages to generate a single I Ching line value.
+def generate_one_line(
+    seed: Optional[int] = None,
+    rng: Optional[random.Random] = None,
+    trace: Optional[List[Division]] = None,
+    line: int = 0,
+) -> int:
+    """Performs the three division stages to generate a single I Ching line value.
 
     Args:
         seed: Optional random seed for reproducible results
+        rng: Optional random number generator to draw from
+        trace: Optional list the three divisions are appended to
+        line: Line number being cast (1-6), recorded in the trace
 
     Returns:
         Line value: 6 (Old Yin), 7 (Young Yang), 8 (Young Yin), or 9 (Old Yang)
     """
     if seed is not None:
-        random.seed(seed)
+        rng = random.Random(seed)
 
     current_stalks = WORKING_STALKS
     stage_values = []
 
     for stage in range(1, 4):
-        total_remainder, stalks_for_next_stage = perform_division(current_stalks)
+        total_remainder, stalks_for_next_stage = perform_division(
+            current_stalks, rng, trace, line, stage
+        )
         stage_value = get_value_from_remainder(total_remainder)
         stage_values.append(stage_value)
         current_stalks = stalks_for_next_stage
 
         # Check if we have enough stalks for the next stage
         if stage < 3 and stalks_for_next_stage <= 0 and current_stalks != 0:
-            raise ValueError(f"Ran out of stalks prematurely at stage {stage + 1} with {stalks_for_next_stage}")
+            raise ValueError(
+                f"Ran out of stalks prematurely at stage {stage + 1} "
+                f"with {stalks_for_next_stage}"
+            )
 
     # Convert the three stage values to line value
     final_line_value = sum(stage_values)
@@ -118,51 +192,146 @@ def generate_one_line(seed: Optional[int] = None) -> int:
     raise ValueError(f"Invalid line value: {final_line_value}")
 
 
-def generate_hexagram(seed: Optional[int] = None, verbose: bool = False) -> List[int]:
-    """
-    Generates a complete hexagram (6 lines) using the yarrow stalk method.
+def generate_one_line_fast(
+    seed: Optional[int] = None, rng: Optional[random.Random] = None
+) -> int:
+    """Generates a single line value with one draw from the exact yarrow distribution.
+
+    Statistically identical to ``generate_one_line`` but uses one random
+    number instead of simulating three divisions.
 
     Args:
         seed: Optional random seed for reproducible results
-        verbose: Whether to print details during casting
+        rng: Optional random number generator to draw from
 
     Returns:
-        List of 6 line values (6, 7, 8, or 9) from bottom to top
+        Line value: 6 (Old Yin), 7 (Young Yang), 8 (Young Yin), or 9 (Old Yang)
     """
     if seed is not None:
-        random.seed(seed)
+        rng = random.Random(seed)
+
+    return yarrow_line_sampler().sample(rng if rng is not None else random)
+
+
+class YarrowStalks:
+    """Yarrow stalk caster that owns its random number generator.
+
+    Seeding a caster never touches the global ``random`` module, so seeded
+    and unseeded casts can run side by side (for example in a thread pool)
+    without changing each other's results.
+    """
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        mode: str = YARROW_MODE,
+        rng: Optional[random.Random] = None,
+    ):
+        """Creates a caster.
+
+        Args:
+            seed: Optional random seed for reproducible results
+            mode: Name of a registered method ('yarrow', 'yarrow_fast',
+                'coins', see ``core.methods``)
+            rng: Optional generator to use instead of creating one from seed
+
+        Raises:
+            UnknownMethodError: If mode is not a registered method
+        """
+        # Imported here because the method registry is built on this module
+        from core.methods import get_method
+
+        self.seed = seed
+        self.mode = mode
+        self.method = get_method(mode)
+        self.rng = rng if rng is not None else random.Random(seed)
+
+    def perform_division(self, stalks_in: int) -> tuple[int, int]:
+        """Simulates one division stage with this caster's generator."""
+        return perform_division(stalks_in, self.rng)
+
+    def generate_single_line_value(self) -> int:
+        """Generates one line value.
+
+        Returns:
+            Line value: 6 (Old Yin), 7 (Young Yang), 8 (Young Yin), or 9 (Old Yang)
+        """
+        return self.method.generate_line(self.rng)
+
+    def generate_hexagram(self) -> List[int]:
+        """Generates a complete hexagram (6 lines).
+
+        Returns:
+            List of 6 line values (6, 7, 8, or 9) from bottom to top
+        """
+        return [self.generate_single_line_value() for _ in range(6)]
+
+    def trace_hexagram(self) -> Tuple[List[int], List[Division]]:
+        """Generates a complete hexagram, recording each of the 18 divisions.
+
+        Methods that do not divide stalks ('yarrow_fast', 'coins') record no
+        divisions. Lines match ``generate_hexagram`` for the same seed.
+
+        Returns:
+            Tuple of (6 line values from bottom to top, divisions in order)
+        """
+        if self.mode != YARROW_MODE:
+            return self.generate_hexagram(), []
+
+        divisions: List[Division] = []
+        lines = [
+            generate_one_line(rng=self.rng, trace=divisions, line=line)
+            for line in range(1, 7)
+        ]
+        return lines, divisions
+
+
+def generate_hexagram(
+    seed: Optional[int] = None,
+    mode: str = YARROW_MODE,
+    rng: Optional[random.Random] = None,
+) -> List[int]:
+    """Generates a complete hexagram (6 lines) using the yarrow stalk method.
+
+    Args:
+        seed: Optional random seed for reproducible results
+        mode: Name of a registered method ('yarrow', 'yarrow_fast', 'coins')
+        rng: Optional random number generator to draw from; takes precedence
+            over seed
 
-    hexagram_lines = []
+    Returns:
+        List of 6 line values (6, 7, 8, or 9) from bottom to top
+    """
+    if rng is None and seed is None:
+        # Unseeded casts draw from the shared module generator without reseeding it
+        rng = random
 
-    if verbose:
-        print("Casting Hexagram with Yarrow Stalk Method...")
+    return YarrowStalks(seed=seed, mode=mode, rng=rng).generate_hexagram()
 
-    for line_number in range(1, 7):
-        line_value = generate_one_line()
-        hexagram_lines.append(line_value)
 
-        if verbose:
-            if line_value == 6:
-                line_type = "---X--- (Old Yin)"
-            elif line_value == 7:
-                line_type = "------- (Young Yang)"
-            elif line_value == 8:
-                line_type = "--- --- (Young Yin)"
-            elif line_value == 9:
-                line_type = "---O--- (Old Yang)"
-            print(f"Line {line_number}: {line_value} {line_type}")
+def trace_to_dict(mode: str, divisions: List[Division]) -> Dict[str, Any]:
+    """Renders divisions compactly: field names once, then one row per division.
 
-    if verbose:
-        print("\nCast Complete.")
+    Args:
+        mode: Casting method the trace came from
+        divisions: Divisions in casting order
 
-    return hexagram_lines
+    Returns:
+        Dictionary with the mode, the division field names and the rows
+    """
+    return {
+        "mode": mode,
+        "fields": list(Division._fields),
+        "divisions": [list(division) for division in divisions],
+    }
 
 
 # --- Hexagram Calculation Functions ---
 def get_trigram_value(lines: List[int]) -> int:
-    """
-    Converts three lines into a trigram value (0-7).
-    Follows the traditional binary convention: Yang=1, Yin=0.
+    """Converts three lines into a trigram value (0-7).
+
+    Follows the traditional binary convention: Yang=1, Yin=0, with the
+    bottom line as the lowest bit.
 
     Args:
         lines: List of 3 line values (6, 7, 8, or 9)
@@ -170,17 +339,12 @@ def get_trigram_value(lines: List[int]) -> int:
     Returns:
         Integer value of the trigram (0-7)
     """
-    value = 0
-    for i, line in enumerate(lines):
-        # Yang lines (7, 9) are represented as 1
-        if line == 7 or line == 9:
-            value |= 1 << i
-    return value
+    l0, l1, l2 = lines
+    return YANG_BIT[l0] | YANG_BIT[l1] << 1 | YANG_BIT[l2] << 2
 
 
 def get_trigram_name(value: int) -> str:
-    """
-    Get the traditional name of a trigram based on its value.
+    """Get the traditional name of a trigram based on its value.
 
     Args:
         value: Integer value of the trigram (0-7)
@@ -188,22 +352,13 @@ def get_trigram_name(value: int) -> str:
     Returns:
         Name of the trigram
     """
-    trigram_names = {
-        0: "Earth",  # ☷ K'un
-        1: "Mountain",  # ☶ Ken
-        2: "Water",  # ☵ K'an
-        3: "Wind",  # ☴ Sun
-        4: "Thunder",  # ☳ Chen
-        5: "Fire",  # ☲ Li
-        6: "Lake",  # ☱ Tui
-        7: "Heaven",  # ☰ Ch'ien
-    }
-    return trigram_names.get(value, "Unknown")
+    if 0 <= value < 8:
+        return TRIGRAM_NAMES[value]
+    return "Unknown"
 
 
 def get_hexagram_number(lines: List[int]) -> int:
-    """
-    Converts a list of 6 lines into the traditional King Wen hexagram number (1-64).
+    """Converts a list of 6 lines into the traditional King Wen hexagram number (1-64).
 
     Args:
         lines: List of 6 line values (6, 7, 8, or 9), from bottom to top
@@ -211,101 +366,12 @@ def get_hexagram_number(lines: List[int]) -> int:
     Returns:
         Hexagram number according to the King Wen sequence (1-64)
     """
-    # Split into lower and upper trigrams
-    lower_trigram = lines[:3]
-    upper_trigram = lines[3:]
-
-    # Get trigram values
-    lower_value = get_trigram_value(lower_trigram)
-    upper_value = get_trigram_value(upper_trigram)
-
-    # Calculate hexagram number according to the King Wen sequence
-    # The keys are formatted as "{upper_value}_{lower_value}"
-    king_wen_map = {
-        "7_7": 1,  # Heaven over Heaven (Ch'ien)
-        "0_0": 2,  # Earth over Earth (K'un)
-        "7_2": 3,  # Heaven over Water (Difficulty)
-        "2_7": 4,  # Water over Heaven (Youthful Folly)
-        "7_3": 5,  # Heaven over Wind/Wood (Waiting)
-        "3_7": 6,  # Wind/Wood over Heaven (Conflict)
-        "0_2": 7,  # Earth over Water (Army)
-        "2_0": 8,  # Water over Earth (Holding Together)
-        "3_7": 9,  # Wind over Heaven (Small Taming)
-        "7_3": 10,  # Heaven over Wind/Wood (Treading)
-        "0_7": 11,  # Earth over Heaven (Peace)
-        "7_0": 12,  # Heaven over Earth (Standstill)
-        "7_5": 13,  # Heaven over Fire (Fellowship)
-        "5_7": 14,  # Fire over Heaven (Great Possession)
-        "0_1": 15,  # Earth over Mountain (Modesty)
-        "1_0": 16,  # Mountain over Earth (Enthusiasm)
-        "3_6": 17,  # Wind/Wood over Lake (Following)
-        "6_3": 18,  # Lake over Wind/Wood (Work on the Decayed)
-        "0_5": 19,  # Earth over Fire (Approach)
-        "5_0": 20,  # Fire over Earth (Contemplation)
-        "5_6": 21,  # Fire over Lake (Biting Through)
-        "6_5": 22,  # Lake over Fire (Grace)
-        "1_0": 23,  # Mountain over Earth (Splitting Apart)
-        "0_1": 24,  # Earth over Mountain (Return)
-        "7_6": 25,  # Heaven over Lake (Innocence)
-        "6_7": 26,  # Lake over Heaven (Great Taming)
-        "1_0": 27,  # Mountain over Earth (Mouth Corners)
-        "3_3": 28,  # Wind/Wood over Wind/Wood (Great Excess)
-        "2_2": 29,  # Water over Water (The Abysmal)
-        "5_5": 30,  # Fire over Fire (The Clinging)
-        "6_1": 31,  # Lake over Mountain (Influence)
-        "1_6": 32,  # Mountain over Lake (Duration)
-        "7_1": 33,  # Heaven over Mountain (Retreat)
-        "1_7": 34,  # Mountain over Heaven (Great Power)
-        "5_0": 35,  # Fire over Earth (Progress)
-        "0_5": 36,  # Earth over Fire (Darkening of the Light)
-        "3_5": 37,  # Wind/Wood over Fire (The Family)
-        "5_3": 38,  # Fire over Wind/Wood (Opposition)
-        "2_1": 39,  # Water over Mountain (Obstruction)
-        "1_2": 40,  # Mountain over Water (Deliverance)
-        "6_1": 41,  # Lake over Mountain (Decrease)
-        "1_6": 42,  # Mountain over Lake (Increase)
-        "6_7": 43,  # Lake over Heaven (Breakthrough)
-        "7_6": 44,  # Heaven over Lake (Coming to Meet)
-        "0_6": 45,  # Earth over Lake (Gathering Together)
-        "6_0": 46,  # Lake over Earth (Pushing Upward)
-        "2_6": 47,  # Water over Lake (Oppression)
-        "6_2": 48,  # Lake over Water (The Well)
-        "6_5": 49,  # Lake over Fire (Revolution)
-        "5_6": 50,  # Fire over Lake (The Cauldron)
-        "1_4": 51,  # Mountain over Thunder (The Arousing)
-        "4_1": 52,  # Thunder over Mountain (Keeping Still)
-        "3_1": 53,  # Wind/Wood over Mountain (Development)
-        "1_3": 54,  # Mountain over Wind/Wood (The Marrying Maiden)
-        "4_5": 55,  # Thunder over Fire (Abundance)
-        "5_4": 56,  # Fire over Thunder (The Wanderer)
-        "3_3": 57,  # Wind/Wood over Wind/Wood (The Gentle)
-        "6_6": 58,  # Lake over Lake (The Joyous)
-        "3_2": 59,  # Wind/Wood over Water (Dispersion)
-        "2_3": 60,  # Water over Wind/Wood (Limitation)
-        "3_6": 61,  # Wind/Wood over Lake (Inner Truth)
-        "1_4": 62,  # Mountain over Thunder (Small Excess)
-        "2_5": 63,  # Water over Fire (After Completion)
-        "5_2": 64,  # Fire over Water (Before Completion)
-    }
-
-    # Lookup the hexagram number
-    key = f"{upper_value}_{lower_value}"
-
-    # If not found in the map, calculate it based on binary position
-    if key not in king_wen_map:
-        # Fallback calculation method (less traditional)
-        binary_value = 0
-        for i, line in enumerate(lines):
-            if line == 7 or line == 9:  # Yang lines
-                binary_value |= 1 << i
-        return binary_value + 1
-
-    return king_wen_map[key]
+    yang_mask, _ = line_masks(lines)
+    return HEXAGRAM_NUMBER_BY_MASK[yang_mask]
 
 
 def get_transformed_lines(lines: List[int]) -> List[int]:
-    """
-    Transforms lines with changing values (6 or 9) into their stable opposites.
+    """Transforms lines with changing values (6 or 9) into their stable opposites.
 
     Args:
         lines: List of line values (6, 7, 8, 9)
@@ -313,20 +379,11 @@ def get_transformed_lines(lines: List[int]) -> List[int]:
     Returns:
         List of transformed line values
     """
-    transformed = []
-    for line in lines:
-        if line == 6:  # Old Yin becomes Young Yang
-            transformed.append(7)
-        elif line == 9:  # Old Yang becomes Young Yin
-            transformed.append(8)
-        else:  # Stable lines remain unchanged
-            transformed.append(line)
-    return transformed
+    return [TRANSFORMED_LINE[line] for line in lines]
 
 
 def get_changing_line_indices(lines: List[int]) -> List[int]:
-    """
-    Gets the indices of changing lines (6 or 9).
+    """Gets the indices of changing lines (6 or 9).
 
     Args:
         lines: List of line values (6, 7, 8, 9)
@@ -334,13 +391,16 @@ def get_changing_line_indices(lines: List[int]) -> List[int]:
     Returns:
         List of indices (0-based) for changing lines
     """
-    return [i for i, line in enumerate(lines) if line == 6 or line == 9]
+    _, changing_mask = line_masks(lines)
+    return list(CHANGING_INDICES_BY_MASK[changing_mask])
 
 
 # --- JSON Loading and Reading Functions ---
 def load_hexagram_data(filepath: str = DEFAULT_JSON_PATH) -> Dict[int, Dict[str, Any]]:
-    """
-    Loads hexagram data from a JSON file into a dictionary keyed by number.
+    """Loads hexagram data from a JSON file into a dictionary keyed by number.
+
+    This always re-reads the file; readings use the shared store returned by
+    ``core.corpus.get_corpus()`` instead.
 
     Args:
         filepath: Path to the JSON file containing hexagram data
@@ -349,43 +409,39 @@ def load_hexagram_data(filepath: str = DEFAULT_JSON_PATH) -> Dict[int, Dict[str,
         Dictionary of hexagram data indexed by hexagram number
     """
     # Try to find the JSON file in a few possible locations
-    paths_to_try = [
-        filepath,
-        os.path.join(os.path.dirname(__file__), filepath),
-        os.path.join(os.path.dirname(os.path.dirname(__file__)), filepath),
-    ]
+    paths_to_try = candidate_paths(filepath)
 
     for path in paths_to_try:
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-                # Convert list of hexagrams into a dict keyed by 'number'
-                hex_dict = {item["number"]: item for item in data}
-
-                # Validation: Ensure we have all 64 hexagrams
-                missing_numbers = set(range(1, 65)) - set(hex_dict.keys())
-                if missing_numbers:
-                    print(f"Warning: Missing hexagrams {sorted(missing_numbers)} in data")
-
-                print(f"Successfully loaded data for {len(hex_dict)} hexagrams from {path}")
-                return hex_dict
-
+            hex_dict = read_hexagram_file(path)
         except (FileNotFoundError, json.JSONDecodeError, KeyError):
             continue
 
-    print(f"Error: Could not load hexagram data from any tried paths: {paths_to_try}")
+        # Validation: Ensure we have all 64 hexagrams
+        missing_numbers = missing_hexagram_numbers(hex_dict)
+        if missing_numbers:
+            logger.warning("Missing hexagrams %s in %s", missing_numbers, path)
+
+        logger.debug("Loaded data for %d hexagrams from %s", len(hex_dict), path)
+        return hex_dict
+
+    logger.error("Could not load hexagram data from any tried paths: %s", paths_to_try)
     return {}
 
 
-def print_reading(lines: List[int], hexagram_data: Dict[int, Dict[str, Any]]) -> None:
-    """
-    Prints a complete I Ching reading in a human-readable format.
+def print_reading(
+    lines: List[int], hexagram_data: Optional[Mapping[int, Dict[str, Any]]] = None
+) -> None:
+    """Prints a complete I Ching reading in a human-readable format.
 
     Args:
         lines: List of 6 line values (6, 7, 8, 9)
-        hexagram_data: Dictionary of hexagram data indexed by hexagram number
+        hexagram_data: Hexagram data indexed by hexagram number; defaults to
+            the shared corpus
     """
+    if hexagram_data is None:
+        hexagram_data = get_corpus().data
+
     if not hexagram_data:
         print("Error: Hexagram data not loaded")
         return
@@ -462,7 +518,10 @@ def print_reading(lines: List[int], hexagram_data: Dict[int, Dict[str, Any]]) ->
 
         if transformed_hexagram:
             print("\n" + "-" * 60)
-            print(f"TRANSFORMED INTO HEXAGRAM {transformed_hex_num}: {transformed_hexagram['name']}")
+            print(
+                f"TRANSFORMED INTO HEXAGRAM {transformed_hex_num}: "
+                f"{transformed_hexagram['name']}"
+            )
             if "chineseName" in transformed_hexagram:
                 print(f"Chinese: {transformed_hexagram['chineseName']}")
             print("-" * 60)
@@ -479,88 +538,126 @@ def print_reading(lines: List[int], hexagram_data: Dict[int, Dict[str, Any]]) ->
 
 
 # --- Main Functions ---
-def cast_hexagram(seed: Optional[int] = None, verbose: bool = False) -> Dict[str, Any]:
+def build_cast_result(lines: List[int]) -> Dict[str, Any]:
+    """Describes six cast lines: hexagram numbers, trigrams and changing lines.
+
+    Args:
+        lines: List of 6 line values (6, 7, 8, or 9), from bottom to top
+
+    Returns:
+        Dictionary containing the cast results
     """
-    Performs a complete I Ching reading using the yarrow stalk method.
+    # Every field is a table read keyed by the two line masks
+    return CastResult.from_lines(lines).to_dict()
+
+
+def cast_compact(
+    seed: Optional[int] = None,
+    mode: str = YARROW_MODE,
+    rng: Optional[random.Random] = None,
+) -> CastResult:
+    """Casts a hexagram and returns it in compact form.
 
     Args:
         seed: Optional random seed for reproducible results
-        verbose: Whether to print details during the process
+        mode: Name of a registered method ('yarrow', 'yarrow_fast', 'coins')
+        rng: Optional random number generator to draw from
 
     Returns:
-        Dictionary containing the cast results
+        CastResult holding the cast as two 6-bit masks
     """
-    # Cast the hexagram
-    lines = generate_hexagram(seed=seed, verbose=verbose)
+    return CastResult.from_lines(generate_hexagram(seed=seed, mode=mode, rng=rng))
 
-    # Get basic information
-    changing_indices = get_changing_line_indices(lines)
-    primary_hex_num = get_hexagram_number(lines)
 
-    # Get trigram information
-    lower_trigram = lines[:3]
-    upper_trigram = lines[3:]
-    lower_value = get_trigram_value(lower_trigram)
-    upper_value = get_trigram_value(upper_trigram)
+def cast_hexagram(
+    seed: Optional[int] = None,
+    verbose: bool = False,
+    mode: str = YARROW_MODE,
+    rng: Optional[random.Random] = None,
+) -> Dict[str, Any]:
+    """Performs a complete I Ching reading using the yarrow stalk method.
 
-    # Build result dictionary
-    result = {
-        "lines": lines,
-        "changing_line_indices": changing_indices,
-        "primary_hexagram_number": primary_hex_num,
-        "trigrams": {
-            "lower": {"value": lower_value, "name": get_trigram_name(lower_value)},
-            "upper": {"value": upper_value, "name": get_trigram_name(upper_value)},
-        },
-    }
+    Args:
+        seed: Optional random seed for reproducible results
+        verbose: Whether to record every division in a "trace" entry
+        mode: Name of a registered method ('yarrow', 'yarrow_fast', 'coins')
+        rng: Optional random number generator to draw from
 
-    # Add transformed hexagram if there are changing lines
-    if changing_indices:
-        transformed_lines = get_transformed_lines(lines)
-        transformed_hex_num = get_hexagram_number(transformed_lines)
-        result["transformed_hexagram_number"] = transformed_hex_num
-        result["transformed_lines"] = transformed_lines
+    Returns:
+        Dictionary containing the cast results
+    """
+    if not verbose:
+        return build_cast_result(generate_hexagram(seed=seed, mode=mode, rng=rng))
 
-    return result
+    if rng is None and seed is None:
+        rng = random
+    lines, divisions = YarrowStalks(seed=seed, mode=mode, rng=rng).trace_hexagram()
+    cast_result = build_cast_result(lines)
+    cast_result["trace"] = trace_to_dict(mode, divisions)
+    return cast_result
 
 
 def get_reading(
-    mode: str = "yarrow", seed: Optional[int] = None, verbose: bool = False, print_result: bool = False
+    mode: str = YARROW_MODE,
+    seed: Optional[int] = None,
+    verbose: bool = False,
+    print_result: bool = False,
 ) -> Dict[str, Any]:
-    """
-    Generates a complete I Ching reading.
+    """Generates a complete I Ching reading.
 
     Args:
-        mode: The divination method ('yarrow' only for now)
+        mode: The divination method ('yarrow', 'yarrow_fast' or 'coins')
         seed: Optional random seed for reproducible results
-        verbose: Whether to print details during the process
+        verbose: Whether to record every division in the cast result's "trace"
         print_result: Whether to print the complete reading
 
     Returns:
-        Dictionary containing the complete reading
+        Dictionary containing the complete reading and, under "timings", the
+        seconds spent reading the corpus, casting and assembling the result
     """
-    # Load hexagram data
-    hexagram_data = load_hexagram_data()
+    # Hexagram data is loaded once per process and shared between readings
+    started = time.perf_counter()
+    hexagram_data = get_corpus().data
     if not hexagram_data:
         return {"error": "Failed to load hexagram data"}
+    corpus_done = time.perf_counter()
 
     # Cast hexagram
-    cast_result = cast_hexagram(seed=seed, verbose=verbose)
+    cast_result = cast_hexagram(seed=seed, verbose=verbose, mode=mode)
+    cast_done = time.perf_counter()
 
     # If requested, print the complete reading
     if print_result:
         print_reading(cast_result["lines"], hexagram_data)
 
     # Return cast result and hexagram data
-    result = {"cast_result": cast_result, "primary_hexagram": hexagram_data.get(cast_result["primary_hexagram_number"])}
+    result = {
+        "cast_result": cast_result,
+        "primary_hexagram": hexagram_data.get(cast_result["primary_hexagram_number"]),
+    }
 
     # Add transformed hexagram if there are changing lines
     if "transformed_hexagram_number" in cast_result:
-        result["transformed_hexagram"] = hexagram_data.get(cast_result["transformed_hexagram_number"])
-
+        result["transformed_hexagram"] = hexagram_data.get(
+            cast_result["transformed_hexagram_number"]
+        )
+
+    # Reported by the caller (metrics, Server-Timing); no instrumentation here
+    result["timings"] = {
+        "corpus": corpus_done - started,
+        "cast": cast_done - corpus_done,
+        "assemble": time.perf_counter() - cast_done,
+    }
     return result
 
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["simulate"]:
+        # Imported here: the simulation runner builds on the method registry, which
+        # imports this module
+        from core.simulate import main
+
+        sys.exit(main(sys.argv[2:]))
+
     # Basic test - cast a hexagram and print the reading
     get_reading(verbose=True, print_result=True)
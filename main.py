@@ -1,25 +1,107 @@
 """FastAPI implementation for I Ching divination."""
-import os
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Annotated, List, Optional, Union
+
+from fastapi import FastAPI, HTTPException, Path, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from core.yarrow import get_reading
-from models.schemas import ReadingRequest, ReadingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
+from pydantic import ValidationError
+
+from core.cache import get_cast_cache
+from core.corpus import encode_json, get_corpus
+from core.executor import ExecutorSaturatedError, get_executor, shutdown_executor
+from core.history import close_history_store, get_history_store
+from core.log import (
+    RequestLogMiddleware,
+    annotate_request,
+    get_logging_pipeline,
+    setup_logging,
+)
+from core.methods import UnknownMethodError, available_methods, get_method
+from core.metrics import (
+    CASTS_TOTAL,
+    CONTENT_TYPE,
+    PRIMARY_HEXAGRAMS_TOTAL,
+    READING_STAGE_SECONDS,
+    REGISTRY,
+    MetricsMiddleware,
+)
+from core.probabilities import probability_tables
+from core.profiling import ProfilingMiddleware, record_stage
+from core.search import get_search_index
+from core.startup import startup_timings
+from core.yarrow import build_cast_result, get_reading
+from core.yarrow import cast_hexagram as cast_lines
+from models.schemas import (
+    HEXAGRAM_FIELDS,
+    BatchCastRequest,
+    LeanReadingResponse,
+    ReadingRequest,
+    ReadingResponse,
+    SearchField,
+    TracedReadingResponse,
+)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fields of a corpus entry included at the "summary" detail level
+SUMMARY_FIELDS = ("number", "name", "chineseName", "judgment")
+
+# Number of NDJSON lines buffered before each write of a streamed batch
+BATCH_FLUSH_SIZE = 256
+
+# Batches at least this large are cast in the process pool, in larger chunks
+PROCESS_BATCH_THRESHOLD = int(os.getenv("CAST_PROCESS_BATCH_THRESHOLD", "5000"))
+PROCESS_CHUNK_SIZE = 4096
+
+# Responses at least this large are gzip-compressed for clients that accept it
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "6"))
+
+# Browser and CDN lifetime of hexagram text; ETags cover revalidation after edits
+HEXAGRAM_CACHE_MAX_AGE = int(os.getenv("HEXAGRAM_CACHE_MAX_AGE", "86400"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load shared state once at startup instead of on the request path."""
+    # Records are queued and written as JSON by a background thread
+    setup_logging()
+    logger.info("Allowed CORS origins: %s", allowed_origins)
+    corpus = get_corpus()
+    corpus.load()
+    logger.info(
+        "Loaded %d hexagrams in %s ms", len(corpus.data), corpus.stats()["load_time_ms"]
+    )
+    # Exact probability tables are derived once so /stats requests are table reads
+    for method in available_methods():
+        probability_tables(method.name)
+    get_search_index()
+    get_executor()
+    # Opened per worker, after any fork, so each process has its own writer thread
+    get_history_store()
+    yield
+    shutdown_executor(wait=False)
+    close_history_store()
+
+
 app = FastAPI(
-    title="I Ching API", 
-    description="API for I Ching divination using the yarrow stalk method", 
-    version="0.1.0"
+    title="I Ching API",
+    description="API for I Ching divination using the yarrow stalk method",
+    version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
 # Get allowed origins from environment variable or use default for development
 allowed_origins = os.getenv("CORS_ORIGINS", "http://localhost:5173").split(",")
-logger.info(f"Allowed CORS origins: {allowed_origins}")
 
 # Add CORS middleware to allow cross-origin requests
 app.add_middleware(
@@ -30,6 +112,80 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Full readings are several KB of text, so large bodies are compressed
+app.add_middleware(
+    GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL
+)
+
+# Server-Timing on every response; cProfile on request when PROFILING_ENABLED is set
+app.add_middleware(ProfilingMiddleware)
+
+# One JSON access record per request; successes sampled per route, errors always logged
+app.add_middleware(RequestLogMiddleware)
+
+# Added last so it is outermost and times compression too
+app.add_middleware(MetricsMiddleware)
+
+
+# Queue and cache state is read when /metrics is scraped, never on the request path
+def cache_samples():
+    """Cast cache counters as metric samples."""
+    stats = get_cast_cache().stats()
+    return [(("hit",), stats["hits"]), (("miss",), stats["misses"])]
+
+
+def executor_samples():
+    """Executor occupancy as metric samples."""
+    stats = get_executor().stats()
+    return [
+        (("in_flight",), stats["in_flight"]),
+        (("running",), stats["running"]),
+        (("queue_depth",), stats["queue_depth"]),
+    ]
+
+
+def history_samples():
+    """History writer counters as metric samples."""
+    history = get_history_store()
+    if history is None:
+        return []
+    stats = history.stats()
+    return [(("written",), stats["written"]), (("dropped",), stats["dropped"])]
+
+
+REGISTRY.callback(
+    "iching_cast_cache_lookups_total",
+    "Seeded cast cache lookups",
+    cache_samples,
+    ["result"],
+    "counter",
+)
+REGISTRY.callback(
+    "iching_cast_cache_entries",
+    "Seeded cast cache size",
+    lambda: [((), len(get_cast_cache()))],
+)
+REGISTRY.callback(
+    "iching_executor_jobs",
+    "Cast executor jobs in flight and admission limit",
+    executor_samples,
+    ["state"],
+)
+REGISTRY.callback(
+    "iching_executor_rejected_total",
+    "Jobs rejected by a saturated executor",
+    lambda: [((), get_executor().stats()["rejected"])],
+    type_name="counter",
+)
+REGISTRY.callback(
+    "iching_history_readings_total",
+    "Readings written to or dropped by the history store",
+    history_samples,
+    ["result"],
+    "counter",
+)
+
+
 @app.get("/")
 async def root():
     """Root endpoint returning API information."""
@@ -39,89 +195,610 @@ async def root():
         "description": "I Ching divination using the yarrow stalk method",
         "endpoints": {
             "health": "/health",
-            "cast": "/cast"
-        }
+            "cast": "/cast",
+            "cast_batch": "/cast/batch",
+            "hexagrams": "/hexagrams",
+            "search": "/search",
+            "history": "/history",
+            "metrics": "/metrics",
+            "stats": "/stats/{mode}",
+        },
     }
 
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring."""
-    return {"status": "healthy", "service": "I Ching API"}
+    executor_stats = get_executor().stats()
+    history = get_history_store()
+    logging_pipeline = get_logging_pipeline()
+    if executor_stats["saturated"]:
+        logger.warning(
+            "Cast executor saturated: %d requests in flight",
+            executor_stats["in_flight"],
+        )
+    return {
+        "status": "healthy",
+        "service": "I Ching API",
+        "corpus": get_corpus().stats(),
+        "executor": executor_stats,
+        "cache": get_cast_cache().stats(),
+        "startup": startup_timings(),
+        "logging": logging_pipeline.stats() if logging_pipeline is not None else None,
+        "history": history.stats() if history is not None else None,
+    }
+
 
-@app.post("/cast", response_model=ReadingResponse)
+@app.post(
+    "/cast",
+    response_model=Union[ReadingResponse, TracedReadingResponse, LeanReadingResponse],
+)
 async def cast_hexagram(request: ReadingRequest):
     """Generate an I Ching reading using the specified method."""
     try:
-        logger.info(f"Casting hexagram with mode: {request.mode}, seed: {request.seed}")
-        
-        result = get_reading(
-            mode=request.mode, 
-            seed=request.seed, 
-            verbose=request.verbose, 
-            print_result=False
-        )
-        
+        annotate_request(mode=request.mode, seed=request.seed)
+
+        # Seeded casts are deterministic, so their rendered bodies are cached
+        # with their lines; the corpus reload count keeps stale text from being served
+        fields = projected_fields(request)
+        cache_key = None
+        if request.seed is not None:
+            cache_key = (
+                request.mode,
+                request.seed,
+                request.detail,
+                fields,
+                request.verbose,
+                get_corpus().reload_count,
+            )
+            cached = get_cast_cache().get(cache_key)
+            if cached is not None:
+                body, lines = cached
+                record_history(request, lines)
+                return Response(content=body, media_type="application/json")
+
+        # Casting is CPU-bound, so it runs in the executor's thread pool
+        executor = get_executor()
+        release = executor.admit()
+        try:
+            result = await executor.run(
+                get_reading,
+                mode=request.mode,
+                seed=request.seed,
+                verbose=request.verbose,
+                print_result=False,
+            )
+        finally:
+            release()
+
         if "error" in result:
-            logger.error(f"Error in get_reading: {result['error']}")
+            logger.error("Error in get_reading: %s", result["error"])
             raise HTTPException(status_code=500, detail=result["error"])
-        
-        # Format response according to API schema
-        response = {
-            "hexagram_number": result["cast_result"]["primary_hexagram_number"],
-            "changing_lines": [i + 1 for i in result["cast_result"]["changing_line_indices"]],
-            "lines": [str(line) for line in result["cast_result"]["lines"]],
-            "reading": result["primary_hexagram"],
-            "relating_hexagram": result.get("transformed_hexagram"),
-        }
-        
-        logger.info(f"Successfully generated reading for hexagram {response['hexagram_number']}")
-        return response
-        
+
+        record_reading(request.mode, result)
+
+        # Corpus entries are spliced in as pre-serialized bytes, skipping
+        # response-model validation and re-encoding of the static text
+        cast_result = result["cast_result"]
+        started = time.perf_counter()
+        body = render_reading(cast_result, request.detail, fields)
+        serialized = time.perf_counter() - started
+        READING_STAGE_SECONDS.observe(serialized, "serialize")
+        record_stage("serialize", serialized)
+        if cache_key is not None:
+            get_cast_cache().put(cache_key, (body, tuple(cast_result["lines"])))
+
+        record_history(request, cast_result["lines"])
+        annotate_request(hexagram=cast_result["primary_hexagram_number"])
+        return Response(content=body, media_type="application/json")
+
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
+    except ExecutorSaturatedError as e:
+        logger.warning("%s", e)
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, retry shortly",
+            headers={"Retry-After": "1"},
+        ) from e
     except Exception as e:
-        logger.error(f"Unexpected error in cast_hexagram: {str(e)}")
+        logger.exception("Unexpected error in cast_hexagram: %s", e)
+        raise HTTPException(
+            status_code=500, detail=f"Internal server error: {str(e)}"
+        ) from e
+
+
+def splice_json(head, fragments):
+    """Append pre-serialized (key, JSON bytes) pairs to a JSON object; None is null."""
+    parts = [encode_json(head)[:-1]]
+    for key, fragment in fragments:
+        parts.append(b',"' + key.encode("utf-8") + b'":')
+        parts.append(fragment if fragment is not None else b"null")
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+def record_reading(mode, result):
+    """Record a reading's stage timings in metrics and Server-Timing, and count it."""
+    for stage, seconds in result["timings"].items():
+        READING_STAGE_SECONDS.observe(seconds, stage)
+        record_stage(stage, seconds)
+    CASTS_TOTAL.inc(mode)
+    PRIMARY_HEXAGRAMS_TOTAL.inc(
+        mode, str(result["cast_result"]["primary_hexagram_number"])
+    )
+
+
+def record_history(request, lines):
+    """Queue a reading for the history store; drops it rather than wait when full."""
+    history = get_history_store()
+    if history is not None:
+        history.record(request.user_id, request.mode, request.seed, lines)
+
+
+def projected_fields(request):
+    """Corpus fields to include, in corpus order; None keeps whole entries."""
+    if request.detail == "full" and request.fields is None and not request.exclude:
+        return None
+    selected = (
+        request.fields
+        if request.fields is not None
+        else (SUMMARY_FIELDS if request.detail == "summary" else HEXAGRAM_FIELDS)
+    )
+    return tuple(
+        field
+        for field in HEXAGRAM_FIELDS
+        if field in selected and field not in request.exclude
+    )
+
+
+def render_reading(cast_result, detail="full", fields=None):
+    """Render a /cast response body, byte-identical to serializing ReadingResponse."""
+    corpus = get_corpus()
+    primary_number = cast_result["primary_hexagram_number"]
+    primary = corpus.fragment(primary_number, fields)
+    if primary is None:
+        raise ValueError(f"Primary hexagram number {primary_number} not found in data")
+    relating_number = cast_result.get("transformed_hexagram_number")
+
+    head = {
+        "hexagram_number": primary_number,
+        "changing_lines": [i + 1 for i in cast_result["changing_line_indices"]],
+        "lines": [str(line) for line in cast_result["lines"]],
+    }
+    trace = cast_result.get("trace")
+    if detail != "full":
+        # Lean levels name the relating hexagram so clients need no text to follow it
+        head["relating_hexagram_number"] = relating_number
+        if detail == "numbers":
+            if trace is not None:
+                head["trace"] = trace
+            return encode_json(head)
+    fragments = [
+        ("reading", primary),
+        (
+            "relating_hexagram",
+            corpus.fragment(relating_number, fields) if relating_number else None,
+        ),
+    ]
+    if trace is not None:
+        fragments.append(("trace", encode_json(trace)))
+    return splice_json(head, fragments)
+
+
+def render_batch_chunk(start, stop, mode, seed, detail, fields=None):
+    """Cast items start..stop-1 of a batch and render them as NDJSON lines."""
+    corpus = get_corpus()
+    if seed is None:
+        # Unseeded items need no per-item generator, so the whole chunk is
+        # cast in one vectorized call
+        batch_lines = (
+            get_method(mode).generate_hexagrams_batch(stop - start).lines.tolist()
+        )
+        casts = (build_cast_result(item_lines) for item_lines in batch_lines)
+    else:
+        # Item i uses seed + i, so any single item can be reproduced with /cast
+        casts = (
+            cast_lines(seed=seed + index, mode=mode) for index in range(start, stop)
+        )
+
+    lines = []
+    for index, cast in zip(range(start, stop), casts, strict=True):
+        item_seed = None if seed is None else seed + index
+        primary_number = cast["primary_hexagram_number"]
+        relating_number = cast.get("transformed_hexagram_number")
+
+        item = {
+            "index": index,
+            "seed": item_seed,
+            "hexagram_number": primary_number,
+            "changing_lines": [i + 1 for i in cast["changing_line_indices"]],
+            "lines": [str(line) for line in cast["lines"]],
+            "relating_hexagram_number": relating_number,
+        }
+        if detail == "numbers":
+            line = encode_json(item)
+        else:
+            line = splice_json(
+                item,
+                [
+                    ("reading", corpus.fragment(primary_number, fields)),
+                    (
+                        "relating_hexagram",
+                        corpus.fragment(relating_number, fields)
+                        if relating_number
+                        else None,
+                    ),
+                ],
+            )
+
+        lines.append(line + b"\n")
+    return b"".join(lines)
+
+
+async def stream_batch_casts(request: BatchCastRequest):
+    """Yield NDJSON chunks for a batch, keeping a bounded number of chunks in flight."""
+    executor = get_executor()
+    if request.count >= PROCESS_BATCH_THRESHOLD:
+        run, chunk_size, window = (
+            executor.run_in_process,
+            PROCESS_CHUNK_SIZE,
+            executor.process_workers,
+        )
+    else:
+        run, chunk_size, window = executor.run, BATCH_FLUSH_SIZE, 1
+
+    fields = projected_fields(request)
+    chunks = iter(range(0, request.count, chunk_size))
+    pending = deque()
+
+    def submit_next():
+        start = next(chunks, None)
+        if start is not None:
+            stop = min(start + chunk_size, request.count)
+            pending.append(
+                asyncio.ensure_future(
+                    run(
+                        render_batch_chunk,
+                        start,
+                        stop,
+                        request.mode,
+                        request.seed,
+                        request.detail,
+                        fields,
+                    )
+                )
+            )
+
+    try:
+        for _ in range(window):
+            submit_next()
+        while pending:
+            text = await pending.popleft()
+            submit_next()
+            # Chunks may be cast in another process, so they are counted here
+            CASTS_TOTAL.inc(request.mode, amount=text.count(b"\n"))
+            yield text
+    finally:
+        # Client went away or a chunk failed: drop work that has not started
+        for future in pending:
+            future.cancel()
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """A streaming response that holds an executor slot until it has been sent.
+
+    The slot is given back however sending ends, including a client disconnect,
+    which skips background tasks.
+    """
+
+    def __init__(self, content, release, **kwargs):
+        """Wrap content and the release function returned by admit()."""
+        super().__init__(content, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        """Send the response, then give the slot back."""
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
+
+@app.post("/cast/batch")
+async def cast_batch(request: BatchCastRequest):
+    """Stream many readings as newline-delimited JSON, one reading per line."""
+    annotate_request(mode=request.mode, seed=request.seed, count=request.count)
+    try:
+        release = get_executor().admit()
+    except ExecutorSaturatedError as e:
+        logger.warning("%s", e)
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, retry shortly",
+            headers={"Retry-After": "1"},
+        ) from e
+    return AdmittedStreamingResponse(
+        stream_batch_casts(request), release, media_type="application/x-ndjson"
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """Request latency, stage timings, cast counts, cache and executor state.
+
+    Rendered in the Prometheus text exposition format.
+    """
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+def require_history():
+    """The history store, or 404 when HISTORY_ENABLED is off."""
+    history = get_history_store()
+    if history is None:
+        raise HTTPException(status_code=404, detail="Reading history is disabled")
+    return history
+
+
+@app.get("/history")
+async def list_history(
+    user_id: Optional[str] = Query(None, min_length=1, max_length=128),
+    hexagram: Optional[int] = Query(None, ge=1, le=64),
+    seed: Optional[int] = None,
+    mode: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Page through recorded readings, newest first; pass next_cursor to continue.
+
+    Unauthenticated: user_id filters the readings but does not restrict access.
+    """
+    history = require_history()
+    try:
+        # SQLite reads block, so they run off the event loop
+        readings, next_cursor = await asyncio.to_thread(
+            history.page, user_id, hexagram, seed, mode, since, until, cursor, limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return {"readings": readings, "next_cursor": next_cursor}
+
+
+@app.get("/history/stats")
+async def history_stats(
+    user_id: Optional[str] = Query(None, min_length=1, max_length=128),
+):
+    """Count recorded readings overall, by method and by primary hexagram."""
+    return await asyncio.to_thread(require_history().aggregate, user_id)
+
+
+def sse_event(event, data):
+    """Format one server-sent event; data is compact JSON, so it fits on one line."""
+    return b"event: " + event.encode("ascii") + b"\ndata: " + data + b"\n\n"
+
+
+def trace_events(cast_result, body):
+    """Yield an event per division, one per line as it completes, then the reading."""
+    fields = cast_result["trace"]["fields"]
+    divisions_by_line = {}
+    for row in cast_result["trace"]["divisions"]:
+        divisions_by_line.setdefault(row[fields.index("line")], []).append(row)
+    for line_number, value in enumerate(cast_result["lines"], start=1):
+        for row in divisions_by_line.get(line_number, ()):
+            yield sse_event(
+                "division", encode_json(dict(zip(fields, row, strict=True)))
+            )
+        yield sse_event("line", encode_json({"line": line_number, "value": value}))
+    yield sse_event("reading", body)
+
+
+@app.get("/cast/stream")
+async def cast_stream(
+    mode: str = "yarrow",
+    seed: Optional[int] = None,
+    detail: str = "full",
+):
+    """Cast with a division trace and stream it as server-sent events to animate."""
+    try:
+        request = ReadingRequest(mode=mode, seed=seed, detail=detail, verbose=True)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422, detail=e.errors(include_url=False, include_context=False)
+        ) from e
+    try:
+        executor = get_executor()
+        release = executor.admit()
+    except ExecutorSaturatedError as e:
+        logger.warning("%s", e)
         raise HTTPException(
-            status_code=500, 
-            detail=f"Internal server error: {str(e)}"
+            status_code=503,
+            detail="Server busy, retry shortly",
+            headers={"Retry-After": "1"},
+        ) from e
+    try:
+        result = await executor.run(
+            get_reading, mode=request.mode, seed=request.seed, verbose=True
         )
+        if "error" in result:
+            raise HTTPException(status_code=500, detail=result["error"])
+        record_reading(request.mode, result)
+        cast_result = result["cast_result"]
+        body = render_reading(cast_result, request.detail, projected_fields(request))
+    except BaseException:
+        release()
+        raise
+    # text/event-stream is excluded from gzip, so the middleware never buffers events
+    return AdmittedStreamingResponse(
+        trace_events(cast_result, body),
+        release,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 @app.get("/methods")
 async def get_methods():
     """Get available divination methods."""
     return {
         "methods": [
-            {
-                "name": "yarrow",
-                "description": "Traditional yarrow stalk method"
-            },
-            {
-                "name": "coins", 
-                "description": "Three coin method"
-            }
+            {"name": method.name, "description": method.description}
+            for method in available_methods()
         ]
     }
 
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+def corpus_response(request, body, etag):
+    """Serve pre-encoded corpus bytes with caching headers, or 304 if still current."""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={HEXAGRAM_CACHE_MAX_AGE}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def loaded_corpus():
+    """The current corpus snapshot, or 503 (never cached) when no corpus has loaded."""
+    snapshot = get_corpus().snapshot()
+    if not snapshot.content_hash:
+        raise HTTPException(
+            status_code=503,
+            detail="Hexagram data is not loaded",
+            headers={"Cache-Control": "no-store"},
+        )
+    return snapshot
+
+
+@app.get("/hexagrams")
+async def list_hexagrams(request: Request):
+    """All 64 corpus entries in number order."""
+    # Body and ETag come from the same snapshot, so a concurrent reload cannot mix them
+    snapshot = loaded_corpus()
+    return corpus_response(request, snapshot.collection, f'"{snapshot.content_hash}"')
+
+
+@app.get("/hexagrams/{number}")
+async def get_hexagram(request: Request, number: int = Path(ge=1, le=64)):
+    """A single corpus entry by King Wen number."""
+    snapshot = loaded_corpus()
+    body = snapshot.fragments.get(number)
+    if body is None:
+        raise HTTPException(status_code=404, detail=f"Hexagram {number} not found")
+    return corpus_response(request, body, f'"{snapshot.content_hash}-{number}"')
+
+
+@app.get("/search")
+async def search(
+    q: str = Query(min_length=1, max_length=200),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    field: Annotated[Optional[List[SearchField]], Query()] = None,
+):
+    """Ranked full-text search over judgments, images, line meanings and commentary."""
+    # Index and names come from one snapshot, so a reload cannot drop a hit's entry
+    snapshot = get_corpus().snapshot()
+    index = get_search_index(snapshot)
+    total, hits = index.search(q, offset=offset, limit=limit, fields=field)
+    results = [
+        {
+            "hexagram_number": hit.passage.number,
+            "name": snapshot.data[hit.passage.number]["name"],
+            "field": hit.passage.field,
+            "index": hit.passage.index,
+            "text": hit.passage.text,
+            "score": hit.score,
+            "highlights": hit.highlights,
+        }
+        for hit in hits
+    ]
+    body = encode_json(
+        {
+            "query": q,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "results": results,
+        }
+    )
+    return Response(content=body, media_type="application/json")
+
+
+@lru_cache(maxsize=None)
+def render_stats(mode, view, number=None):
+    """Encode a probability table once per mode; later requests reuse the bytes."""
+    tables = probability_tables(mode)
+    if view == "summary":
+        return encode_json(tables.to_dict())
+    if view == "hexagram":
+        return encode_json(tables.hexagram(number))
+    if view == "transitions":
+        return encode_json(tables.transitions_dict())
+    return encode_json(tables.outcomes_dict())
+
+
+def stats_response(mode, view, number=None):
+    """Serve a cached probability table, 404 for unknown modes."""
+    try:
+        return Response(
+            content=render_stats(mode, view, number), media_type="application/json"
+        )
+    except UnknownMethodError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+
+
+@app.get("/stats/{mode}")
+async def get_stats(mode: str):
+    """Exact line, primary hexagram and changing-line-count probabilities for a mode."""
+    return stats_response(mode, "summary")
+
+
+@app.get("/stats/{mode}/hexagrams/{number}")
+async def get_hexagram_stats(mode: str, number: int = Path(ge=1, le=64)):
+    """Exact odds of one hexagram as primary and relating, and where it leads."""
+    return stats_response(mode, "hexagram", number)
+
+
+@app.get("/stats/{mode}/transitions")
+async def get_transition_stats(mode: str):
+    """Exact 64x64 primary-to-relating probability matrix for a mode."""
+    return stats_response(mode, "transitions")
+
+
+@app.get("/stats/{mode}/outcomes")
+async def get_outcome_stats(mode: str):
+    """Exact probability of each of the 4096 six-line outcomes for a mode."""
+    return stats_response(mode, "outcomes")
+
+
 def main():
     """Entry point for running the API server."""
     import uvicorn
-    
+
     # Get configuration from environment
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
     debug = os.getenv("DEBUG", "false").lower() == "true"
-    
-    logger.info(f"Starting I Ching API server on {host}:{port}")
-    
+
+    logger.info("Starting I Ching API server on %s:%s", host, port)
+
     # Run uvicorn directly
-    uvicorn.run(
-        "main:app", 
-        host=host, 
-        port=port, 
-        reload=debug,
-        log_level="info"
-    )
+    uvicorn.run("main:app", host=host, port=port, reload=debug, log_level="info")
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
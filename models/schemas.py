@@ -1,16 +1,67 @@
 """Pydantic models for I Ching API."""
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional, get_args
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator, model_validator
 
+from core.methods import get_method
 
-class ReadingRequest(BaseModel):
+# How much hexagram text to include with a cast: numbers only, a short
+# summary (name and judgment) or the full corpus entry
+DetailLevel = Literal["numbers", "summary", "full"]
+
+# Fields of a corpus entry, in corpus order, that can be projected
+HexagramField = Literal[
+    "number",
+    "name",
+    "chineseName",
+    "judgment",
+    "image",
+    "lines",
+    "upperTrigram",
+    "lowerTrigram",
+    "trigramSignificance",
+    "commentary",
+]
+HEXAGRAM_FIELDS = get_args(HexagramField)
+
+# Corpus fields covered by full-text search
+SearchField = Literal["judgment", "image", "lines", "commentary"]
+
+MAX_BATCH_COUNT = 100_000
+
+
+def validate_mode(mode: str) -> str:
+    """Rejects modes that are not in the method registry."""
+    get_method(mode)
+    return mode
+
+
+class ProjectionMixin(BaseModel):
+    """Detail level and field projection for the hexagram text in a response."""
+
+    detail: DetailLevel = "full"
+    fields: Optional[List[HexagramField]] = None
+    exclude: List[HexagramField] = []
+
+    @model_validator(mode="after")
+    def _check_projection(self):
+        """A projection needs hexagram text to project."""
+        if self.detail == "numbers" and (self.fields is not None or self.exclude):
+            raise ValueError("fields and exclude cannot be used with detail 'numbers'")
+        return self
+
+
+class ReadingRequest(ProjectionMixin):
     """Request model for generating a reading."""
 
     mode: str = "yarrow"
     seed: Optional[int] = None
     verbose: bool = False
+    # Readings are recorded in the history store under this id, if given
+    user_id: Optional[str] = Field(None, min_length=1, max_length=128)
+
+    _check_mode = field_validator("mode")(validate_mode)
 
 
 class ReadingResponse(BaseModel):
@@ -21,3 +72,32 @@ class ReadingResponse(BaseModel):
     lines: List[str]
     reading: Dict[str, Any]
     relating_hexagram: Optional[Dict[str, Any]] = None
+
+
+class TracedReadingResponse(ReadingResponse):
+    """Response model for a full ``verbose`` reading, including the division trace."""
+
+    trace: Dict[str, Any]
+
+
+class LeanReadingResponse(BaseModel):
+    """Response model for a reading at the 'numbers' or 'summary' detail level."""
+
+    hexagram_number: int
+    changing_lines: List[int]
+    lines: List[str]
+    relating_hexagram_number: Optional[int] = None
+    reading: Optional[Dict[str, Any]] = None
+    relating_hexagram: Optional[Dict[str, Any]] = None
+    trace: Optional[Dict[str, Any]] = None
+
+
+class BatchCastRequest(ProjectionMixin):
+    """Request model for casting many readings in one streamed response."""
+
+    count: int = Field(ge=1, le=MAX_BATCH_COUNT)
+    mode: str = "yarrow"
+    seed: Optional[int] = None
+    detail: DetailLevel = "numbers"
+
+    _check_mode = field_validator("mode")(validate_mode)
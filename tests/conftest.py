@@ -0,0 +1,16 @@
+"""Shared pytest fixtures."""
+
+import pytest
+
+from core.history import close_history_store
+
+
+@pytest.fixture(autouse=True)
+def isolated_history(tmp_path_factory, monkeypatch):
+    """Points the reading history at a per-test database, never the user's own."""
+    close_history_store()
+    monkeypatch.setenv(
+        "HISTORY_DB_PATH", str(tmp_path_factory.mktemp("history") / "history.db")
+    )
+    yield
+    close_history_store()
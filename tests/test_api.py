@@ -0,0 +1,253 @@
+"""Tests for the HTTP API."""
+
+import json
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from core import corpus as corpus_module
+from core.corpus import HexagramCorpus
+from core.yarrow import get_reading
+from main import app
+from models.schemas import ReadingResponse
+
+
+def test_cast_returns_reading():
+    """POST /cast returns a reading with the corpus entry for the primary hexagram."""
+    with TestClient(app) as client:
+        response = client.post("/cast", json={"seed": 42})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["reading"]["number"] == body["hexagram_number"]
+    assert len(body["lines"]) == 6
+
+
+def test_cast_body_is_byte_identical_to_validated_response():
+    """Spliced /cast bodies match serializing the validated ReadingResponse."""
+    seen = set()
+    with TestClient(app) as client:
+        for seed in range(200):
+            result = get_reading(seed=seed)
+            expected = ReadingResponse.model_validate(
+                {
+                    "hexagram_number": result["cast_result"]["primary_hexagram_number"],
+                    "changing_lines": [
+                        i + 1 for i in result["cast_result"]["changing_line_indices"]
+                    ],
+                    "lines": [str(line) for line in result["cast_result"]["lines"]],
+                    "reading": result["primary_hexagram"],
+                    "relating_hexagram": result.get("transformed_hexagram"),
+                }
+            )
+            response = client.post("/cast", json={"seed": seed})
+
+            assert response.headers["content-type"] == "application/json"
+            assert response.content == JSONResponse(jsonable_encoder(expected)).body
+            seen.add(expected.hexagram_number)
+
+    assert len(seen) > 40
+
+
+def test_cast_batch_streams_ndjson():
+    """POST /cast/batch streams one JSON reading per line."""
+    with TestClient(app) as client:
+        response = client.post("/cast/batch", json={"count": 600, "seed": 10})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["index"] for item in items] == list(range(600))
+    assert all("reading" not in item for item in items)
+
+
+def test_cast_batch_items_match_single_casts():
+    """Batch item i reproduces a single cast seeded with base seed + i."""
+    with TestClient(app) as client:
+        response = client.post(
+            "/cast/batch", json={"count": 5, "seed": 100, "detail": "full"}
+        )
+        items = [json.loads(line) for line in response.text.splitlines()]
+
+        for item in items:
+            single = client.post("/cast", json={"seed": item["seed"]}).json()
+            assert item["seed"] == 100 + item["index"]
+            assert item["hexagram_number"] == single["hexagram_number"]
+            assert item["lines"] == single["lines"]
+            assert item["reading"] == single["reading"]
+            assert item["relating_hexagram"] == single["relating_hexagram"]
+
+
+def test_cast_batch_summary_and_validation():
+    """Summary detail trims corpus entries and out-of-range counts are rejected."""
+    with TestClient(app) as client:
+        response = client.post("/cast/batch", json={"count": 2, "detail": "summary"})
+        item = json.loads(response.text.splitlines()[0])
+        assert set(item["reading"]) == {"number", "name", "chineseName", "judgment"}
+
+        assert client.post("/cast/batch", json={"count": 0}).status_code == 422
+        assert (
+            client.post(
+                "/cast/batch", json={"count": 10, "detail": "everything"}
+            ).status_code
+            == 422
+        )
+
+
+def test_cast_detail_levels_and_projection():
+    """Lean levels drop corpus text; fields and exclude project the entries."""
+    with TestClient(app) as client:
+        full = client.post("/cast", json={"seed": 5}).json()
+
+        numbers = client.post("/cast", json={"seed": 5, "detail": "numbers"}).json()
+        assert set(numbers) == {
+            "hexagram_number",
+            "changing_lines",
+            "lines",
+            "relating_hexagram_number",
+        }
+        assert numbers["lines"] == full["lines"]
+        assert numbers["relating_hexagram_number"] == (
+            full["relating_hexagram"] or {}
+        ).get("number")
+
+        summary = client.post("/cast", json={"seed": 5, "detail": "summary"}).json()
+        assert set(summary["reading"]) == {"number", "name", "chineseName", "judgment"}
+
+        lean = client.post(
+            "/cast", json={"seed": 5, "exclude": ["commentary", "lines"]}
+        ).json()
+        assert lean["reading"] == {
+            k: v for k, v in full["reading"].items() if k not in ("commentary", "lines")
+        }
+
+        picked = client.post(
+            "/cast", json={"seed": 5, "fields": ["judgment", "name"]}
+        ).json()
+        assert picked["reading"] == {
+            "name": full["reading"]["name"],
+            "judgment": full["reading"]["judgment"],
+        }
+
+        # Cached bodies are keyed by projection, so the full body is unchanged
+        assert client.post("/cast", json={"seed": 5}).json() == full
+        assert client.post("/cast", json={"fields": ["bogus"]}).status_code == 422
+        assert (
+            client.post(
+                "/cast", json={"detail": "numbers", "exclude": ["name"]}
+            ).status_code
+            == 422
+        )
+
+
+def test_large_responses_are_compressed():
+    """Full readings are gzipped when the client accepts it; small bodies are not."""
+    with TestClient(app) as client:
+        full = client.post(
+            "/cast", json={"seed": 5}, headers={"Accept-Encoding": "gzip"}
+        )
+        numbers = client.post(
+            "/cast",
+            json={"seed": 5, "detail": "numbers"},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        plain = client.post(
+            "/cast", json={"seed": 5}, headers={"Accept-Encoding": "identity"}
+        )
+
+    assert full.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in numbers.headers
+    assert "content-encoding" not in plain.headers
+    assert full.content == plain.content
+
+
+def test_verbose_cast_returns_trace():
+    """verbose=True adds the division trace, and seeded traces are cached separately."""
+    with TestClient(app) as client:
+        plain = client.post("/cast", json={"seed": 11, "detail": "numbers"}).json()
+        traced = client.post(
+            "/cast", json={"seed": 11, "detail": "numbers", "verbose": True}
+        ).json()
+        full = client.post("/cast", json={"seed": 11, "verbose": True}).json()
+
+    assert "trace" not in plain
+    assert traced["lines"] == plain["lines"]
+    assert len(traced["trace"]["divisions"]) == 18
+    assert full["trace"] == traced["trace"]
+    assert full["reading"]["number"] == plain["hexagram_number"]
+
+
+def test_cast_stream_sends_trace_events():
+    """GET /cast/stream sends 18 divisions, 6 lines and the reading, uncompressed."""
+    with TestClient(app) as client:
+        response = client.get(
+            "/cast/stream", params={"seed": 11}, headers={"Accept-Encoding": "gzip"}
+        )
+        reading = client.post("/cast", json={"seed": 11, "verbose": True}).json()
+        assert client.get("/cast/stream", params={"mode": "bogus"}).status_code == 422
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "content-encoding" not in response.headers
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    names = [lines[0].removeprefix("event: ") for lines in events]
+    assert names == (["division"] * 3 + ["line"]) * 6 + ["reading"]
+    data = [json.loads(lines[1].removeprefix("data: ")) for lines in events]
+    assert [
+        event["value"]
+        for name, event in zip(names, data, strict=True)
+        if name == "line"
+    ] == [int(v) for v in reading["lines"]]
+    assert data[-1] == reading
+
+
+def test_hexagram_endpoints_support_conditional_requests():
+    """Corpus entries carry strong ETags and long lifetimes, and revalidate with 304."""
+    with TestClient(app) as client:
+        single = client.get("/hexagrams/1")
+        assert single.status_code == 200
+        assert single.json()["number"] == 1
+        assert single.headers["cache-control"].startswith("public, max-age=")
+        etag = single.headers["etag"]
+        assert etag.startswith('"') and not etag.startswith("W/")
+
+        revalidated = client.get(
+            "/hexagrams/1", headers={"If-None-Match": f'"stale", W/{etag}'}
+        )
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+
+        assert (
+            client.get("/hexagrams/2", headers={"If-None-Match": etag}).status_code
+            == 200
+        )
+
+        listing = client.get("/hexagrams")
+        assert [entry["number"] for entry in listing.json()["hexagrams"]] == list(
+            range(1, 65)
+        )
+        assert (
+            client.get(
+                "/hexagrams", headers={"If-None-Match": listing.headers["etag"]}
+            ).status_code
+            == 304
+        )
+
+        assert client.get("/hexagrams/0").status_code == 422
+
+
+def test_hexagram_endpoints_refuse_an_unloaded_corpus(tmp_path, monkeypatch):
+    """Without a corpus the listing is an uncacheable 503, not an empty 200."""
+    monkeypatch.setattr(
+        corpus_module,
+        "_corpus",
+        HexagramCorpus(filepath=str(tmp_path / "missing.json")),
+    )
+    with TestClient(app) as client:
+        for path in ("/hexagrams", "/hexagrams/1"):
+            response = client.get(path)
+            assert response.status_code == 503
+            assert "etag" not in response.headers
+            assert response.headers["cache-control"] == "no-store"
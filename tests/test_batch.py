@@ -0,0 +1,51 @@
+"""Tests for vectorized casting with NumPy."""
+
+import numpy as np
+
+from core.batch import generate_hexagrams_batch, hexagram_numbers_batch
+from core.yarrow import get_hexagram_number, get_transformed_lines
+
+
+def test_batch_shape_and_reproducibility():
+    """Batches have the documented shape and are reproducible by seed."""
+    batch = generate_hexagrams_batch(1000, seed=42)
+
+    assert batch.lines.shape == (1000, 6)
+    assert batch.lines.dtype == np.uint8
+    assert batch.primary.shape == batch.relating.shape == (1000,)
+    assert set(np.unique(batch.lines)) <= {6, 7, 8, 9}
+
+    again = generate_hexagrams_batch(1000, seed=42)
+    assert np.array_equal(batch.lines, again.lines)
+    assert not np.array_equal(
+        batch.lines, generate_hexagrams_batch(1000, seed=43).lines
+    )
+
+
+def test_batch_numbers_match_scalar_lookup():
+    """Vectorized hexagram numbers agree with the scalar King Wen lookup."""
+    batch = generate_hexagrams_batch(2000, seed=7)
+
+    for lines, primary, relating in zip(
+        batch.lines.tolist(), batch.primary, batch.relating, strict=True
+    ):
+        assert primary == get_hexagram_number(lines)
+        assert relating == get_hexagram_number(get_transformed_lines(lines))
+
+    primary, relating = hexagram_numbers_batch(
+        np.array([[7] * 6, [6] * 6, [9, 8, 8, 8, 8, 8]])
+    )
+    assert primary.tolist() == [1, 2, 24]
+    assert relating.tolist() == [1, 1, 2]
+
+
+def test_batch_line_distribution():
+    """The vectorized division reproduces the yarrow stalk line frequencies."""
+    num_hexagrams = 200_000
+    batch = generate_hexagrams_batch(num_hexagrams, seed=0)
+    frequencies = np.bincount(batch.lines.ravel(), minlength=10)[6:] / batch.lines.size
+
+    for actual, expected in zip(
+        frequencies, [1 / 16, 5 / 16, 7 / 16, 3 / 16], strict=True
+    ):
+        assert abs(actual - expected) < 0.015
@@ -0,0 +1,46 @@
+"""Tests for the offline benchmark runner."""
+
+from benchmarks.run import BENCHMARKS, compare, run_suite
+
+
+def test_suite_reports_throughput_and_allocations():
+    """Every hot path is covered and a short run yields usable figures."""
+    assert {
+        "perform_division",
+        "generate_one_line",
+        "generate_hexagram",
+        "get_hexagram_number",
+        "load_hexagram_data",
+        "cast_hexagram",
+        "post_cast",
+    } <= set(BENCHMARKS)
+
+    report = run_suite(["generate_hexagram", "post_cast"], min_time=0.01, repeat=1)
+    for result in report["results"].values():
+        assert result["ops_per_sec"] > 0
+        assert result["peak_bytes_per_op"] > 0
+
+
+def test_compare_flags_only_regressions_past_threshold():
+    """Slowdowns beyond the threshold are reported; speedups and noise are not."""
+    baseline = {
+        "results": {
+            "a": {"ops_per_sec": 1000.0},
+            "b": {"ops_per_sec": 1000.0},
+            "c": {"ops_per_sec": 1000.0},
+        }
+    }
+    report = {
+        "results": {
+            "a": {"ops_per_sec": 700.0},
+            "b": {"ops_per_sec": 900.0},
+            "c": {"ops_per_sec": 2000.0},
+            "d": {"ops_per_sec": 5.0},
+        }
+    }
+
+    regressions = compare(report, baseline, threshold=0.2)
+
+    assert len(regressions) == 1 and regressions[0].startswith("a:")
+    assert report["results"]["c"]["change"] == 1.0
+    assert "change" not in report["results"]["d"]
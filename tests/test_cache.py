@@ -0,0 +1,80 @@
+"""Tests for the seeded-cast LRU cache."""
+
+from fastapi.testclient import TestClient
+
+from core.cache import LRUCache, get_cast_cache
+from main import app
+
+
+class _Clock:
+    """Manually advanced time source."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_and_counters():
+    """The least recently used entry is evicted and every lookup is counted."""
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {
+        "size": 2,
+        "maxsize": 2,
+        "ttl": 0.0,
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+        "expirations": 0,
+        "hit_rate": 0.75,
+    }
+
+
+def test_ttl_expiry_and_disabled_cache():
+    """Entries expire after the TTL and a zero-size cache stores nothing."""
+    clock = _Clock()
+    cache = LRUCache(maxsize=10, ttl=60, clock=clock)
+    cache.put("seed", b"body")
+    clock.now = 59
+    assert cache.get("seed") == b"body"
+    clock.now = 60
+    assert cache.get("seed") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+    disabled = LRUCache(maxsize=0)
+    disabled.put("seed", b"body")
+    assert disabled.get("seed") is None
+
+
+def test_cast_caches_only_seeded_requests():
+    """Repeated seeded casts are served from the cache; unseeded casts never are."""
+    cache = get_cast_cache()
+    cache.clear()
+
+    with TestClient(app) as client:
+        first = client.post("/cast", json={"seed": 123456, "mode": "yarrow_fast"})
+        hits = cache.hits
+        second = client.post("/cast", json={"seed": 123456, "mode": "yarrow_fast"})
+        assert cache.hits == hits + 1
+        assert second.content == first.content
+
+        other_mode = client.post("/cast", json={"seed": 123456})
+        assert cache.hits == hits + 1
+        assert other_mode.status_code == 200
+
+        size = len(cache)
+        lookups = cache.hits + cache.misses
+        client.post("/cast", json={})
+        client.post("/cast", json={})
+        assert len(cache) == size
+        assert cache.hits + cache.misses == lookups
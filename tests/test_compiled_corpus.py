@@ -0,0 +1,94 @@
+"""Tests for the compiled, memory-mapped corpus."""
+
+import json
+
+from fastapi.testclient import TestClient
+
+from core import corpus as corpus_module
+from core.cache import get_cast_cache
+from core.compiled_corpus import CompiledCorpus, compile_corpus, compiled_path_for
+from core.corpus import HexagramCorpus, get_corpus
+from core.yarrow import get_reading
+from main import app
+
+
+def write_corpus(tmp_path, entries):
+    """Writes entries as a corpus JSON file and returns its path."""
+    path = tmp_path / "hexagrams.json"
+    path.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_compiled_corpus_matches_json(tmp_path):
+    """The mapped fragments, hash and lazily decoded entries equal the JSON load."""
+    source = get_corpus().data
+    path = write_corpus(tmp_path, [source[n] for n in range(1, 65)])
+    from_json = HexagramCorpus(filepath=path, use_compiled=False)
+
+    compiled = CompiledCorpus(compile_corpus(path))
+    assert compiled.content_hash == from_json.content_hash
+    assert bytes(compiled.collection) == from_json.collection_fragment()
+
+    assert not compiled.entries._decoded
+    assert compiled.entries[12]["judgment"] == from_json.get(12)["judgment"]
+    assert set(compiled.entries._decoded) == {12}
+    for number in range(1, 65):
+        assert bytes(compiled.fragments[number]) == from_json.fragment(number)
+        assert compiled.entries[number] == from_json.get(number)
+        assert list(compiled.entries[number]) == list(from_json.get(number))
+
+
+def test_corpus_prefers_current_compiled_file(tmp_path):
+    """A compiled file is used only while its source hash matches the JSON."""
+    source = get_corpus().data
+    entries = [dict(source[n]) for n in range(1, 65)]
+    path = write_corpus(tmp_path, entries)
+    compile_corpus(path)
+
+    corpus = HexagramCorpus(filepath=path)
+    assert corpus.get(1)["name"] == source[1]["name"]
+    assert corpus.stats()["format"] == "compiled"
+    assert corpus.fragment(1, ("number", "name")) == json.dumps(
+        {"number": 1, "name": source[1]["name"]},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    # Editing the JSON makes the compiled file stale
+    entries[0]["judgment"] = "Edited judgment"
+    write_corpus(tmp_path, entries)
+    assert corpus.reload()[1]["judgment"] == "Edited judgment"
+    assert corpus.stats()["format"] == "json"
+
+    # A corrupt compiled file is ignored as well
+    with open(compiled_path_for(path), "r+b") as f:
+        f.write(b"JUNK")
+    assert HexagramCorpus(filepath=path).load()[1]["judgment"] == "Edited judgment"
+
+
+def test_api_serves_compiled_corpus(tmp_path, monkeypatch):
+    """Responses built from mapped fragments equal those built from the JSON."""
+    source = get_corpus().data
+    path = write_corpus(tmp_path, [source[n] for n in range(1, 65)])
+    with TestClient(app) as client:
+        expected = [
+            client.post("/cast", json={"seed": seed, "exclude": ["commentary"]}).content
+            for seed in range(20)
+        ]
+        expected_entry = client.get("/hexagrams/7").content
+
+    compile_corpus(path)
+    monkeypatch.setattr(corpus_module, "_corpus", HexagramCorpus(filepath=path))
+    get_cast_cache().clear()
+    with TestClient(app) as client:
+        assert get_corpus().stats()["format"] == "compiled"
+        assert [
+            client.post("/cast", json={"seed": seed, "exclude": ["commentary"]}).content
+            for seed in range(20)
+        ] == expected
+        assert client.get("/hexagrams/7").content == expected_entry
+    reading = get_reading(seed=1, print_result=False)
+    assert (
+        json.loads(json.dumps(reading))["primary_hexagram"]
+        == source[reading["cast_result"]["primary_hexagram_number"]]
+    )
@@ -0,0 +1,63 @@
+"""Tests for the statistical conformance checks."""
+
+import os
+
+import numpy as np
+import pytest
+
+from core.conformance import TIERS, chi_square_sf, run_conformance, run_tier
+from core.methods import CastingMethod, get_method
+
+DEEP_TIER = os.getenv("CONFORMANCE_TIER") == "deep"
+
+
+def test_chi_square_survival_function():
+    """p-values match published chi-square critical values."""
+    assert chi_square_sf(3.841, 1) == pytest.approx(0.05, abs=1e-4)
+    assert chi_square_sf(7.815, 3) == pytest.approx(0.05, abs=1e-4)
+    assert chi_square_sf(124.342, 100) == pytest.approx(0.05, abs=1e-4)
+    assert chi_square_sf(0, 5) == 1.0
+
+
+def test_quick_tier_passes_for_every_method():
+    """Batch and scalar paths of every method conform to their exact distributions."""
+    for report in run_tier("quick", seed=2024):
+        assert report.passed, (report.method, report.path, report.failures())
+        assert len(report.tests) == 25
+
+
+def test_detects_biased_and_dependent_casters():
+    """Small biases and correlations between lines are caught."""
+    yarrow = get_method("yarrow_fast")
+    distribution = yarrow.line_distribution()
+
+    def sticky_lines(count, rng):
+        # Each line repeats the one below it 2% of the time
+        lines = yarrow.generate_lines_batch(count, rng)
+        repeat = rng.random(count) < 0.02
+        repeat[::6] = False
+        lines[1:][repeat[1:]] = lines[:-1][repeat[1:]]
+        return lines
+
+    sticky = CastingMethod("sticky", "", None, sticky_lines, lambda: distribution)
+    report = run_conformance(sticky, 1_000_000, seed=1)
+    failed = {test.name for test in report.failures()}
+    assert "independence_positions_1_2" in failed
+    assert "independence_consecutive_casts" not in failed
+
+    # The traditional sixteenths differ from the simulated process by under a point
+    sixteenths = {6: 1 / 16, 7: 5 / 16, 8: 7 / 16, 9: 3 / 16}
+    report = run_conformance(
+        get_method("yarrow"), 200_000, seed=1, distribution=sixteenths
+    )
+    assert not report.passed
+
+
+@pytest.mark.skipif(
+    not DEEP_TIER, reason="set CONFORMANCE_TIER=deep to run the release tier"
+)
+def test_deep_tier_passes_for_every_method():
+    """Release tier: tens of millions of casts per method."""
+    assert TIERS["deep"].hexagrams >= 10_000_000
+    for report in run_tier("deep", seed=int(np.random.SeedSequence().entropy % 2**32)):
+        assert report.passed, (report.method, report.path, report.failures())
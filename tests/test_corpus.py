@@ -0,0 +1,113 @@
+"""Tests for the process-wide hexagram corpus store."""
+
+import json
+import os
+
+from core import corpus as corpus_module
+from core.corpus import HexagramCorpus, get_corpus
+from core.yarrow import get_reading
+
+
+def test_corpus_loads_all_hexagrams_once():
+    """The shared corpus is parsed once and reused by every reading."""
+    corpus = get_corpus()
+    data = corpus.load()
+
+    assert sorted(data.keys()) == list(range(1, 65))
+    assert get_corpus() is corpus
+    assert corpus.data is data
+
+    reading = get_reading(seed=7)
+    assert (
+        reading["primary_hexagram"]
+        is data[reading["cast_result"]["primary_hexagram_number"]]
+    )
+    assert corpus.data is data
+
+
+def test_corpus_reload_counts(tmp_path):
+    """Explicit reloads re-parse the file and are counted."""
+    source = get_corpus().data
+    path = tmp_path / "hexagrams.json"
+    path.write_text(json.dumps([source[n] for n in range(1, 65)]), encoding="utf-8")
+
+    corpus = HexagramCorpus(filepath=str(path))
+    assert len(corpus.data) == 64
+    assert corpus.reload_count == 0
+
+    corpus.reload()
+    stats = corpus.stats()
+    assert stats["reload_count"] == 1
+    assert stats["path"] == str(path)
+    assert stats["load_time_ms"] >= 0
+
+
+def test_corpus_auto_reload_on_mtime_change(tmp_path, monkeypatch):
+    """With auto-reload on, a changed file is picked up on the next access."""
+    monkeypatch.setattr(corpus_module, "RELOAD_CHECK_INTERVAL", 0.0)
+    source = get_corpus().data
+    entries = [dict(source[n]) for n in range(1, 65)]
+    path = tmp_path / "hexagrams.json"
+    path.write_text(json.dumps(entries), encoding="utf-8")
+
+    corpus = HexagramCorpus(filepath=str(path), auto_reload=True)
+    assert corpus.get(1)["judgment"] == source[1]["judgment"]
+    assert corpus.content_hash == get_corpus().content_hash
+
+    entries[0]["judgment"] = "Edited judgment"
+    path.write_text(json.dumps(entries), encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    assert corpus.get(1)["judgment"] == "Edited judgment"
+    assert corpus.reload_count == 1
+    assert corpus.content_hash != get_corpus().content_hash
+
+
+def test_corpus_missing_file_is_empty(tmp_path):
+    """A missing corpus yields empty data instead of raising."""
+    corpus = HexagramCorpus(filepath=str(tmp_path / "missing.json"))
+    assert len(corpus.data) == 0
+    assert corpus.get(1) is None
+
+
+def test_failed_reload_keeps_previous_corpus(tmp_path, monkeypatch):
+    """A half-written file on auto-reload keeps the loaded corpus until it parses."""
+    monkeypatch.setattr(corpus_module, "RELOAD_CHECK_INTERVAL", 0.0)
+    source = get_corpus().data
+    entries = [dict(source[n]) for n in range(1, 65)]
+    path = tmp_path / "hexagrams.json"
+    text = json.dumps(entries)
+    path.write_text(text, encoding="utf-8")
+
+    corpus = HexagramCorpus(filepath=str(path), auto_reload=True, use_compiled=False)
+    before = corpus.snapshot()
+    path.write_text(text[: len(text) // 2], encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    assert corpus.snapshot() is before
+    assert len(corpus.data) == 64 and corpus.content_hash == before.content_hash
+    assert corpus.reload_count == 0
+
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, (stat.st_atime, stat.st_mtime + 20))
+    assert corpus.snapshot() is not before
+    assert corpus.reload_count == 1
+
+
+def test_missing_file_is_retried(tmp_path):
+    """With nothing loaded, each access retries, so a later file is picked up."""
+    path = tmp_path / "hexagrams.json"
+    corpus = HexagramCorpus(filepath=str(path))
+    assert corpus.loaded_at is None and corpus.content_hash == ""
+
+    source = get_corpus().data
+    path.write_text(json.dumps([source[n] for n in range(1, 65)]), encoding="utf-8")
+    assert len(corpus.data) == 64
+
+
+def test_candidate_paths_are_unique(tmp_path):
+    """An absolute path is probed once, not once per base directory."""
+    path = str(tmp_path / "hexagrams.json")
+    assert corpus_module.candidate_paths(path) == [path]
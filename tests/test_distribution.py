@@ -0,0 +1,97 @@
+"""Tests for the exact yarrow line-value distribution."""
+
+from collections import Counter
+from fractions import Fraction
+
+from core import yarrow
+from core.distribution import (
+    LineSampler,
+    stage_outcomes,
+    yarrow_line_distribution,
+    yarrow_line_sampler,
+)
+from core.yarrow import cast_hexagram, get_reading
+
+
+def _enumerate_perform_division(stalks_in, monkeypatch):
+    """Runs the real perform_division once for every possible left pile."""
+    outcomes = Counter()
+    for left_pile in range(1, stalks_in):
+        monkeypatch.setattr(yarrow.random, "randint", lambda a, b, left=left_pile: left)
+        outcomes[yarrow.perform_division(stalks_in)] += Fraction(1, stalks_in - 1)
+    return outcomes
+
+
+def test_stage_outcomes_match_perform_division(monkeypatch):
+    """The enumerated stage outcomes are exactly those of perform_division."""
+    for stalks_in in (49, 44, 40, 36, 32):
+        assert stage_outcomes(stalks_in) == _enumerate_perform_division(
+            stalks_in, monkeypatch
+        )
+
+
+def test_exact_line_distribution(monkeypatch):
+    """The dynamic programme agrees with brute-force enumeration of all three stages."""
+    expected = Counter()
+    for (r1, n1), p1 in _enumerate_perform_division(
+        yarrow.WORKING_STALKS, monkeypatch
+    ).items():
+        for (r2, n2), p2 in _enumerate_perform_division(n1, monkeypatch).items():
+            for (r3, _), p3 in _enumerate_perform_division(n2, monkeypatch).items():
+                value = sum(yarrow.get_value_from_remainder(r) for r in (r1, r2, r3))
+                expected[value] += p1 * p2 * p3
+
+    distribution = yarrow_line_distribution()
+    assert distribution == dict(expected)
+    assert sum(distribution.values()) == 1
+    assert distribution == {
+        6: Fraction(95, 1612),
+        7: Fraction(735193, 2426060),
+        8: Fraction(8633, 19565),
+        9: Fraction(110, 559),
+    }
+
+
+class _FixedDraw:
+    """Stand-in RNG whose randrange returns a preset value."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def randrange(self, stop):
+        return self.value
+
+
+def test_sampler_maps_draws_exactly():
+    """Each integer draw maps to a line value in proportion to its exact weight."""
+    sampler = yarrow_line_sampler()
+    assert sum(sampler.weights) == sampler.denominator
+    for value, weight in zip(sampler.values, sampler.weights, strict=True):
+        assert (
+            Fraction(weight, sampler.denominator) == yarrow_line_distribution()[value]
+        )
+
+    lower = 0
+    for value, upper in zip(sampler.values, sampler.cumulative, strict=True):
+        assert sampler.sample(_FixedDraw(lower)) == value
+        assert sampler.sample(_FixedDraw(upper - 1)) == value
+        lower = upper
+
+    coin = LineSampler(
+        {6: Fraction(1, 8), 7: Fraction(3, 8), 8: Fraction(3, 8), 9: Fraction(1, 8)}
+    )
+    assert coin.denominator == 8
+    assert coin.cumulative == (1, 4, 7, 8)
+
+
+def test_fast_mode_readings():
+    """The fast mode produces valid, reproducible readings."""
+    first = cast_hexagram(seed=11, mode="yarrow_fast")
+    assert first == cast_hexagram(seed=11, mode="yarrow_fast")
+    assert all(line in (6, 7, 8, 9) for line in first["lines"])
+
+    reading = get_reading(mode="yarrow_fast", seed=5)
+    assert (
+        reading["primary_hexagram"]["number"]
+        == reading["cast_result"]["primary_hexagram_number"]
+    )
@@ -0,0 +1,106 @@
+"""Tests for the cast executors."""
+
+import asyncio
+import json
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from core.executor import (
+    CastExecutor,
+    ExecutorSaturatedError,
+    get_executor,
+    process_context,
+)
+from core.yarrow import cast_hexagram
+
+
+def test_executor_runs_off_the_event_loop():
+    """Thread and process jobs return their results and are counted."""
+    executor = CastExecutor(thread_workers=2, process_workers=2, queue_depth=4)
+
+    async def run_jobs():
+        loop_thread = threading.get_ident()
+        thread_id = await executor.run(threading.get_ident)
+        cast = await executor.run(cast_hexagram, seed=3)
+        process_cast = await executor.run_in_process(cast_hexagram, seed=3)
+        return loop_thread, thread_id, cast, process_cast
+
+    try:
+        loop_thread, thread_id, cast, process_cast = asyncio.run(run_jobs())
+    finally:
+        executor.shutdown()
+
+    assert thread_id != loop_thread
+    assert cast == process_cast
+    assert executor.stats()["completed"] == 3
+    assert executor.stats()["in_flight"] == 0
+
+
+def test_executor_rejects_when_saturated():
+    """Admission holds a slot until it is released, and fails once all are held."""
+    executor = CastExecutor(thread_workers=1, process_workers=1, queue_depth=2)
+    try:
+        first = executor.admit()
+        executor.admit()
+        assert executor.saturated
+        with pytest.raises(ExecutorSaturatedError):
+            executor.admit()
+        first()
+        first()
+        assert executor.stats()["in_flight"] == 1
+        executor.admit()
+    finally:
+        executor.shutdown()
+
+    assert executor.stats()["rejected"] == 1
+
+
+def test_streams_give_their_slot_back():
+    """Streamed batches and traces release their admission slot once sent."""
+    with TestClient(main.app) as client:
+        batch = client.post("/cast/batch", json={"count": 3})
+        trace = client.get("/cast/stream", params={"seed": 1})
+        stats = get_executor().stats()
+
+    assert len(batch.text.splitlines()) == 3
+    assert trace.status_code == 200
+    assert stats["in_flight"] == 0
+
+
+def test_cast_returns_503_when_saturated(monkeypatch):
+    """A saturated executor turns /cast requests away with 503 and Retry-After."""
+    with TestClient(main.app) as client:
+        monkeypatch.setattr(get_executor(), "queue_depth", 0)
+        response = client.post("/cast", json={})
+        health = client.get("/health").json()
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert health["executor"]["saturated"] is True
+
+
+def test_large_batch_uses_process_pool(monkeypatch):
+    """Batches above the threshold are cast in worker processes, with equal results."""
+    monkeypatch.setattr(main, "PROCESS_BATCH_THRESHOLD", 100)
+    monkeypatch.setattr(main, "PROCESS_CHUNK_SIZE", 64)
+
+    with TestClient(main.app) as client:
+        response = client.post("/cast/batch", json={"count": 300, "seed": 5})
+        assert get_executor().stats()["process_pool_started"] is True
+
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["index"] for item in items] == list(range(300))
+    assert items[250]["lines"] == [
+        str(line) for line in cast_hexagram(seed=255)["lines"]
+    ]
+
+
+def test_process_pool_does_not_fork_the_server(monkeypatch):
+    """Pool workers start in a fresh interpreter unless a start method is set."""
+    monkeypatch.delenv("CAST_PROCESS_START_METHOD", raising=False)
+    assert process_context().get_start_method() in ("forkserver", "spawn")
+    monkeypatch.setenv("CAST_PROCESS_START_METHOD", "spawn")
+    assert process_context().get_start_method() == "spawn"
@@ -0,0 +1,147 @@
+"""Tests for the SQLite reading history."""
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import core.history
+from core.history import HistoryStore, decode_cursor, encode_cursor
+from main import app
+
+LINES = [7, 8, 9, 7, 6, 8]
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A store in a temporary directory, closed after the test."""
+    history = HistoryStore(str(tmp_path / "history.db"), flush_interval=0.01)
+    yield history
+    history.close()
+
+
+def test_records_are_written_in_batches(store):
+    """Queued readings reach the database in batches, with derived columns."""
+    for seed in range(10):
+        store.record("alice", "yarrow", seed, LINES)
+    store.flush()
+
+    readings, cursor = store.page(user_id="alice")
+    assert cursor is None
+    assert [reading["seed"] for reading in readings] == list(range(9, -1, -1))
+    assert readings[0]["lines"] == LINES
+    assert readings[0]["changing_lines"] == [3, 5]
+    assert readings[0]["relating_hexagram_number"] is not None
+    stats = store.stats()
+    assert stats["written"] == 10 and stats["dropped"] == 0
+    assert stats["batches"] < 10
+
+
+def test_cursor_pages_cover_every_reading_once(store):
+    """Following next_cursor visits each matching reading exactly once, newest first."""
+    for seed in range(25):
+        store.record("bob" if seed % 2 else "alice", "coins", seed, LINES)
+    store.flush()
+
+    seen, cursor = [], None
+    while True:
+        readings, cursor = store.page(user_id="alice", cursor=cursor, limit=4)
+        seen.extend(reading["seed"] for reading in readings)
+        if cursor is None:
+            break
+    assert seen == list(range(24, -1, -2))
+
+
+def test_pages_follow_cast_time_not_insert_order(store):
+    """Readings committed out of order (by several workers) page by cast time."""
+    store._queue.put((300.0, "erin", "coins", 3, tuple(LINES)))
+    store._queue.put((100.0, "erin", "coins", 1, tuple(LINES)))
+    store._queue.put((200.0, "erin", "coins", 2, tuple(LINES)))
+    store.flush()
+
+    first, cursor = store.page(user_id="erin", limit=2)
+    rest, end = store.page(user_id="erin", cursor=cursor, limit=2)
+    assert [r["seed"] for r in first + rest] == [3, 2, 1]
+    assert end is None
+
+
+def test_filters_and_aggregate(store):
+    """Readings filter by hexagram and seed, and aggregate by mode and hexagram."""
+    store.record("alice", "yarrow", 1, [7] * 6)
+    store.record("alice", "coins", 2, [8] * 6)
+    store.record("carol", "coins", 1, [8] * 6)
+    store.flush()
+
+    assert [r["seed"] for r in store.page(hexagram=2)[0]] == [1, 2]
+    assert [r["user_id"] for r in store.page(seed=1)[0]] == ["carol", "alice"]
+    summary = store.aggregate("alice")
+    assert summary["total"] == 2
+    assert summary["modes"] == {"coins": 1, "yarrow": 1}
+    assert summary["hexagrams"] == {"1": 1, "2": 1}
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    """Recording never waits on a stalled writer; overflow is dropped and counted."""
+    history = HistoryStore(str(tmp_path / "history.db"), queue_size=1, flush_interval=0)
+    release = threading.Event()
+    insert = history._insert
+    history._insert = lambda connection, readings: (
+        release.wait(),
+        insert(connection, readings),
+    )
+
+    started = time.perf_counter()
+    results = [history.record(None, "coins", None, LINES) for _ in range(1000)]
+    assert time.perf_counter() - started < 1
+    assert results.count(False) == history.stats()["dropped"] >= 997
+
+    release.set()
+    history.close()
+    assert history.stats()["written"] == results.count(True)
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    """Cursors decode to the time and row id they encode; bad ones raise ValueError."""
+    assert decode_cursor(encode_cursor(1760000000.123456, 12345)) == (
+        1760000000.123456,
+        12345,
+    )
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor!")
+
+
+def test_casts_are_recorded_and_paged_over_http(tmp_path, monkeypatch):
+    """Casts with a user_id, including cache hits, appear in GET /history."""
+    monkeypatch.setattr(
+        core.history,
+        "_store",
+        HistoryStore(str(tmp_path / "history.db"), flush_interval=0.01),
+    )
+    with TestClient(app) as client:
+        for _ in range(2):
+            assert (
+                client.post(
+                    "/cast", json={"seed": 7, "user_id": "dana", "detail": "numbers"}
+                ).status_code
+                == 200
+            )
+        assert (
+            client.post("/cast", json={"mode": "coins", "user_id": "dana"}).status_code
+            == 200
+        )
+        core.history._store.flush()
+
+        first = client.get("/history", params={"user_id": "dana", "limit": 2}).json()
+        assert [reading["mode"] for reading in first["readings"]] == ["coins", "yarrow"]
+        rest = client.get(
+            "/history", params={"user_id": "dana", "cursor": first["next_cursor"]}
+        ).json()
+        assert [reading["seed"] for reading in rest["readings"]] == [7]
+        assert rest["next_cursor"] is None
+
+        assert (
+            client.get("/history/stats", params={"user_id": "dana"}).json()["total"]
+            == 3
+        )
+        assert client.get("/history", params={"cursor": "@@"}).status_code == 400
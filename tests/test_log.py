@@ -0,0 +1,161 @@
+"""Tests for the non-blocking JSON logging pipeline."""
+
+import io
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from core.log import (
+    DeferredQueueHandler,
+    JsonFormatter,
+    LoggingPipeline,
+    RequestLogMiddleware,
+    parse_sample_rates,
+)
+from main import app
+
+
+class ListHandler(logging.Handler):
+    """Keeps the records it handles."""
+
+    def __init__(self):
+        """Creates a handler with no records."""
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        """Keeps the record."""
+        self.records.append(record)
+
+
+def test_json_formatter_includes_extra_fields():
+    """Records render as one JSON line with interpolated message and extra fields."""
+    record = logging.LogRecord(
+        "test", logging.INFO, __file__, 1, "cast %s in %d ms", ("yarrow", 3), None
+    )
+    record.hexagram = 12
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "cast yarrow in 3 ms"
+    assert entry["level"] == "INFO" and entry["logger"] == "test"
+    assert entry["hexagram"] == 12
+
+
+def test_queue_handler_defers_formatting_and_drops_when_full():
+    """Enqueued records stay unformatted; a full queue drops instead of blocking."""
+    handler = DeferredQueueHandler(queue.Queue(1))
+    first = logging.LogRecord("test", logging.INFO, __file__, 1, "%s", ("a",), None)
+    handler.handle(first)
+    handler.handle(
+        logging.LogRecord("test", logging.INFO, __file__, 1, "%s", ("b",), None)
+    )
+
+    assert handler.queue.get_nowait() is first
+    assert not hasattr(first, "message")
+    assert handler.dropped == 1
+
+
+def test_pipeline_writes_json_lines_from_listener():
+    """Queued records come out as JSON lines once the listener drains them."""
+    stream = io.StringIO()
+    pipeline = LoggingPipeline(logging.INFO, stream, 100)
+    logger = logging.getLogger("test.pipeline")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(pipeline.handler)
+    pipeline.start()
+    try:
+        logger.info("loaded %d hexagrams", 64, extra={"format": "json"})
+        logger.debug("not written %s", object())
+    finally:
+        pipeline.stop()
+        logger.removeHandler(pipeline.handler)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(line["message"], line["format"]) for line in lines] == [
+        ("loaded 64 hexagrams", "json")
+    ]
+
+
+def test_parse_sample_rates():
+    """Route rates are read from comma-separated pairs."""
+    assert parse_sample_rates("/cast=0.01, /hexagrams/{number}=0.5,bad,") == {
+        "/cast": 0.01,
+        "/hexagrams/{number}": 0.5,
+    }
+
+
+def test_access_records_are_sampled_per_route_and_errors_always_logged():
+    """A route sampled at 0 logs only failures; others log each request and fields."""
+    handler = ListHandler()
+    access = logging.getLogger("test.access")
+    access.propagate = False
+    access.setLevel(logging.INFO)
+    access.addHandler(handler)
+    logged = RequestLogMiddleware(
+        app, default_rate=1.0, rates={"/hexagrams/{number}": 0.0}, logger=access
+    )
+
+    with TestClient(logged) as client:
+        client.get("/hexagrams/3")
+        client.get("/hexagrams/99")
+        client.post("/cast", json={"mode": "coins", "seed": 4})
+
+    assert [
+        (record.route, record.status, record.levelname) for record in handler.records
+    ] == [
+        ("/hexagrams/{number}", 422, "WARNING"),
+        ("/cast", 200, "INFO"),
+    ]
+    cast = handler.records[1]
+    assert (cast.mode, cast.seed) == ("coins", 4)
+    assert 1 <= cast.hexagram <= 64
+    assert cast.duration_ms > 0
+
+
+def test_install_keeps_root_handlers_and_restarts_listener_after_fork():
+    """Installing adds a root handler; a forked child gets a new queue and listener."""
+    root = logging.getLogger()
+    level = root.level
+    existing = ListHandler()
+    root.addHandler(existing)
+    stream = io.StringIO()
+    pipeline = LoggingPipeline(logging.INFO, stream, 100)
+    try:
+        pipeline.install()
+        assert existing in root.handlers and pipeline.handler in root.handlers
+        assert root.level == level and pipeline.handler.level == logging.INFO
+
+        parent_queue, parent_listener = pipeline.handler.queue, pipeline.listener
+        pipeline.restart_after_fork()
+        assert (
+            pipeline.handler.queue is not parent_queue
+            and pipeline.listener is not parent_listener
+        )
+        logging.getLogger("test.fork").warning("after fork")
+    finally:
+        pipeline.stop()
+        parent_listener.stop()
+        root.removeHandler(pipeline.handler)
+        root.removeHandler(existing)
+        root.setLevel(level)
+
+    assert json.loads(stream.getvalue().splitlines()[-1])["message"] == "after fork"
+    assert existing.records[-1].getMessage() == "after fork"
+
+
+def test_importing_main_leaves_logging_alone():
+    """Logging is configured by the lifespan, not by importing the app."""
+    script = (
+        "import logging; import main; handlers = logging.getLogger().handlers;"
+        "assert handlers == [], handlers"
+    )
+    subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+        check=True,
+    )
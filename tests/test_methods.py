@@ -0,0 +1,88 @@
+"""Tests for the divination method registry."""
+
+import json
+from collections import Counter
+from fractions import Fraction
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from core.methods import METHODS, UnknownMethodError, get_method
+from core.yarrow import YarrowStalks, cast_hexagram
+from main import app
+
+COIN_PROBABILITIES = {
+    6: Fraction(1, 8),
+    7: Fraction(3, 8),
+    8: Fraction(3, 8),
+    9: Fraction(1, 8),
+}
+
+
+def test_registry_and_unknown_modes():
+    """Every advertised mode is registered and unknown modes raise."""
+    assert set(METHODS) == {"yarrow", "yarrow_fast", "coins"}
+    assert get_method("coins").line_distribution() == COIN_PROBABILITIES
+
+    with pytest.raises(UnknownMethodError):
+        get_method("tarot")
+    with pytest.raises(UnknownMethodError):
+        cast_hexagram(seed=1, mode="tarot")
+
+
+def test_coin_scalar_and_batch_distributions():
+    """Both coin paths reproduce 1/8, 3/8, 3/8, 1/8."""
+    num_lines = 80_000
+    caster = YarrowStalks(seed=1, mode="coins")
+    scalar_counts = Counter(
+        caster.generate_single_line_value() for _ in range(num_lines)
+    )
+    batch_lines = get_method("coins").generate_lines_batch(
+        num_lines, np.random.default_rng(1)
+    )
+    batch_counts = Counter(batch_lines.tolist())
+
+    for line, expected in COIN_PROBABILITIES.items():
+        assert abs(scalar_counts[line] / num_lines - expected) < 0.01
+        assert abs(batch_counts[line] / num_lines - expected) < 0.01
+
+
+def test_batch_paths_for_every_method():
+    """Each method's vectorized path yields valid, reproducible hexagram batches."""
+    for method in METHODS.values():
+        batch = method.generate_hexagrams_batch(20_000, seed=3)
+        assert batch.lines.shape == (20_000, 6)
+        assert np.array_equal(
+            batch.lines, method.generate_hexagrams_batch(20_000, seed=3).lines
+        )
+
+        frequencies = (
+            np.bincount(batch.lines.ravel(), minlength=10)[6:] / batch.lines.size
+        )
+        for actual, expected in zip(
+            frequencies, method.line_distribution().values(), strict=True
+        ):
+            assert abs(actual - float(expected)) < 0.01, method.name
+
+
+def test_api_rejects_unknown_modes():
+    """Unknown modes get 422 before any casting happens; /methods lists the registry."""
+    with TestClient(app) as client:
+        assert client.post("/cast", json={"mode": "tarot"}).status_code == 422
+        assert (
+            client.post("/cast/batch", json={"count": 1, "mode": "tarot"}).status_code
+            == 422
+        )
+
+        coins = client.post("/cast", json={"mode": "coins", "seed": 9})
+        assert coins.status_code == 200
+        assert coins.json()["lines"] == [
+            str(line) for line in cast_hexagram(seed=9, mode="coins")["lines"]
+        ]
+
+        batch = client.post("/cast/batch", json={"count": 300, "mode": "coins"})
+        assert len([json.loads(line) for line in batch.text.splitlines()]) == 300
+
+        names = [method["name"] for method in client.get("/methods").json()["methods"]]
+        assert names == ["yarrow", "yarrow_fast", "coins"]
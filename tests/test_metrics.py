@@ -0,0 +1,82 @@
+"""Tests for the Prometheus metrics."""
+
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from core.metrics import MetricsRegistry
+from main import app
+
+
+def test_counter_sums_thread_shards():
+    """Increments from many threads are summed per label set at scrape time."""
+    registry = MetricsRegistry()
+    counter = registry.counter("things_total", "Things", ["kind"])
+
+    def work():
+        for _ in range(1000):
+            counter.inc("a")
+        counter.inc("b", amount=2)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.values() == {("a",): 8000, ("b",): 16}
+    text = registry.render()
+    assert "# TYPE things_total counter" in text
+    assert 'things_total{kind="a"} 8000' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    """Observations land in the first bucket whose bound covers them."""
+    registry = MetricsRegistry()
+    histogram = registry.histogram(
+        "latency_seconds", "Latency", ["stage"], buckets=(0.1, 1.0)
+    )
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "cast")
+
+    cumulative, total, count = histogram.values()[("cast",)]
+    assert cumulative == [2, 3, 4]
+    assert count == 4 and abs(total - 3.65) < 1e-9
+    text = registry.render()
+    assert 'latency_seconds_bucket{stage="cast",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{stage="cast",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{stage="cast"} 4' in text
+
+
+def test_registry_reuses_and_rejects_names():
+    """Registering a name twice returns the same metric unless the type differs."""
+    registry = MetricsRegistry()
+    counter = registry.counter("x_total", "X")
+    assert registry.counter("x_total", "X") is counter
+    with pytest.raises(ValueError):
+        registry.histogram("x_total", "X")
+
+
+def test_metrics_endpoint_reports_requests_stages_and_casts():
+    """/metrics exposes route latency, reading stages, casts and runtime gauges."""
+    with TestClient(app) as client:
+        client.post("/cast", json={"mode": "coins", "seed": 7})
+        client.post("/cast", json={"mode": "coins", "seed": 7})
+        client.get("/hexagrams/3")
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    latency = "iching_http_request_duration_seconds_count"
+    assert latency + '{method="GET",route="/hexagrams/{number}"}' in text
+    assert (
+        'iching_http_responses_total{method="POST",route="/cast",status="200"}' in text
+    )
+    for stage in ("corpus", "cast", "assemble", "serialize"):
+        assert f'iching_reading_stage_seconds_count{{stage="{stage}"}}' in text
+    assert 'iching_casts_total{mode="coins"}' in text
+    assert 'iching_primary_hexagram_total{mode="coins",hexagram="' in text
+    assert 'iching_cast_cache_lookups_total{result="hit"}' in text
+    assert 'iching_executor_jobs{state="queue_depth"}' in text
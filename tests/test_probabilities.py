@@ -0,0 +1,68 @@
+"""Tests for the exact outcome probability tables."""
+
+from fractions import Fraction
+from math import comb
+
+from fastapi.testclient import TestClient
+
+from core.distribution import yarrow_line_distribution
+from core.probabilities import probability_tables
+from core.tables import MASK_BY_HEXAGRAM_NUMBER
+from main import app
+
+
+def test_tables_are_exact_and_consistent():
+    """Tables sum to one and agree with each other and the line distribution."""
+    for mode in ("yarrow", "yarrow_fast", "coins"):
+        tables = probability_tables(mode)
+        assert (
+            sum(tables.outcomes)
+            == sum(tables.primary)
+            == sum(tables.changing_lines)
+            == 1
+        )
+        for primary, row in zip(tables.primary, tables.transitions, strict=True):
+            assert sum(row) == primary
+
+    # Three coins: all hexagrams equally likely, changing lines Binomial(6, 1/4)
+    coins = probability_tables("coins")
+    assert set(coins.primary) == {Fraction(1, 64)}
+    assert coins.changing_lines == tuple(
+        comb(6, k) * Fraction(1, 4) ** k * Fraction(3, 4) ** (6 - k) for k in range(7)
+    )
+
+    # Yarrow: a primary's probability is the product of its yang and yin line odds
+    line = yarrow_line_distribution()
+    yang, yin = line[7] + line[9], line[6] + line[8]
+    yarrow = probability_tables("yarrow")
+    for number in range(1, 65):
+        yang_lines = MASK_BY_HEXAGRAM_NUMBER[number].bit_count()
+        assert yarrow.primary[number - 1] == yang**yang_lines * yin ** (6 - yang_lines)
+    assert yarrow.transitions[0][0] == line[7] ** 6
+
+
+def test_stats_endpoints():
+    """Every stats view is served per mode; unknown modes are 404."""
+    with TestClient(app) as client:
+        summary = client.get("/stats/coins").json()
+        assert summary["lines_exact"] == {
+            "6": "1/8",
+            "7": "3/8",
+            "8": "3/8",
+            "9": "1/8",
+        }
+        assert summary["primary"]["1"] == 1 / 64
+
+        hexagram = client.get("/stats/yarrow/hexagrams/1").json()
+        assert hexagram["primary"] == float(probability_tables("yarrow").primary[0])
+        assert abs(sum(hexagram["relating_given_primary"].values()) - 1) < 1e-12
+
+        matrix = client.get("/stats/yarrow_fast/transitions").json()["matrix"]
+        assert len(matrix) == 64 and all(len(row) == 64 for row in matrix)
+
+        outcomes = client.get("/stats/yarrow/outcomes").json()["outcomes"]
+        assert len(outcomes) == 4096
+        assert abs(sum(outcome["probability"] for outcome in outcomes) - 1) < 1e-12
+
+        assert client.get("/stats/tarot").status_code == 404
+        assert client.get("/stats/yarrow/hexagrams/65").status_code == 422
@@ -0,0 +1,62 @@
+"""Tests for per-request stage timing and profiling."""
+
+import pstats
+
+from fastapi.testclient import TestClient
+
+from core.profiling import ProfileRateLimiter, ProfilingMiddleware, server_timing
+from main import app
+
+
+def test_server_timing_format():
+    """Stages are rendered in milliseconds, followed by the total."""
+    assert server_timing([("cast", 0.0004), ("serialize", 0.00002)], 0.0012) == (
+        b"cast;dur=0.400, serialize;dur=0.020, total;dur=1.200"
+    )
+
+
+def test_rate_limiter_allows_one_profile_per_interval():
+    """A second profile is refused while one runs and until the interval has passed."""
+    now = [100.0]
+    limiter = ProfileRateLimiter(10, clock=lambda: now[0])
+    assert limiter.acquire()
+    assert not limiter.acquire()
+    limiter.release()
+    now[0] = 105.0
+    assert not limiter.acquire()
+    now[0] = 110.0
+    assert limiter.acquire()
+    assert limiter.skipped == 2
+
+
+def test_cast_response_carries_stage_timings():
+    """Every /cast response reports its reading stages in Server-Timing."""
+    with TestClient(app) as client:
+        response = client.post("/cast", json={"mode": "yarrow"})
+    timing = response.headers["server-timing"]
+    for stage in ("corpus", "cast", "assemble", "serialize", "total"):
+        assert f"{stage};dur=" in timing
+    assert "x-profile-file" not in response.headers
+
+
+def test_profiled_request_writes_profile(tmp_path):
+    """With profiling on, X-Profile requests write loadable, rate-limited profiles."""
+    profiled = ProfilingMiddleware(
+        app, enabled=True, directory=str(tmp_path), min_interval=60
+    )
+    with TestClient(profiled) as client:
+        unprofiled = client.post("/cast", json={"mode": "yarrow"})
+        first = client.post(
+            "/cast", json={"mode": "yarrow"}, headers={"X-Profile": "1"}
+        )
+        second = client.post(
+            "/cast", json={"mode": "yarrow"}, headers={"X-Profile": "1"}
+        )
+
+    assert "x-profile-file" not in unprofiled.headers
+    assert "x-profile-file" not in second.headers
+    path = tmp_path / first.headers["x-profile-file"]
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+    functions = {function for _, _, function in pstats.Stats(str(path)).stats}
+    # Casting runs in the executor thread, so this shows that thread was profiled too
+    assert "perform_division" in functions
@@ -0,0 +1,100 @@
+"""Tests for the compact cast result types."""
+
+from itertools import product
+
+import pytest
+
+from core.batch import generate_hexagrams_batch
+from core.results import CastResult, CastResultArray
+from core.yarrow import (
+    cast_compact,
+    cast_hexagram,
+    get_changing_line_indices,
+    get_hexagram_number,
+    get_transformed_lines,
+    get_trigram_name,
+    get_trigram_value,
+)
+
+
+def expected_cast_dict(lines):
+    """The cast dictionary built field by field from the scalar helpers."""
+    lower, upper = get_trigram_value(lines[:3]), get_trigram_value(lines[3:])
+    result = {
+        "lines": lines,
+        "changing_line_indices": get_changing_line_indices(lines),
+        "primary_hexagram_number": get_hexagram_number(lines),
+        "trigrams": {
+            "lower": {"value": lower, "name": get_trigram_name(lower)},
+            "upper": {"value": upper, "name": get_trigram_name(upper)},
+        },
+    }
+    if result["changing_line_indices"]:
+        result["transformed_hexagram_number"] = get_hexagram_number(
+            get_transformed_lines(lines)
+        )
+        result["transformed_lines"] = get_transformed_lines(lines)
+    return result
+
+
+def test_to_dict_matches_cast_shape_for_all_outcomes():
+    """Every one of the 4096 outcomes expands to the same dict, key order included."""
+    for lines in product((6, 7, 8, 9), repeat=6):
+        lines = list(lines)
+        result = CastResult.from_lines(lines)
+        expected = expected_cast_dict(lines)
+
+        assert result.lines == lines
+        assert CastResult.from_packed(result.packed) == result
+        assert result.packed < 1 << 12
+        assert list(result.to_dict().items()) == list(expected.items())
+
+    assert cast_compact(seed=11).to_dict() == cast_hexagram(seed=11)
+
+
+def test_result_is_compact_and_immutable():
+    """Results carry no per-instance dict, cannot change and hash by value."""
+    result = CastResult.from_lines([7, 8, 9, 6, 7, 8])
+    assert not hasattr(result, "__dict__")
+    with pytest.raises(AttributeError):
+        result.extra = 1
+    with pytest.raises(AttributeError):
+        result.yang_mask = 0
+    assert {result, CastResult.from_packed(result.packed)} == {result}
+
+
+def test_result_array_round_trips_batches():
+    """Arrays store two bytes per cast and round-trip results and batches."""
+    batch = generate_hexagrams_batch(5000, seed=2)
+    results = batch.results()
+
+    assert len(results) == 5000
+    assert results.packed().itemsize == 2
+    assert results.to_numpy().dtype.itemsize == 2
+    for lines, primary, relating, result in zip(
+        batch.lines.tolist(), batch.primary, batch.relating, results, strict=True
+    ):
+        assert result.lines == lines
+        assert result.primary_hexagram_number == primary
+        assert (
+            result.transformed_hexagram_number or result.primary_hexagram_number
+        ) == relating
+
+    copy = CastResultArray(results)
+    copy.append(cast_compact(seed=1))
+    assert len(copy) == 5001
+    assert copy[-1] == cast_compact(seed=1)
+    assert list(CastResultArray.from_packed(results.packed())) == list(results)
+
+
+def test_result_array_numpy_copy_and_slices():
+    """NumPy exports are copies, so the container can grow; slices are containers."""
+    results = CastResultArray(cast_compact(seed=seed) for seed in range(10))
+    exported = results.to_numpy()
+    results.append(cast_compact(seed=10))
+    assert len(exported) == 10 and len(results) == 11
+
+    tail = results[-3:]
+    assert isinstance(tail, CastResultArray)
+    assert list(tail) == [cast_compact(seed=seed) for seed in range(8, 11)]
+    assert list(results[::5]) == [results[0], results[5], results[10]]
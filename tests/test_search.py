@@ -0,0 +1,128 @@
+"""Tests for full-text search over the corpus."""
+
+import json
+
+from fastapi.testclient import TestClient
+
+from core import corpus as corpus_module
+from core.corpus import HexagramCorpus
+from core.search import SearchIndex, parse_query
+from main import app
+
+ENTRIES = {
+    1: {
+        "number": 1,
+        "name": "One",
+        "judgment": "Perseverance furthers.",
+        "image": "Heaven moves.",
+        "lines": [
+            {"lineNumber": 1, "meaning": "Hidden dragon. Do not act."},
+            {"lineNumber": 5, "meaning": "Flying dragon in the heavens. Dragon flies."},
+        ],
+        "commentary": [
+            "The dragon is the image of power.",
+            "Persistence brings success.",
+        ],
+    },
+    2: {
+        "number": 2,
+        "name": "Two",
+        "judgment": "The mare's perseverance.",
+        "commentary": ["No dragon here? A dragon!"],
+    },
+}
+
+
+def test_query_parsing():
+    """Quotes make phrases, a trailing star a prefix, split words become phrases."""
+    assert parse_query('"Flying dragon" persever* Ch\'ien ?') == [
+        ("phrase", ("flying", "dragon")),
+        ("prefix", ("persever",)),
+        ("phrase", ("ch", "ien")),
+    ]
+
+
+def test_terms_prefixes_phrases_and_highlights():
+    """Every query kind matches the right passages with exact highlight offsets."""
+    index = SearchIndex.from_corpus(ENTRIES)
+
+    total, hits = index.search("dragon")
+    assert total == 4
+    located = {
+        (hit.passage.number, hit.passage.field, hit.passage.index) for hit in hits
+    }
+    assert located == {
+        (1, "lines", 1),
+        (1, "lines", 5),
+        (1, "commentary", 1),
+        (2, "commentary", 1),
+    }
+    for hit in hits:
+        assert all(
+            hit.passage.text[start:end].lower() == "dragon"
+            for start, end in hit.highlights
+        )
+
+    total, hits = index.search('"flying dragon"')
+    assert total == 1 and hits[0].highlights == [(0, 13)]
+
+    total, hits = index.search("persever*")
+    assert {hit.passage.number for hit in hits} == {1, 2}
+    assert index.search("persist*")[0] == 1
+
+    assert index.search("dragon power")[0] == 1
+    assert index.search("dragon", fields=["lines"])[0] == 2
+    assert index.search("unicorn") == (0, [])
+
+
+def test_ranking_and_pagination():
+    """Denser, boosted matches rank first and pages partition the ranking."""
+    index = SearchIndex.from_corpus(ENTRIES)
+    _, ranked = index.search("dragon", limit=10)
+    assert ranked[0].passage.index == 5  # two occurrences in a line
+    assert [hit.score for hit in ranked] == sorted(
+        (hit.score for hit in ranked), reverse=True
+    )
+
+    pages = [index.search("dragon", offset=offset, limit=2)[1] for offset in (0, 2)]
+    assert [hit.passage for page in pages for hit in page] == [
+        hit.passage for hit in ranked
+    ]
+
+
+def test_search_endpoint():
+    """GET /search pages through ranked corpus passages."""
+    with TestClient(app) as client:
+        body = client.get(
+            "/search", params={"q": "dragon", "field": "lines", "limit": 3}
+        ).json()
+        assert body["total"] >= 4 and len(body["results"]) == 3
+        first = body["results"][0]
+        assert first["field"] == "lines"
+        start, end = first["highlights"][0]
+        assert first["text"][start:end].lower() == "dragon"
+
+        following = client.get(
+            "/search", params={"q": "dragon", "field": "lines", "offset": 3}
+        ).json()
+        assert following["results"][0] not in body["results"]
+
+        assert client.get("/search", params={"q": ""}).status_code == 422
+        assert (
+            client.get("/search", params={"q": "dragon", "field": "name"}).status_code
+            == 422
+        )
+
+
+def test_search_follows_a_reload_that_drops_entries(tmp_path, monkeypatch):
+    """After a reload removes entries, hits come only from the entries left."""
+    with TestClient(app) as client:
+        assert client.get("/search", params={"q": "dragon"}).json()["total"] > 2
+
+        path = tmp_path / "hexagrams.json"
+        path.write_text(json.dumps(list(ENTRIES.values())), encoding="utf-8")
+        monkeypatch.setattr(corpus_module, "_corpus", HexagramCorpus(str(path)))
+        response = client.get("/search", params={"q": "dragon", "limit": 100})
+
+    assert response.status_code == 200
+    assert {result["name"] for result in response.json()["results"]} == {"One", "Two"}
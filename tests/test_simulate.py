@@ -0,0 +1,92 @@
+"""Tests for the multi-process Monte Carlo simulation."""
+
+import numpy as np
+
+import core.simulate as simulate_module
+from core.probabilities import probability_tables
+from core.simulate import (
+    SimulationConfig,
+    SimulationState,
+    count_chunk,
+    load_checkpoint,
+    main,
+    run_simulation,
+    save_checkpoint,
+    summarize,
+)
+
+CONFIG = SimulationConfig("coins", 50_000, seed=2024, chunk_size=8_000)
+
+
+def test_totals_do_not_depend_on_worker_count():
+    """Per-chunk seed streams make the totals identical for any number of workers."""
+    single = run_simulation(CONFIG, workers=1, report=None)
+    several = run_simulation(CONFIG, workers=3, report=None)
+
+    assert single.finished and several.finished
+    assert single.completed == set(range(CONFIG.chunk_count))
+    assert np.array_equal(single.counts, several.counts)
+    assert np.array_equal(
+        single.counts,
+        sum(count_chunk(CONFIG, index) for index in range(CONFIG.chunk_count)),
+    )
+
+
+def test_resume_from_checkpoint_matches_uninterrupted_run(tmp_path):
+    """A run resumed from a partial checkpoint finishes with the same counts."""
+    path = str(tmp_path / "sim.json")
+    done = {0, 3, 6}
+    partial = SimulationState(
+        CONFIG, sum(count_chunk(CONFIG, index) for index in done), done, elapsed=1.5
+    )
+    save_checkpoint(path, partial)
+
+    resumed = run_simulation(
+        CONFIG, workers=2, checkpoint=path, report=None, state=load_checkpoint(path)
+    )
+
+    assert np.array_equal(
+        resumed.counts, run_simulation(CONFIG, workers=1, report=None).counts
+    )
+    saved = load_checkpoint(path)
+    assert saved.finished and np.array_equal(saved.counts, resumed.counts)
+    assert saved.elapsed >= 1.5
+
+
+def test_summary_is_derived_from_outcome_counts():
+    """Line, primary and transition counts add up to the casts, near the exact odds."""
+    counts = run_simulation(CONFIG, workers=1, report=None).counts
+    summary = summarize(counts)
+
+    assert summary["hexagrams"] == CONFIG.hexagrams
+    assert sum(summary["lines"].values()) == CONFIG.hexagrams * 6
+    assert sum(summary["primary"]) == CONFIG.hexagrams
+    assert np.array_equal(
+        np.array(summary["transitions"]).sum(axis=1), summary["primary"]
+    )
+    assert abs(summary["lines"]["6"] / (CONFIG.hexagrams * 6) - 1 / 8) < 0.01
+    expected = probability_tables("coins").transitions
+    assert all(
+        summary["transitions"][i][j] == 0
+        for i in range(64)
+        for j in range(64)
+        if not expected[i][j]
+    )
+
+
+def test_worker_failure_is_an_error_not_an_interruption(tmp_path, monkeypatch, capsys):
+    """A crashed worker is reported with exit status 1 and its checkpoint is kept."""
+    path = str(tmp_path / "sim.json")
+    broken = CONFIG._replace(mode="no-such-method")
+
+    state = run_simulation(broken, workers=2, checkpoint=path, report=None)
+
+    assert state.worker_failures and all(code != 0 for code in state.worker_failures)
+    assert not state.finished
+    assert load_checkpoint(path).config == broken
+
+    monkeypatch.setattr(
+        simulate_module, "run_simulation", lambda *args, **kwargs: state
+    )
+    assert main(["--mode", "coins", "--hexagrams", "50_000", "--seed", "2024"]) == 1
+    assert "Worker failed" in capsys.readouterr().err
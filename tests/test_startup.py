@@ -0,0 +1,45 @@
+"""Tests for the application factory and pre-fork warm-up."""
+
+import gc
+import os
+
+from fastapi.testclient import TestClient
+
+from core.startup import create_app, freeze_heap, startup_timings
+
+
+def test_create_app_preloads_and_times_each_phase():
+    """The factory returns the app with shared state built and every phase timed."""
+    from core import search
+    from main import app
+
+    assert create_app() is app
+    phases = startup_timings()["phases_ms"]
+    for phase in (
+        "import_framework",
+        "import_app",
+        "load_corpus",
+        "lookup_tables",
+        "probability_tables",
+        "search_index",
+    ):
+        assert phases[phase] >= 0
+    assert search._index is not None
+
+
+def test_freeze_heap_moves_objects_to_permanent_generation():
+    """Freezing leaves surviving objects out of later collections."""
+    try:
+        freeze_heap()
+        assert gc.get_freeze_count() > 0
+        assert "gc_freeze" in startup_timings()["phases_ms"]
+    finally:
+        gc.unfreeze()
+
+
+def test_health_reports_startup_timings():
+    """/health includes the startup phases of the serving process."""
+    with TestClient(create_app()) as client:
+        startup = client.get("/health").json()["startup"]
+    assert startup["pid"] == os.getpid()
+    assert "load_corpus" in startup["phases_ms"]
@@ -0,0 +1,156 @@
+"""Tests for the precomputed hexagram lookup tables."""
+
+from itertools import product
+
+from core.tables import (
+    CHANGING_INDICES_BY_MASK,
+    HEXAGRAM_NUMBER_BY_MASK,
+    MASK_BY_HEXAGRAM_NUMBER,
+    line_masks,
+    lines_from_masks,
+    relating_hexagram_number,
+)
+from core.yarrow import (
+    cast_hexagram,
+    get_changing_line_indices,
+    get_hexagram_number,
+    get_transformed_lines,
+    get_trigram_name,
+    get_trigram_value,
+)
+
+# Trigram lines from bottom to top (True = yang)
+TRIGRAM_LINES = {
+    "Heaven": (True, True, True),
+    "Lake": (True, True, False),
+    "Fire": (True, False, True),
+    "Thunder": (True, False, False),
+    "Wind": (False, True, True),
+    "Water": (False, True, False),
+    "Mountain": (False, False, True),
+    "Earth": (False, False, False),
+}
+
+# King Wen sequence as (upper trigram, lower trigram)
+KING_WEN_SEQUENCE = {
+    1: ("Heaven", "Heaven"),
+    2: ("Earth", "Earth"),
+    3: ("Water", "Thunder"),
+    4: ("Mountain", "Water"),
+    5: ("Water", "Heaven"),
+    6: ("Heaven", "Water"),
+    7: ("Earth", "Water"),
+    8: ("Water", "Earth"),
+    9: ("Wind", "Heaven"),
+    10: ("Heaven", "Lake"),
+    11: ("Earth", "Heaven"),
+    12: ("Heaven", "Earth"),
+    13: ("Heaven", "Fire"),
+    14: ("Fire", "Heaven"),
+    15: ("Earth", "Mountain"),
+    16: ("Thunder", "Earth"),
+    17: ("Lake", "Thunder"),
+    18: ("Mountain", "Wind"),
+    19: ("Earth", "Lake"),
+    20: ("Wind", "Earth"),
+    21: ("Fire", "Thunder"),
+    22: ("Mountain", "Fire"),
+    23: ("Mountain", "Earth"),
+    24: ("Earth", "Thunder"),
+    25: ("Heaven", "Thunder"),
+    26: ("Mountain", "Heaven"),
+    27: ("Mountain", "Thunder"),
+    28: ("Lake", "Wind"),
+    29: ("Water", "Water"),
+    30: ("Fire", "Fire"),
+    31: ("Lake", "Mountain"),
+    32: ("Thunder", "Wind"),
+    33: ("Heaven", "Mountain"),
+    34: ("Thunder", "Heaven"),
+    35: ("Fire", "Earth"),
+    36: ("Earth", "Fire"),
+    37: ("Wind", "Fire"),
+    38: ("Fire", "Lake"),
+    39: ("Water", "Mountain"),
+    40: ("Thunder", "Water"),
+    41: ("Mountain", "Lake"),
+    42: ("Wind", "Thunder"),
+    43: ("Lake", "Heaven"),
+    44: ("Heaven", "Wind"),
+    45: ("Lake", "Earth"),
+    46: ("Earth", "Wind"),
+    47: ("Lake", "Water"),
+    48: ("Water", "Wind"),
+    49: ("Lake", "Fire"),
+    50: ("Fire", "Wind"),
+    51: ("Thunder", "Thunder"),
+    52: ("Mountain", "Mountain"),
+    53: ("Wind", "Mountain"),
+    54: ("Thunder", "Lake"),
+    55: ("Thunder", "Fire"),
+    56: ("Fire", "Mountain"),
+    57: ("Wind", "Wind"),
+    58: ("Lake", "Lake"),
+    59: ("Wind", "Water"),
+    60: ("Water", "Lake"),
+    61: ("Wind", "Lake"),
+    62: ("Thunder", "Mountain"),
+    63: ("Water", "Fire"),
+    64: ("Fire", "Water"),
+}
+
+
+def _stable_lines(upper: str, lower: str) -> list:
+    """Builds non-changing line values (7/8) for a trigram pair."""
+    return [7 if yang else 8 for yang in TRIGRAM_LINES[lower] + TRIGRAM_LINES[upper]]
+
+
+def test_king_wen_sequence_is_exact():
+    """Every trigram pair maps to its King Wen number and back."""
+    assert sorted(HEXAGRAM_NUMBER_BY_MASK) == list(range(1, 65))
+
+    for number, (upper, lower) in KING_WEN_SEQUENCE.items():
+        lines = _stable_lines(upper, lower)
+        assert (
+            get_hexagram_number(lines) == number
+        ), f"Hexagram {number} ({upper} over {lower})"
+        assert get_trigram_name(get_trigram_value(lines[3:])) == upper
+        assert get_trigram_name(get_trigram_value(lines[:3])) == lower
+        assert HEXAGRAM_NUMBER_BY_MASK[MASK_BY_HEXAGRAM_NUMBER[number]] == number
+
+
+def test_tables_match_line_arithmetic_for_all_casts():
+    """All 4096 six-line outcomes agree with a direct line-by-line computation."""
+    for lines in product((6, 7, 8, 9), repeat=6):
+        lines = list(lines)
+        yang_mask, changing_mask = line_masks(lines)
+        assert lines_from_masks(yang_mask, changing_mask) == lines
+
+        changing = [i for i, line in enumerate(lines) if line in (6, 9)]
+        transformed = [{6: 7, 9: 8}.get(line, line) for line in lines]
+        assert list(CHANGING_INDICES_BY_MASK[changing_mask]) == changing
+        assert get_changing_line_indices(lines) == changing
+        assert get_transformed_lines(lines) == transformed
+        assert relating_hexagram_number(
+            yang_mask, changing_mask
+        ) == get_hexagram_number(transformed)
+
+
+def test_cast_hexagram_uses_tables():
+    """cast_hexagram results are consistent with the lookup helpers."""
+    for seed in range(50):
+        result = cast_hexagram(seed=seed)
+        lines = result["lines"]
+        assert result["primary_hexagram_number"] == get_hexagram_number(lines)
+        assert result["changing_line_indices"] == get_changing_line_indices(lines)
+        assert result["trigrams"]["lower"]["value"] == get_trigram_value(lines[:3])
+        assert result["trigrams"]["upper"]["name"] == get_trigram_name(
+            get_trigram_value(lines[3:])
+        )
+        if result["changing_line_indices"]:
+            assert result["transformed_lines"] == get_transformed_lines(lines)
+            assert result["transformed_hexagram_number"] == get_hexagram_number(
+                result["transformed_lines"]
+            )
+        else:
+            assert "transformed_hexagram_number" not in result
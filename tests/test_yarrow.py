@@ -0,0 +1,121 @@
+"""Tests for the yarrow stalk casting core."""
+
+import os
+import random
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from core.yarrow import (
+    YarrowStalks,
+    cast_hexagram,
+    generate_hexagram,
+    generate_one_line,
+    get_reading,
+    perform_division,
+)
+
+
+def test_seeded_casts_do_not_touch_global_random():
+    """Seeding a cast leaves the global random module's state untouched."""
+    random.seed(1234)
+    expected = [random.random() for _ in range(5)]
+
+    random.seed(1234)
+    generate_hexagram(seed=99)
+    generate_one_line(seed=5)
+    cast_hexagram(seed=7, mode="yarrow_fast")
+    get_reading(seed=3)
+    YarrowStalks(seed=8).generate_hexagram()
+
+    assert [random.random() for _ in range(5)] == expected
+
+
+def test_seeded_casts_are_reproducible():
+    """The same seed gives the same lines through every entry point."""
+    lines = YarrowStalks(seed=42).generate_hexagram()
+
+    assert generate_hexagram(seed=42) == lines
+    assert cast_hexagram(seed=42)["lines"] == lines
+    assert get_reading(seed=42)["cast_result"]["lines"] == lines
+
+    caster = YarrowStalks(seed=42)
+    assert [caster.generate_single_line_value() for _ in range(6)] == lines
+
+    shared = random.Random(42)
+    assert generate_hexagram(rng=shared) == lines
+
+
+def test_seeded_casts_are_thread_safe():
+    """Concurrent seeded casts in a thread pool match their sequential results."""
+    seeds = list(range(200))
+    sequential = [cast_hexagram(seed=seed)["lines"] for seed in seeds]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        concurrent = list(
+            pool.map(lambda seed: cast_hexagram(seed=seed)["lines"], seeds)
+        )
+
+    assert concurrent == sequential
+
+
+def test_traced_division_matches_untraced_division():
+    """A traced division draws the same number and reaches the same counts."""
+    # Every stalk count a division can start from: 49, then 44 or 40, then 40, 36 or 32
+    for stalks in (49, 44, 40, 36, 32):
+        for seed in range(200):
+            trace = []
+            result = perform_division(stalks, random.Random(seed), trace, 1, 1)
+            assert result == perform_division(stalks, random.Random(seed))
+            [division] = trace
+            assert (division.remainder, division.stalks_out) == result
+            assert (
+                division.left_pile + division.right_pile + division.finger_stalk
+                == stalks
+            )
+
+    trace = []
+    value = generate_one_line(rng=random.Random(7), trace=trace, line=3)
+    assert value == generate_one_line(rng=random.Random(7))
+    assert [(division.line, division.stage) for division in trace] == [
+        (3, 1),
+        (3, 2),
+        (3, 3),
+    ]
+
+
+def test_trace_records_all_divisions_without_changing_lines():
+    """A traced yarrow cast records 18 divisions and matches the untraced cast."""
+    for seed in range(50):
+        traced = cast_hexagram(seed=seed, verbose=True)
+        assert traced["lines"] == cast_hexagram(seed=seed)["lines"]
+
+        fields = traced["trace"]["fields"]
+        rows = [
+            dict(zip(fields, row, strict=True)) for row in traced["trace"]["divisions"]
+        ]
+        assert [(row["line"], row["stage"]) for row in rows] == [
+            (line, stage) for line in range(1, 7) for stage in range(1, 4)
+        ]
+        for line, value in enumerate(traced["lines"], start=1):
+            stages = [row for row in rows if row["line"] == line]
+            assert stages[0]["stalks_in"] == 49
+            assert sum(row["stage_value"] for row in stages) == value
+
+    assert cast_hexagram(seed=1, verbose=True, mode="coins")["trace"]["divisions"] == []
+    assert "trace" not in cast_hexagram(seed=1)
+
+
+def test_reading_reports_timings_without_instrumentation():
+    """get_reading reports stage timings without importing metrics or profiling."""
+    script = (
+        "import sys; from core.yarrow import get_reading;"
+        "timings = get_reading(seed=1)['timings'];"
+        "assert list(timings) == ['corpus', 'cast', 'assemble'];"
+        "assert not {'core.metrics', 'core.profiling'} & set(sys.modules)"
+    )
+    subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+        check=True,
+    )